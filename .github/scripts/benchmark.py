@@ -0,0 +1,1124 @@
+"""
+工作流脚本的性能基准测试
+
+每个子命令对应一个工作流步骤，在当前仓库的数据（或按需生成的合成数据）上
+测量耗时与吞吐量，便于在修改脚本后确认同步任务的耗时没有退化。
+
+用法:
+  python benchmark.py post-process [--corpus fixtures/post_process_values.json] [--path CNPack]
+  python benchmark.py zh-convert --dict-dir path/to/opencc/data/dictionary [--path CNPack]
+  python benchmark.py colors-jobs [--path CNPack] [--jobs 1 2 4]
+  python benchmark.py colors-report [--errors 100000]
+  python benchmark.py snbt-read [--path CNPack]
+  python benchmark.py path-matcher [--files 100000] [--on-disk]
+  python benchmark.py lang-diff [--chapters 200] [--quests 50]
+  python benchmark.py compare-archives [--size-mb 2048]
+  python benchmark.py compare-jobs [--files 300] [--jobs 1 2 4]
+  python benchmark.py diff-engine [--lines 20000] [--algorithms difflib myers patience histogram]
+  python benchmark.py report-size [--files 2000] [--lines 500]
+  python benchmark.py semantic-diff [--keys 20000]
+  python benchmark.py compare-memory [--files 200] [--lines 5000] [--baseline old_compare_archives.py]
+  python benchmark.py renames [--moved 20000] [--unmatched 2000]
+  python benchmark.py download-resume [--size-mb 64]
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import tempfile
+import time
+from pathlib import Path
+
+FIXTURES_DIR = Path(__file__).with_name("fixtures")
+
+
+def format_rate(amount: float, seconds: float, unit: str) -> str:
+    if seconds <= 0:
+        return f"∞ {unit}/s"
+    rate = amount / seconds
+    for prefix in ("", "K", "M", "G"):
+        if rate < 1000:
+            return f"{rate:.1f} {prefix}{unit}/s"
+        rate /= 1000
+    return f"{rate:.1f} T{unit}/s"
+
+
+def legacy_post_process(value: str, path: str) -> str:
+    """para2github.process_translation 改用 VALUE_RULES 之前逐条执行的替换，作为对照。"""
+    is_quest_file = "quests" in str(path)
+    value = re.sub(r'\\"', '"', value)
+
+    # 增加一个判断：如果值像一个JSON对象（以{开头，以}结尾），则跳过全局替换
+    is_json_like = value.strip().startswith("{") and value.strip().endswith("}")
+
+    if (
+        is_quest_file
+        and not is_json_like
+        and "image" not in value
+        and not value.startswith('["')
+        and '"color": ' not in value
+    ):
+        value = value.replace(" ", "\u00a0")
+    return value
+
+
+def bench_post_process(args: argparse.Namespace) -> None:
+    # para2github 在导入时检查 Paratranz 凭据，基准测试不会访问网络
+    os.environ.setdefault("API_TOKEN", "benchmark")
+    os.environ.setdefault("PROJECT_ID", "0")
+    from para2github import VALUE_RULES, ValuePostProcessor
+
+    with open(args.corpus, encoding="utf-8") as f:
+        corpus = [tuple(entry) for entry in json.load(f)]
+    mismatches = [
+        (path, value)
+        for path, value in corpus
+        if ValuePostProcessor(VALUE_RULES).for_path(path)(value)
+        != legacy_post_process(value, path)
+    ]
+    print(f"对照语料 {args.corpus}: {len(corpus)} 条，结果不一致 {len(mismatches)} 条")
+    for path, value in mismatches:
+        print(f"  !! {path}: {value!r}")
+
+    # 计时语料：仓库中的译文，按原文路径（quests 规则依赖路径）分组
+    files = []
+    for target in sorted(Path(args.path).rglob("*zh_cn*.json")):
+        rel = target.relative_to(args.path).as_posix().replace("zh_cn", "en_us")
+        data = json.loads(target.read_text(encoding="utf-8"))
+        files.append(
+            (rel, [v for v in data.values() if isinstance(v, str)] * args.scale)
+        )
+    total = sum(len(values) for _, values in files)
+    print(f"计时语料: {len(files)} 个文件，共 {total} 条译文")
+
+    timings = {}
+    outputs = {}
+    for name in ("修改前", "VALUE_RULES"):
+        best = float("inf")
+        for _ in range(args.repeat):
+            processor = ValuePostProcessor(VALUE_RULES)
+            start = time.perf_counter()
+            result = []
+            for rel, values in files:
+                if name == "修改前":
+                    result.extend(legacy_post_process(value, rel) for value in values)
+                else:
+                    post_process = processor.for_path(rel)
+                    result.extend(post_process(value) for value in values)
+            best = min(best, time.perf_counter() - start)
+        timings[name], outputs[name] = best, result
+    identical = "一致" if outputs["修改前"] == outputs["VALUE_RULES"] else "不一致！"
+    for name, best in timings.items():
+        print(f"  -> {name}: {best * 1000:.1f} ms，{format_rate(total, best, '条')}")
+    print(f"两种实现的输出{identical}")
+
+
+def bench_zh_convert(args: argparse.Namespace) -> None:
+    from zh_convert import convert_values, load_converters
+
+    start = time.perf_counter()
+    converters = load_converters(args.dict_dir, args.glossary)
+    print(f"词典加载耗时: {(time.perf_counter() - start) * 1000:.1f} ms")
+    if not converters:
+        print("未指定 OpenCC 词典目录，跳过。")
+        return
+
+    texts = [
+        p.read_text(encoding="utf-8")
+        for p in sorted(Path(args.path).rglob("*zh_cn*"))
+        if p.suffix in (".json", ".snbt")
+    ]
+    total_chars = sum(len(t) for t in texts)
+    print(f"语料: {len(texts)} 个文件，共 {total_chars} 个字符")
+
+    for lang, converter in converters.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for text in texts:
+                convert_values(text, converter)
+            best = min(best, time.perf_counter() - start)
+        print(
+            f"  -> {lang}: {best * 1000:.1f} ms，{format_rate(total_chars, best, '字符')}"
+        )
+
+
+def bench_colors_jobs(args: argparse.Namespace) -> None:
+    from check_ftb_colors import check_directory, collect_files
+
+    files = collect_files(args.path)
+    total_bytes = sum(os.path.getsize(f) for f in files)
+    print(f"语料: {len(files)} 个文件，共 {total_bytes / 1024 / 1024:.1f} MB")
+
+    baseline = None
+    for jobs in args.jobs:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            errors = list(check_directory(args.path, jobs, source_dir=args.source))
+            best = min(best, time.perf_counter() - start)
+        if baseline is None:
+            baseline = (errors, best)
+        identical = "一致" if errors == baseline[0] else "不一致！"
+        print(
+            f"  -> jobs={jobs}: {best * 1000:.1f} ms，加速比 {baseline[1] / best:.2f}x，"
+            f"{len(errors)} 个错误，与首个配置的结果{identical}"
+        )
+
+
+def bench_colors_report(args: argparse.Namespace) -> None:
+    from check_ftb_colors import ErrorRecord, generate_html_report
+
+    rng = random.Random(0)
+    messages = ["行尾包含非法字符 '&'", "非法的颜色字符 '&x'", "非法的颜色字符 '&y'"]
+    errors = [
+        ErrorRecord(
+            f"CNPack/kubejs/assets/mod{i // 500}/lang/zh_cn.json",
+            f"item.mod.example_{i}",
+            f"&6示例文本 {rng.random():.6f} &x结尾 &",
+            rng.choice(messages),
+        )
+        for i in range(args.errors)
+    ]
+    print(f"合成数据: {len(errors)} 个错误")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, "error_report.html")
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            generate_html_report(iter(errors), output_path)
+            best = min(best, time.perf_counter() - start)
+        size = os.path.getsize(output_path)
+    print(
+        f"  -> 生成耗时 {best * 1000:.1f} ms，{format_rate(len(errors), best, '条')}，"
+        f"报告大小 {size / 1024 / 1024:.2f} MB（平均每条 {size / len(errors):.0f} 字节）"
+    )
+
+
+def bench_snbt_read(args: argparse.Namespace) -> None:
+    import json
+
+    import snbt_reader
+
+    # 以语料中的 JSON 语言文件为基础，生成内容相同、格式与 FTB Quests 输出一致的 SNBT
+    json_texts = [
+        p.read_text(encoding="utf-8") for p in sorted(Path(args.path).rglob("*.json"))
+    ]
+    snbt_texts = []
+    for text in json_texts:
+        data = json.loads(text)
+        if not isinstance(data, dict):
+            continue
+        lines = ["{"]
+        for key, value in data.items():
+            if isinstance(value, str):
+                escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'\t"{key}": "{escaped}"')
+        lines.append("}")
+        snbt_texts.append("\n".join(lines))
+
+    for label, texts, loads in (
+        ("JSON", json_texts, json.loads),
+        ("SNBT (通用)", snbt_texts, snbt_reader.loads),
+        ("SNBT (语言文件)", snbt_texts, snbt_reader.loads_lang),
+    ):
+        total_bytes = sum(len(t.encode("utf-8")) for t in texts)
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for text in texts:
+                loads(text)
+            best = min(best, time.perf_counter() - start)
+        print(
+            f"  -> {label}: {len(texts)} 个文件，{best * 1000:.1f} ms，"
+            f"{format_rate(total_bytes, best, 'B')}"
+        )
+
+
+def synthetic_pack_paths(count: int) -> list[str]:
+    """生成与整合包 overrides 目录结构相似的相对路径：语言文件、任务章节、配置与资源文件。"""
+    rng = random.Random(0)
+    langs = ["en_us", "zh_cn", "zh_tw", "de_de", "fr_fr", "ja_jp", "ko_kr", "ru_ru"]
+    paths = []
+    for i in range(count):
+        kind = i % 10
+        mod = f"mod{rng.randrange(count // 40 + 1)}"
+        if kind == 0:
+            paths.append(f"kubejs/assets/{mod}/lang/{rng.choice(langs)}.json")
+        elif kind == 1:
+            paths.append(f"config/ftbquests/quests/chapters/chapter_{i}.snbt")
+        elif kind == 2:
+            paths.append(f"config/ftbquests/quests/lang/{rng.choice(langs)}_{i}.snbt")
+        elif kind < 6:
+            paths.append(f"config/{mod}/sub{i % 7}/file_{i}.toml")
+        else:
+            paths.append(f"kubejs/assets/{mod}/textures/block/tex_{i}.png")
+    return list(dict.fromkeys(paths))
+
+
+def bench_path_matcher(args: argparse.Namespace) -> None:
+    from pathlib import PurePosixPath
+
+    from path_matcher import PathMatcher
+    from update_checker import (
+        build_attention_matcher,
+        classify_files,
+        load_config,
+        walk_files,
+    )
+
+    config = load_config(args.config)
+    attention_list = config.get("attentionList", {})
+    exclusion_patterns = config.get("exclusionPatterns", [])
+    paths = synthetic_pack_paths(args.files)
+    print(f"合成数据: {len(paths)} 个路径")
+
+    def legacy_exclusion(rel_paths):
+        # 旧实现：每个文件 × 每条规则调用一次 Path.match
+        kept = []
+        for rel in rel_paths:
+            relative_path = PurePosixPath(rel)
+            is_excluded = False
+            for pattern in exclusion_patterns:
+                is_negation = pattern.startswith("!")
+                match_pattern = pattern[1:] if is_negation else pattern
+                if relative_path.match(match_pattern):
+                    is_excluded = not is_negation
+            if not is_excluded:
+                kept.append(rel)
+        return kept
+
+    start = time.perf_counter()
+    attention = build_attention_matcher(attention_list)
+    exclusion = PathMatcher.from_gitignore(exclusion_patterns)
+    print(f"  -> 编译匹配器: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    best_legacy = best_compiled = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        legacy = legacy_exclusion(paths)
+        best_legacy = min(best_legacy, time.perf_counter() - start)
+        start = time.perf_counter()
+        compiled = [rel for rel in paths if not exclusion.match(rel)]
+        best_compiled = min(best_compiled, time.perf_counter() - start)
+    print(
+        f"  -> 排除规则 (Path.match 逐条匹配): {best_legacy * 1000:.1f} ms，"
+        f"{format_rate(len(paths), best_legacy, '路径')}"
+    )
+    print(
+        f"  -> 排除规则 (编译后的单个正则): {best_compiled * 1000:.1f} ms，"
+        f"{format_rate(len(paths), best_compiled, '路径')}，"
+        f"结果{'一致' if legacy == compiled else '不一致！'}"
+    )
+
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        attended = classify_files(paths, attention)
+        best = min(best, time.perf_counter() - start)
+    print(
+        f"  -> 关注列表分类: {best * 1000:.1f} ms，{len(attended)} 个关注文件，"
+        f"{format_rate(len(paths), best, '路径')}"
+    )
+
+    if not args.on_disk:
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        for rel in paths:
+            (root / rel).parent.mkdir(parents=True, exist_ok=True)
+            (root / rel).touch()
+
+        start = time.perf_counter()
+        # 旧实现：每条 filePattern 一次 glob，每个 folder 一次 rglob
+        legacy_files = set()
+        for item in attention_list.get("filePatterns", []):
+            legacy_files.update(
+                p.relative_to(root).as_posix() for p in root.glob(item["pattern"])
+            )
+        for item in attention_list.get("folders", []):
+            legacy_files.update(
+                p.relative_to(root).as_posix()
+                for p in (root / item["path"]).rglob("*")
+                if p.is_file()
+            )
+        legacy_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        walked = classify_files(walk_files(root), attention)
+        walk_elapsed = time.perf_counter() - start
+        identical = "一致" if set(walked) == legacy_files else "不一致！"
+        print(
+            f"  -> 磁盘遍历: 逐规则 glob {legacy_elapsed * 1000:.1f} ms，"
+            f"单次遍历 {walk_elapsed * 1000:.1f} ms，结果{identical}"
+        )
+
+
+def synthetic_quest_tree(
+    chapters: int, quests: int, seed: int, changed: float = 0.0
+) -> dict[str, bytes]:
+    """
+    生成 FTB Quests 的章节文件与 lang/en_us.snbt。相同 seed 生成相同的树，
+    changed 为修改比例：对应比例的任务会改动奖励、替换子任务并改写标题。
+    """
+    rng = random.Random(seed)
+    files = {}
+    lang_lines = ["{"]
+    for c in range(chapters):
+        quest_blocks = []
+        for q in range(quests):
+            quest_id = f"{c:04X}{q:04X}00000000"
+            modified = rng.random() < changed
+            task_id = f"{quest_id[:8]}{'F' if modified else 'A'}0000001"
+            xp = 20 if modified else 10
+            quest_blocks.append(
+                f'\t\t{{\n\t\t\tid: "{quest_id}"\n\t\t\tx: {q}.0d\n\t\t\ty: {c}.0d\n'
+                f'\t\t\ttasks: [{{ id: "{task_id}" type: "item" item: {{ id: "minecraft:stone" count: 1 }} }}]\n'
+                f'\t\t\trewards: [{{ id: "{quest_id[:8]}B0000001" type: "xp" xp: {xp} }}]\n\t\t}}'
+            )
+            title = f"Quest {c}-{q}" + (" (revised)" if modified else "")
+            lang_lines.append(f'\tquest.{quest_id}.title: "{title}"')
+            lang_lines.append(
+                f'\tquest.{quest_id}.quest_desc: ["Line one of {c}-{q}", "", "Line two"]'
+            )
+        files[f"config/ftbquests/quests/chapters/chapter_{c}.snbt"] = (
+            f'{{\n\tid: "{c:016X}"\n\tquests: [\n'
+            + "\n".join(quest_blocks)
+            + "\n\t]\n}\n"
+        ).encode("utf-8")
+    lang_lines.append("}")
+    files["config/ftbquests/quests/lang/en_us.snbt"] = "\n".join(lang_lines).encode(
+        "utf-8"
+    )
+    return files
+
+
+def bench_lang_diff(args: argparse.Namespace) -> None:
+    from lang_diff import build_changeset
+
+    old = synthetic_quest_tree(args.chapters, args.quests, seed=0)
+    new = synthetic_quest_tree(args.chapters, args.quests, seed=0, changed=args.changed)
+    total_bytes = sum(len(b) for b in old.values()) + sum(len(b) for b in new.values())
+    print(
+        f"合成数据: {len(old)} 个文件，{args.chapters * args.quests} 个任务，"
+        f"共 {total_bytes / 1024 / 1024:.1f} MB"
+    )
+
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        changeset = build_changeset(
+            "bench", "old", "new", ((rel, old[rel], new[rel]) for rel in old)
+        )
+        best = min(best, time.perf_counter() - start)
+    files = changeset["files"]
+    changed_keys = sum(len(e.get("changed", {})) for e in files.values())
+    changed_quests = sum(
+        len(e.get("tasks", {}).get("added", [])) for e in files.values()
+    )
+    print(
+        f"  -> 键级差异: {best * 1000:.1f} ms，{format_rate(total_bytes, best, 'B')}，"
+        f"{changed_keys} 个键被修改，{changed_quests} 个任务的子任务被替换"
+    )
+
+
+def write_synthetic_pack(
+    path: Path, size_mb: int, seed: int, changed: float = 0.0
+) -> None:
+    """
+    生成整合包结构的 zip：约 4 MB 的模组 jar（随机数据，按原样存储）占据大部分体积，
+    另有配置与语言等文本文件。相同 seed 生成相同内容，changed 为被修改的文件比例。
+    """
+    import zipfile
+
+    rng = random.Random(seed)
+    change_rng = random.Random(seed + 1)
+    jar_size = 4 * 1024 * 1024
+    with zipfile.ZipFile(path, "w") as z:
+        for i in range(max(1, size_mb * 1024 * 1024 // jar_size)):
+            data = rng.randbytes(jar_size)
+            if change_rng.random() < changed:
+                data = data[:-16] + change_rng.randbytes(16)
+            z.writestr(f"mods/mod_{i}.jar", data, compress_type=zipfile.ZIP_STORED)
+        for i in range(2000):
+            lines = [f'"key.{i}.{j}": "value {rng.random():.6f}",' for j in range(50)]
+            if change_rng.random() < changed:
+                lines[change_rng.randrange(50)] = f'"key.{i}.changed": "new value",'
+            z.writestr(
+                f"overrides/config/mod_{i % 200}/file_{i}.json",
+                "{\n" + "\n".join(lines) + "\n}\n",
+                compress_type=zipfile.ZIP_DEFLATED,
+            )
+
+
+def bench_compare_archives(args: argparse.Namespace) -> None:
+    from compare_archives import ArchiveComparator
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        old_zip, new_zip = root / "old.zip", root / "new.zip"
+        write_synthetic_pack(old_zip, args.size_mb, seed=0)
+        write_synthetic_pack(new_zip, args.size_mb, seed=0, changed=args.changed)
+        print(
+            f"合成数据: 两个整合包，各 {old_zip.stat().st_size / 1024 / 1024:.0f} MB，"
+            f"修改比例 {args.changed:.0%}"
+        )
+
+        # 旧实现：两个压缩包完整解压到临时目录后再比较
+        start = time.perf_counter()
+        legacy = ArchiveComparator(
+            str(old_zip), str(new_zip), str(root / "legacy.html")
+        )
+        with tempfile.TemporaryDirectory(dir=tmp) as td1, tempfile.TemporaryDirectory(
+            dir=tmp
+        ) as td2:
+            legacy._extract(str(old_zip), td1)
+            legacy._extract(str(new_zip), td2)
+            peak_disk = sum(
+                p.stat().st_size
+                for d in (td1, td2)
+                for p in Path(d).rglob("*")
+                if p.is_file()
+            )
+            legacy._compare(td1, td2)
+        legacy_elapsed = time.perf_counter() - start
+        print(
+            f"  -> 完整解压后比较: {legacy_elapsed:.2f} s，临时目录峰值 {peak_disk / 1024 / 1024:.0f} MB"
+        )
+
+        start = time.perf_counter()
+        streamed = ArchiveComparator(
+            str(old_zip), str(new_zip), str(root / "streamed.html")
+        )
+        streamed.process()
+        streamed_elapsed = time.perf_counter() - start
+        identical = (root / "legacy.html").read_bytes() == (
+            root / "streamed.html"
+        ).read_bytes()
+        print(
+            f"  -> 直接读取压缩包成员: {streamed_elapsed:.2f} s，临时目录峰值 0 MB，"
+            f"报告{'一致' if identical else '不一致！'}"
+        )
+
+
+def bench_compare_jobs(args: argparse.Namespace) -> None:
+    import contextlib
+    import io
+    import zipfile
+
+    from compare_archives import ArchiveComparator
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        old_zip, new_zip = root / "old.zip", root / "new.zip"
+        with zipfile.ZipFile(
+            old_zip, "w", zipfile.ZIP_DEFLATED
+        ) as old, zipfile.ZipFile(new_zip, "w", zipfile.ZIP_DEFLATED) as new:
+            for i in range(args.files):
+                lines = [
+                    f'    "item.mod_{i}.entry_{j}": "Some text {rng.random():.8f}",'
+                    for j in range(args.lines)
+                ]
+                changed = list(lines)
+                for j in rng.sample(range(args.lines), args.lines // 10):
+                    changed[j] = changed[j].replace("Some text", "Other text")
+                old.writestr(f"overrides/kubejs/lang/file_{i}.json", "\n".join(lines))
+                new.writestr(f"overrides/kubejs/lang/file_{i}.json", "\n".join(changed))
+        print(
+            f"合成数据: {args.files} 个被修改的文本文件，每个 {args.lines} 行，"
+            f"其中 10% 的行被修改，CPU 核心数 {os.cpu_count()}"
+        )
+
+        baseline = reports = None
+        for jobs in args.jobs:
+            output = root / f"report_{jobs}.html"
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                ArchiveComparator(
+                    str(old_zip), str(new_zip), str(output), jobs=jobs
+                ).process()
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            reports = reports or output.read_bytes()
+            print(
+                f"  -> jobs={jobs}: {elapsed:.2f} s，加速比 {baseline / elapsed:.2f}x，"
+                f"报告{'一致' if output.read_bytes() == reports else '不一致！'}"
+            )
+
+
+def pathological_diff_inputs(
+    lines: int, rng: random.Random
+) -> dict[str, tuple[list[str], list[str]]]:
+    base = [f'    "key.{i}": "value {rng.random():.6f}",' for i in range(lines)]
+    interleaved = [
+        line if i % 2 else line.replace("value", "VALUE") for i, line in enumerate(base)
+    ]
+    blob = {f"key.{i}": rng.random() for i in range(lines * 2)}
+    edited = dict(blob)
+    for key in rng.sample(list(blob), lines // 10):
+        edited[key] = 0
+    repetitive = ["{"] + ['  "a": 1,', '  "b": [],', "}"] * (lines // 4)
+    repetitive_edited = list(repetitive)
+    for i in rng.sample(range(len(repetitive)), lines // 40):
+        repetitive_edited[i] = '  "c": 2,'
+    return {
+        "完全不同": (
+            base,
+            [f'    "other.{i}": "x {rng.random():.6f}",' for i in range(lines)],
+        ),
+        "行序颠倒": (base, base[::-1]),
+        "隔行修改": (base, interleaved),
+        "单行压缩 JSON": ([json.dumps(blob)], [json.dumps(edited)]),
+        "大量重复行": (repetitive, repetitive_edited),
+    }
+
+
+def bench_diff_engine(args: argparse.Namespace) -> None:
+    import compare_archives
+    from compare_archives import ArchiveComparator
+
+    cases = pathological_diff_inputs(args.lines, random.Random(0))
+    print(f"合成数据: 每组约 {args.lines} 行")
+    for name, (old, new) in cases.items():
+        print(f"{name}:")
+        for algorithm in args.algorithms:
+            comparator = ArchiveComparator(diff_algorithm=algorithm)
+            if algorithm != "difflib":
+                # 默认的 difflib 即原始实现，不设上限；新引擎配合建议的上限使用
+                comparator.max_diff_lines = compare_archives.MAX_DIFF_LINES
+                comparator.max_diff_bytes = compare_archives.MAX_DIFF_BYTES
+                comparator.max_diff_cost = compare_archives.MAX_DIFF_COST
+                comparator.max_inline_length = compare_archives.MAX_INLINE_LINE_LENGTH
+            start = time.perf_counter()
+            blocks, adds, dels = comparator.generate_diff_blocks(old, new)
+            elapsed = time.perf_counter() - start
+            summary = (
+                " (已概括)" if blocks and "Diff skipped" in blocks[0]["content"] else ""
+            )
+            print(
+                f"  -> {algorithm:<9} {elapsed:7.2f} s，+{adds} -{dels}，"
+                f"{len(blocks)} 个显示块{summary}"
+            )
+
+
+def bench_report_size(args: argparse.Namespace) -> None:
+    import contextlib
+    import io
+
+    import compare_archives
+    from compare_archives import ArchiveComparator, ReportWriter
+
+    rng = random.Random(0)
+    comparator = ArchiveComparator()
+    files = []
+    for i in range(args.files):
+        lines = [
+            f'    "item.mod_{i}.entry_{j}": "Some text {rng.random():.8f}",'
+            for j in range(args.lines)
+        ]
+        changed = list(lines)
+        for j in rng.sample(range(args.lines), max(1, int(args.lines * args.changed))):
+            changed[j] = changed[j].replace("Some text", "Other text")
+        blocks, adds, dels = comparator.generate_diff_blocks(lines, changed)
+        item = {
+            "id": f"f{i}",
+            "path": f"overrides/kubejs/lang/file_{i}.json",
+            "name": f"file_{i}.json",
+            "add_count": adds,
+            "del_count": dels,
+            "size_diff": "",
+            "status": "modified",
+            "is_binary": False,
+        }
+        files.append((item, blocks))
+    print(
+        f"合成数据: {args.files} 个被修改的文本文件，每个 {args.lines} 行，"
+        f"其中 {args.changed:.0%} 的行被修改"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        # 修改前的写法：完整的块字典直接嵌入单个 HTML
+        start = time.perf_counter()
+        data = json.dumps(
+            {
+                "files": [dict(item, diff_blocks=blocks) for item, blocks in files],
+                "meta": {},
+            },
+            ensure_ascii=False,
+        )
+        legacy = root / "legacy.html"
+        legacy.write_text(
+            compare_archives.HTML_SHELL.format(
+                css=compare_archives.CSS_STYLES,
+                js=compare_archives.JS_SCRIPT,
+                json_data=data,
+            ),
+            encoding="utf-8",
+        )
+        legacy_elapsed = time.perf_counter() - start
+        legacy_size = legacy.stat().st_size
+        print(
+            f"  -> 原始单文件: {legacy_elapsed:.2f} s，{legacy_size / 1024 / 1024:.1f} MB"
+        )
+
+        for sharded in (False, True):
+            output = root / f"report_{sharded}.html"
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()), ReportWriter(
+                str(output), "old", "new", sharded
+            ) as writer:
+                for item, blocks in files:
+                    writer.add(dict(item), blocks)
+            elapsed = time.perf_counter() - start
+            index_size = output.stat().st_size
+            shard_dir = root / f"report_{sharded}_files"
+            shards = list(shard_dir.iterdir()) if shard_dir.exists() else []
+            total = index_size + sum(path.stat().st_size for path in shards)
+            label = f"分片 ({len(shards)} 个分片)" if sharded else "紧凑单文件"
+            print(
+                f"  -> {label}: {elapsed:.2f} s，共 {total / 1024 / 1024:.1f} MB "
+                f"({legacy_size / total:.1f}x 更小)，首次打开需加载 "
+                f"{index_size / 1024 / 1024:.2f} MB"
+            )
+
+
+def bench_semantic_diff(args: argparse.Namespace) -> None:
+    from compare_archives import ArchiveComparator
+
+    rng = random.Random(0)
+    lang = {f"item.mod_{i % 300}.entry_{i}": f"Some text {i}" for i in range(args.keys)}
+    # 重新排序并换一种缩进，再修改少量键
+    reordered = dict(sorted(lang.items(), key=lambda item: rng.random()))
+    for key in rng.sample(list(lang), args.changed):
+        reordered[key] = "Other text"
+    old = json.dumps(lang, indent=2).splitlines()
+    new = json.dumps(reordered, indent=4).splitlines()
+    print(
+        f"合成数据: {args.keys} 个键的语言文件被重新排序和缩进，其中 {args.changed} 个键被修改"
+    )
+    for semantic in (False, True):
+        comparator = ArchiveComparator(semantic=semantic)
+        start = time.perf_counter()
+        blocks, adds, dels = comparator.generate_diff_blocks(old, new, "en_us.json")
+        elapsed = time.perf_counter() - start
+        label = "按键路径比较" if semantic else "逐行比较"
+        print(f"  -> {label}: {elapsed:.2f} s，+{adds} -{dels}，{len(blocks)} 个显示块")
+
+
+def run_with_peak_rss(command: list[str]) -> tuple[float, int]:
+    """运行子进程，返回 (耗时, 峰值 RSS 字节数)。"""
+    import subprocess
+
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise SystemExit(f"{' '.join(command)} 退出码 {process.returncode}")
+    return time.perf_counter() - start, usage.ru_maxrss * 1024
+
+
+def bench_compare_memory(args: argparse.Namespace) -> None:
+    import sys
+    import zipfile
+
+    rng = random.Random(0)
+    script = Path(__file__).with_name("compare_archives.py")
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        old_zip, new_zip = root / "old.zip", root / "new.zip"
+        text_bytes = largest = 0
+        with zipfile.ZipFile(
+            old_zip, "w", zipfile.ZIP_DEFLATED
+        ) as old, zipfile.ZipFile(new_zip, "w", zipfile.ZIP_DEFLATED) as new:
+            for i in range(args.files):
+                lines = [
+                    f'    "item.mod_{i}.entry_{j}": "Some text {rng.random():.8f}",'
+                    for j in range(args.lines)
+                ]
+                changed = list(lines)
+                for j in rng.sample(range(args.lines), args.lines // 20):
+                    changed[j] = changed[j].replace("Some text", "Other text")
+                content = "\n".join(lines)
+                text_bytes += len(content)
+                largest = max(largest, len(content))
+                old.writestr(f"overrides/kubejs/lang/file_{i}.json", content)
+                new.writestr(f"overrides/kubejs/lang/file_{i}.json", "\n".join(changed))
+            # 新增与删除的大文件
+            for name, z in (("added", new), ("removed", old)):
+                z.writestr(f"overrides/config/{name}.json", "\n".join(lines * 10))
+        print(
+            f"合成数据: {args.files} 个被修改的文本文件（共 {text_bytes / 1024 / 1024:.0f} MB，"
+            f"最大 {largest / 1024 / 1024:.1f} MB），每个 5% 的行被修改，"
+            f"另有各 {args.lines * 10} 行的新增与删除文件"
+        )
+
+        runs = [("流式写出", script)]
+        if args.baseline:
+            runs.insert(0, ("基准版本", Path(args.baseline)))
+        for label, path in runs:
+            output = root / f"report_{label}.html"
+            elapsed, peak = run_with_peak_rss(
+                [
+                    sys.executable,
+                    str(path),
+                    str(old_zip),
+                    str(new_zip),
+                    "-o",
+                    str(output),
+                ]
+            )
+            print(
+                f"  -> {label}: {elapsed:.2f} s，峰值 RSS {peak / 1024 / 1024:.0f} MB，"
+                f"报告 {output.stat().st_size / 1024 / 1024:.0f} MB"
+            )
+
+
+def bench_renames(args: argparse.Namespace) -> None:
+    import contextlib
+    import io
+    import zipfile
+
+    from compare_archives import ArchiveComparator
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        old_zip, new_zip = root / "old.zip", root / "new.zip"
+        with zipfile.ZipFile(
+            old_zip, "w", zipfile.ZIP_DEFLATED
+        ) as old, zipfile.ZipFile(new_zip, "w", zipfile.ZIP_DEFLATED) as new:
+            # 整体移动的目录、改名并略作修改的章节、无关的新增与删除文件
+            for i in range(args.moved):
+                body = "\n".join(f"key_{i}_{j} = {rng.random():.6f}" for j in range(30))
+                old.writestr(f"overrides/config/old_{i % 50}/file_{i}.cfg", body)
+                new.writestr(f"overrides/config/new_{i % 50}/file_{i}.cfg", body)
+            for i in range(args.renamed):
+                lines = [
+                    f'{{ id: "{i:08X}{j:08X}" title: "Quest {j}" }}' for j in range(200)
+                ]
+                old.writestr(
+                    f"overrides/config/ftbquests/chapters/old_{i}.snbt",
+                    "\n".join(lines),
+                )
+                lines[rng.randrange(200)] = (
+                    f'{{ id: "{i:08X}FFFFFFFF" title: "New quest" }}'
+                )
+                new.writestr(
+                    f"overrides/config/ftbquests/chapters/new_{i}.snbt",
+                    "\n".join(lines),
+                )
+            for i in range(args.unmatched):
+                old.writestr(
+                    f"overrides/gone/file_{i}.json",
+                    "\n".join(f'"gone_{i}_{j}": {rng.random()}' for j in range(40)),
+                )
+                new.writestr(
+                    f"overrides/fresh/file_{i}.json",
+                    "\n".join(f'"fresh_{i}_{j}": {rng.random()}' for j in range(40)),
+                )
+        print(
+            f"合成数据: {args.moved} 个被移动的文件，{args.renamed} 个改名并修改的章节，"
+            f"各 {args.unmatched} 个无关的新增与删除文件"
+        )
+
+        for detect in (False, True):
+            output = root / f"report_{detect}.html"
+            comparator = ArchiveComparator(
+                str(old_zip), str(new_zip), str(output), detect_renames=detect
+            )
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                comparator.process()
+            elapsed = time.perf_counter() - start
+            statuses = [item["status"] for item in comparator.files_data]
+            label = "识别重命名" if detect else "不识别重命名"
+            print(
+                f"  -> {label}: {elapsed:.2f} s，重命名 {statuses.count('renamed')}，"
+                f"新增 {statuses.count('added')}，删除 {statuses.count('removed')}，"
+                f"报告 {output.stat().st_size / 1024 / 1024:.1f} MB"
+            )
+
+
+def bench_download_resume(args: argparse.Namespace) -> None:
+    import contextlib
+    import hashlib
+    import io
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    from download_cache import DownloadCache, cache_key
+
+    payload = random.Random(0).randbytes(args.size_mb * 1024 * 1024)
+    sha256 = hashlib.sha256(payload).hexdigest()
+
+    class Handler(BaseHTTPRequestHandler):
+        # 为 False 时忽略 Range 请求头，模拟不支持断点续传的服务器
+        honor_range = True
+
+        def do_GET(self):
+            start = 0
+            match = re.fullmatch(r"bytes=(\d+)-", self.headers.get("Range", ""))
+            if match and self.honor_range:
+                start = int(match.group(1))
+                if start >= len(payload):
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{len(payload)}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(206)
+                self.send_header(
+                    "Content-Range", f"bytes {start}-{len(payload) - 1}/{len(payload)}"
+                )
+            else:
+                self.send_response(200)
+            self.send_header("Content-Length", str(len(payload) - start))
+            self.end_headers()
+            self.wfile.write(payload[start:])
+
+        def log_message(self, *_):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/pack.zip"
+    half = len(payload) // 2
+    # (场景, 下载前 partial 中已有的字节数, 服务器是否支持 Range, 预期下载的字节数)
+    cases = [
+        ("完整下载", 0, True, len(payload)),
+        ("从一半处续传", half, True, len(payload) - half),
+        ("partial 已完整（416）", len(payload), True, 0),
+        ("服务器忽略 Range，重新下载", half, False, len(payload)),
+    ]
+    print(f"本地 http.server: {url}，文件 {args.size_mb} MB")
+    try:
+        for name, offset, honor_range, expected in cases:
+            Handler.honor_range = honor_range
+            with tempfile.TemporaryDirectory() as tmp:
+                cache = DownloadCache(tmp)
+                key = cache_key(1, 1)
+                cache._partial_path(key).write_bytes(payload[:offset])
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    path = cache.fetch(key, url, len(payload), {"sha256": sha256})
+                elapsed = time.perf_counter() - start
+                ok = (
+                    path.read_bytes() == payload
+                    and cache.bytes_downloaded == expected
+                    and not cache._partial_path(key).exists()
+                )
+            print(
+                f"  -> {name}: {elapsed * 1000:.1f} ms，下载 {cache.bytes_downloaded} 字节"
+                f"（预期 {expected}），{'通过' if ok else '失败！'}"
+            )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="工作流脚本的性能基准测试")
+    subparsers = parser.add_subparsers(dest="task", required=True)
+
+    parser_post = subparsers.add_parser(
+        "post-process", help="译文后处理：VALUE_RULES 与修改前的逐条替换对照"
+    )
+    parser_post.add_argument(
+        "--corpus",
+        default=str(FIXTURES_DIR / "post_process_values.json"),
+        help="对照语料，[原文路径, 译文] 列表",
+    )
+    parser_post.add_argument("--path", default="CNPack", help="计时用的译文目录")
+    parser_post.add_argument("--scale", type=int, default=20, help="计时语料的重复倍数")
+    parser_post.add_argument("--repeat", type=int, default=3)
+    parser_post.set_defaults(func=bench_post_process)
+
+    parser_zh = subparsers.add_parser("zh-convert", help="简繁转换吞吐量")
+    parser_zh.add_argument(
+        "--path", default="CNPack", help="zh_cn 语料目录 (默认: CNPack)"
+    )
+    parser_zh.add_argument(
+        "--dict-dir", help="OpenCC 词典目录 (默认读取 OPENCC_DICT_DIR)"
+    )
+    parser_zh.add_argument(
+        "--glossary", default=".github/configs/zh_glossary.json", help="项目术语表路径"
+    )
+    parser_zh.add_argument("--repeat", type=int, default=3, help="重复次数，取最快一次")
+    parser_zh.set_defaults(func=bench_zh_convert)
+
+    parser_colors = subparsers.add_parser("colors-jobs", help="颜色检查的串行/并行耗时")
+    parser_colors.add_argument(
+        "--path", default="CNPack", help="检查目录 (默认: CNPack)"
+    )
+    parser_colors.add_argument(
+        "--source", default="Source", help="en_us 原文目录 (默认: Source)"
+    )
+    parser_colors.add_argument(
+        "--jobs", type=int, nargs="+", default=[1, 2, 4], help="要比较的进程数"
+    )
+    parser_colors.add_argument(
+        "--repeat", type=int, default=3, help="重复次数，取最快一次"
+    )
+    parser_colors.set_defaults(func=bench_colors_jobs)
+
+    parser_report = subparsers.add_parser(
+        "colors-report", help="颜色检查报告的生成耗时与体积"
+    )
+    parser_report.add_argument(
+        "--errors", type=int, default=100000, help="合成错误数量"
+    )
+    parser_report.add_argument(
+        "--repeat", type=int, default=3, help="重复次数，取最快一次"
+    )
+    parser_report.set_defaults(func=bench_colors_report)
+
+    parser_snbt = subparsers.add_parser(
+        "snbt-read", help="SNBT 读取器与 JSON 解析的吞吐量"
+    )
+    parser_snbt.add_argument(
+        "--path", default="CNPack", help="JSON 语料目录 (默认: CNPack)"
+    )
+    parser_snbt.add_argument(
+        "--repeat", type=int, default=3, help="重复次数，取最快一次"
+    )
+    parser_snbt.set_defaults(func=bench_snbt_read)
+
+    parser_paths = subparsers.add_parser(
+        "path-matcher", help="关注列表与排除规则的匹配耗时"
+    )
+    parser_paths.add_argument("--files", type=int, default=100000, help="合成路径数量")
+    parser_paths.add_argument(
+        "--config", default=".github/configs/modpack.json", help="整合包配置文件路径"
+    )
+    parser_paths.add_argument(
+        "--on-disk",
+        action="store_true",
+        help="同时在临时目录中生成文件，比较磁盘遍历耗时",
+    )
+    parser_paths.add_argument(
+        "--repeat", type=int, default=3, help="重复次数，取最快一次"
+    )
+    parser_paths.set_defaults(func=bench_path_matcher)
+
+    parser_diff = subparsers.add_parser(
+        "lang-diff", help="整合包更新时语言键与任务 ID 的差异耗时"
+    )
+    parser_diff.add_argument("--chapters", type=int, default=200, help="合成章节数量")
+    parser_diff.add_argument(
+        "--quests", type=int, default=50, help="每个章节的任务数量"
+    )
+    parser_diff.add_argument(
+        "--changed", type=float, default=0.05, help="被修改的任务比例"
+    )
+    parser_diff.add_argument(
+        "--repeat", type=int, default=3, help="重复次数，取最快一次"
+    )
+    parser_diff.set_defaults(func=bench_lang_diff)
+
+    parser_archives = subparsers.add_parser(
+        "compare-archives",
+        help="版本差异报告：完整解压与直接读取压缩包的耗时和磁盘占用",
+    )
+    parser_archives.add_argument(
+        "--size-mb", type=int, default=2048, help="每个合成整合包的大小 (MB)"
+    )
+    parser_archives.add_argument(
+        "--changed", type=float, default=0.05, help="被修改的文件比例"
+    )
+    parser_archives.set_defaults(func=bench_compare_archives)
+
+    parser_compare_jobs = subparsers.add_parser(
+        "compare-jobs", help="版本差异报告在不同进程数下的耗时"
+    )
+    parser_compare_jobs.add_argument(
+        "--files", type=int, default=300, help="被修改的文件数量"
+    )
+    parser_compare_jobs.add_argument(
+        "--lines", type=int, default=2000, help="每个文件的行数"
+    )
+    parser_compare_jobs.add_argument(
+        "--jobs", type=int, nargs="+", default=[1, 2, 4], help="要测试的进程数"
+    )
+    parser_compare_jobs.set_defaults(func=bench_compare_jobs)
+
+    parser_diff_engine = subparsers.add_parser(
+        "diff-engine", help="差异算法在病态输入上的耗时"
+    )
+    parser_diff_engine.add_argument(
+        "--lines", type=int, default=20000, help="每组输入的行数"
+    )
+    parser_diff_engine.add_argument(
+        "--algorithms",
+        nargs="+",
+        default=["difflib", "myers", "patience", "histogram"],
+        help="要比较的差异算法",
+    )
+    parser_diff_engine.set_defaults(func=bench_diff_engine)
+
+    parser_report_size = subparsers.add_parser(
+        "report-size", help="版本差异报告的写出耗时与体积（单文件/分片）"
+    )
+    parser_report_size.add_argument(
+        "--files", type=int, default=2000, help="被修改的文件数量"
+    )
+    parser_report_size.add_argument(
+        "--lines", type=int, default=500, help="每个文件的行数"
+    )
+    parser_report_size.add_argument(
+        "--changed", type=float, default=0.1, help="被修改的行比例"
+    )
+    parser_report_size.set_defaults(func=bench_report_size)
+
+    parser_semantic = subparsers.add_parser(
+        "semantic-diff", help="重新排序的语言文件：逐行比较与按键路径比较"
+    )
+    parser_semantic.add_argument("--keys", type=int, default=20000, help="语言键数量")
+    parser_semantic.add_argument(
+        "--changed", type=int, default=20, help="被修改的键数量"
+    )
+    parser_semantic.set_defaults(func=bench_semantic_diff)
+
+    parser_memory = subparsers.add_parser(
+        "compare-memory", help="版本差异报告的峰值内存（RSS）"
+    )
+    parser_memory.add_argument(
+        "--files", type=int, default=200, help="被修改的文件数量"
+    )
+    parser_memory.add_argument("--lines", type=int, default=5000, help="每个文件的行数")
+    parser_memory.add_argument(
+        "--baseline", help="用于对比的另一份 compare_archives.py（如修改前的版本）"
+    )
+    parser_memory.set_defaults(func=bench_compare_memory)
+
+    parser_renames = subparsers.add_parser(
+        "renames", help="被移动或改名的文件：识别重命名前后的耗时与报告体积"
+    )
+    parser_renames.add_argument(
+        "--moved", type=int, default=20000, help="内容不变、被移动的文件数量"
+    )
+    parser_renames.add_argument(
+        "--renamed", type=int, default=200, help="改名并修改一行的章节数量"
+    )
+    parser_renames.add_argument(
+        "--unmatched", type=int, default=2000, help="无关的新增与删除文件数量"
+    )
+    parser_renames.set_defaults(func=bench_renames)
+
+    parser_resume = subparsers.add_parser(
+        "download-resume", help="下载缓存：在本地 http.server 上检查断点续传与 416 处理"
+    )
+    parser_resume.add_argument("--size-mb", type=int, default=64, help="下载文件大小")
+    parser_resume.set_defaults(func=bench_download_resume)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,25 @@
 import argparse
+import bisect
+import hashlib
 import html
 import json
 import os
 import re
+import subprocess
 import sys
-from collections.abc import Generator
-from dataclasses import dataclass
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from collections.abc import Generator, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Union
+from typing import Optional, Union
+
+import snbt_reader
+
+CACHE_VERSION = 3
 
 
 @dataclass
@@ -18,45 +30,358 @@ class ErrorRecord:
     error_message: str
 
 
-def check_line_for_errors(
-    line: str, file_path: str, key: str
-) -> Generator[ErrorRecord, None, None]:
-    pattern = re.compile(r"&([^a-v0-9\s\\#])")
+# 颜色代码 '&' 之后允许出现的字符
+LEGAL_COLOR_CHAR = re.compile(r"[a-v0-9\s\\#]")
+# 文件名中的译文语言代码，替换为 en_us 即得到对应的原文文件
+TARGET_LANG_PATTERN = re.compile(r"zh_(?:cn|hk|tw)")
+
 
-    for match in pattern.finditer(line):
-        if match.start() > 0 and line[match.start() - 1] == "\\":
-            continue
-        yield ErrorRecord(
-            file_path, key, line.strip(), f"'&'后包含非法字符 '{match.group(1)}'"
+@dataclass
+class LintContext:
+    file_path: str
+    key: str
+    value: str
+    source: Optional[str]  # 同一键的 en_us 原文，没有对应原文时为 None
+    is_quest: bool
+    newlines: list[int]  # value 中各换行符的位置，由扫描时顺带收集
+
+    def line_of(self, pos: int) -> tuple[str, str]:
+        """返回 pos 所在行的 (键, 去除首尾空白的行内容)，多行文本的键附带行号。"""
+        line_no = bisect.bisect_left(self.newlines, pos)
+        if not self.newlines:
+            return self.key, self.value.strip()
+        start = self.newlines[line_no - 1] + 1 if line_no else 0
+        end = (
+            self.newlines[line_no] if line_no < len(self.newlines) else len(self.value)
         )
+        return f"{self.key}[line {line_no + 1}]", self.value[start:end].strip()
 
-    stripped_line = line.rstrip("&")
-    if line != stripped_line and not line.strip().endswith("\\&"):
-        yield ErrorRecord(file_path, key, line.strip(), "行尾包含非法字符 '&'")
 
+class LintRule(ABC):
+    """
+    检查规则。pattern 中的记号由 LintEngine 在对每条文本的单次扫描中收集，
+    扫描结束后连同原文中的记号（needs_source 为 True 时）一起交给 check。
+    """
 
-def check_json(file_path: str) -> Generator[ErrorRecord, None, None]:
+    name = ""
+    pattern: Optional[str] = None
+    needs_source = False
+
+    def applies(self, ctx: LintContext) -> bool:
+        return True
+
+    @abstractmethod
+    def check(
+        self,
+        ctx: LintContext,
+        tokens: list[re.Match],
+        source_tokens: list[re.Match],
+    ) -> Iterator[ErrorRecord]: ...
+
+
+class ColorCodeRule(LintRule):
+    """'&' 颜色代码后的字符必须合法，且行尾不能是单独的 '&'（'\\&' 表示转义）。"""
+
+    name = "color_code"
+    pattern = "&"
+
+    def check(self, ctx, tokens, source_tokens):
+        value = ctx.value
+        consumed = 0
+        for match in tokens:
+            pos = match.start()
+            next_char = value[pos + 1] if pos + 1 < len(value) else ""
+            if pos >= consumed and next_char and not LEGAL_COLOR_CHAR.match(next_char):
+                consumed = pos + 2  # 非法字符与 '&' 一起被消耗，不再参与后续判断
+                if pos == 0 or value[pos - 1] != "\\":
+                    key, line = ctx.line_of(pos)
+                    yield ErrorRecord(
+                        ctx.file_path, key, line, f"'&'后包含非法字符 '{next_char}'"
+                    )
+            if next_char in ("", "\n") and (pos == 0 or value[pos - 1] != "\\"):
+                key, line = ctx.line_of(pos)
+                yield ErrorRecord(ctx.file_path, key, line, "行尾包含非法字符 '&'")
+
+
+class PlaceholderRule(LintRule):
+    """%s、%1$s、%d、{0} 等占位符引用的参数必须与原文一致。"""
+
+    name = "placeholder"
+    pattern = r"%(?:\d+\$)?(?:\.\d+)?[sdf%]|\{\d+\}"
+    needs_source = True
+
+    @staticmethod
+    def arguments(tokens: list[re.Match]) -> set[str]:
+        arguments = set()
+        sequential = 0
+        for match in tokens:
+            token = match.group()
+            if token == "%%":
+                continue
+            if token.startswith("{"):
+                arguments.add(token)
+            elif "$" in token:
+                arguments.add(f"%{token[1:token.index('$')]}")
+            else:
+                sequential += 1
+                arguments.add(f"%{sequential}")
+        return arguments
+
+    def applies(self, ctx):
+        return ctx.source is not None and ctx.source != ctx.value
+
+    def check(self, ctx, tokens, source_tokens):
+        if self.arguments(tokens) != self.arguments(source_tokens):
+            source_list = " ".join(m.group() for m in source_tokens) or "无"
+            target_list = " ".join(m.group() for m in tokens) or "无"
+            yield ErrorRecord(
+                ctx.file_path,
+                ctx.key,
+                ctx.value,
+                f"占位符与原文不一致：原文 {source_list}，译文 {target_list}",
+            )
+
+
+class NewlineRule(LintRule):
+    """换行符数量应与原文一致。"""
+
+    name = "newline_count"
+    needs_source = True
+
+    def applies(self, ctx):
+        return ctx.source is not None and ctx.source != ctx.value
+
+    def check(self, ctx, tokens, source_tokens):
+        source_count = ctx.source.count("\n")
+        if len(ctx.newlines) != source_count:
+            yield ErrorRecord(
+                ctx.file_path,
+                ctx.key,
+                ctx.value,
+                f"换行符数量与原文不一致：原文 {source_count} 个，译文 {len(ctx.newlines)} 个",
+            )
+
+
+class NbspRule(LintRule):
+    """不换行空格只应出现在任务文本中。"""
+
+    name = "stray_nbsp"
+    pattern = "\u00a0"
+
+    def applies(self, ctx):
+        return not ctx.is_quest
+
+    def check(self, ctx, tokens, source_tokens):
+        if tokens:
+            yield ErrorRecord(
+                ctx.file_path,
+                ctx.key,
+                ctx.value,
+                f"非任务文本中包含 {len(tokens)} 个不换行空格 (U+00A0)",
+            )
+
+
+RULES = {
+    rule.name: rule
+    for rule in (ColorCodeRule(), PlaceholderRule(), NewlineRule(), NbspRule())
+}
+# 默认只检查颜色代码，其余规则需通过 --rules 显式启用
+DEFAULT_RULES = [RULES["color_code"]]
+
+
+@dataclass
+class LintStats:
+    errors: int = 0
+    seconds: float = 0.0
+
+
+class LintEngine:
+    """
+    将所有规则的记号模式合并为一个正则，每条译文（及其原文）只扫描一次，
+    按命中的分组把记号分发给对应规则，并统计扫描与各规则的耗时。
+    """
+
+    SCAN = "scan"
+
+    def __init__(self, rules: list[LintRule]):
+        self.rules = rules
+        self.pattern = self._compile(rules)
+        self.source_pattern = self._compile([r for r in rules if r.needs_source])
+        # 没有规则需要原文时，既不查找也不读取原文文件
+        self.needs_source = any(rule.needs_source for rule in rules)
+        self.stats = {self.SCAN: LintStats()}
+        self.stats.update((rule.name, LintStats()) for rule in rules)
+
+    @staticmethod
+    def _compile(rules: list[LintRule]) -> re.Pattern:
+        alternatives = [r"(?P<newline>\n)"] + [
+            f"(?P<{rule.name}>{rule.pattern})"
+            for rule in rules
+            if rule.pattern is not None
+        ]
+        return re.compile("|".join(alternatives))
+
+    def _scan(
+        self, pattern: re.Pattern, text: str
+    ) -> tuple[list[int], dict[str, list[re.Match]]]:
+        newlines = []
+        tokens = defaultdict(list)
+        for match in pattern.finditer(text):
+            if match.lastgroup == "newline":
+                newlines.append(match.start())
+            else:
+                tokens[match.lastgroup].append(match)
+        return newlines, tokens
+
+    def lint(
+        self,
+        file_path: str,
+        key: str,
+        value: str,
+        source: Optional[str] = None,
+        is_quest: bool = False,
+    ) -> Iterator[ErrorRecord]:
+        perf_counter = time.perf_counter
+        start = perf_counter()
+        newlines, tokens = self._scan(self.pattern, value)
+        source_tokens = {}
+        if source is not None and source != value:
+            _, source_tokens = self._scan(self.source_pattern, source)
+        self.stats[self.SCAN].seconds += perf_counter() - start
+
+        ctx = LintContext(file_path, key, value, source, is_quest, newlines)
+        for rule in self.rules:
+            if not rule.applies(ctx):
+                continue
+            start = perf_counter()
+            records = list(
+                rule.check(
+                    ctx, tokens.get(rule.name, []), source_tokens.get(rule.name, [])
+                )
+            )
+            rule_stats = self.stats[rule.name]
+            rule_stats.seconds += perf_counter() - start
+            rule_stats.errors += len(records)
+            yield from records
+
+    def reset_stats(self) -> dict[str, LintStats]:
+        stats = self.stats
+        self.stats = {name: LintStats() for name in stats}
+        return stats
+
+
+def merge_stats(total: dict[str, LintStats], stats: dict[str, LintStats]) -> None:
+    for name, rule_stats in stats.items():
+        merged = total.setdefault(name, LintStats())
+        merged.errors += rule_stats.errors
+        merged.seconds += rule_stats.seconds
+
+
+def report_stats(stats: dict[str, LintStats]) -> None:
+    if not stats:
+        return
+    print("\n检查规则统计：")
+    for name, rule_stats in stats.items():
+        errors = "" if name == LintEngine.SCAN else f"发现 {rule_stats.errors} 个错误，"
+        print(f"  -> {name}: {errors}耗时 {rule_stats.seconds * 1000:.1f} ms")
+
+
+lint_engine = LintEngine(DEFAULT_RULES)
+
+
+def use_rules(names: Iterable[str]) -> None:
+    """按规则名替换模块级的 lint_engine，也用作并行检查时子进程的初始化函数。"""
+    global lint_engine
+    lint_engine = LintEngine([RULES[name] for name in names])
+
+
+def rule_names() -> list[str]:
+    return [rule.name for rule in lint_engine.rules]
+
+
+def iter_strings(
+    value: Union[str, list, dict], parent_key: str = ""
+) -> Iterator[tuple[str, str]]:
+    """按 “父键.子键[序号]” 的形式展开 JSON 中的所有字符串。"""
+    if isinstance(value, str):
+        yield parent_key, value
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from iter_strings(item, f"{parent_key}[{index}]")
+    elif isinstance(value, dict):
+        for k, v in value.items():
+            yield from iter_strings(v, f"{parent_key}.{k}" if parent_key else k)
+
+
+def iter_snbt_entries(file_path: str) -> Iterator[tuple[str, str]]:
+    """语言文件按语言键展开，章节文件只取出回填的 hover、lore 等文本。"""
+    if Path(file_path).parent.name == "lang":
+        return snbt_reader.iter_lang_entries(snbt_reader.load_lang(file_path))
+    return snbt_reader.iter_chapter_entries(snbt_reader.load(file_path))
+
+
+def load_source_index(source_path: Optional[str]) -> dict[str, str]:
+    """
+    读取原文文件并按键建立索引，供译文按键直接查找原文。
+    同一原文（如 zh_cn、zh_hk、zh_tw 共用的 en_us）在每个进程中只解析一次，文件改动后重新解析。
+    """
+    if not source_path:
+        return {}
+    try:
+        return _source_index(source_path, os.stat(source_path).st_mtime_ns)
+    except OSError:
+        return {}
+
+
+@lru_cache(maxsize=32)
+def _source_index(source_path: str, mtime_ns: int) -> dict[str, str]:
+    try:
+        if source_path.endswith(".snbt"):
+            return dict(iter_snbt_entries(source_path))
+        with open(source_path, "r", encoding="utf-8-sig") as file:
+            return dict(iter_strings(json.load(file)))
+    except (OSError, ValueError):
+        return {}
+
+
+def source_path_for(file_path: str, dir_path: str, source_dir: str) -> Optional[str]:
+    """
+    由译文文件路径推导 source_dir 下对应的原文文件，不存在时返回 None。
+    文件名中的语言代码替换为 en_us；章节 SNBT 文件与原文同名。
+    """
+    rel = Path(os.path.relpath(file_path, dir_path))
+    if TARGET_LANG_PATTERN.search(rel.name):
+        rel = rel.parent / TARGET_LANG_PATTERN.sub("en_us", rel.name)
+    elif rel.suffix != ".snbt":
+        return None
+    source_path = Path(source_dir, rel)
+    return str(source_path) if source_path.is_file() else None
+
+
+def lint_entries(
+    file_path: str,
+    entries: Iterator[tuple[str, str]],
+    source_path: Optional[str],
+    engine: LintEngine,
+) -> Generator[ErrorRecord, None, None]:
+    sources = load_source_index(source_path) if engine.needs_source else {}
+    parts = Path(file_path).parts
+    is_quest = "quests" in parts or "ftbquests" in parts
+    for key, value in entries:
+        yield from engine.lint(file_path, key, value, sources.get(key), is_quest)
+
+
+def check_json(
+    file_path: str,
+    source_path: Optional[str] = None,
+    engine: Optional[LintEngine] = None,
+) -> Generator[ErrorRecord, None, None]:
+    engine = engine or lint_engine
     try:
         with open(file_path, "r", encoding="utf-8") as file:
             json_data = json.load(file)
 
-        def process_value(value: Union[str, list, dict], parent_key: str = ""):
-            if isinstance(value, str):
-                for i, line in enumerate(value.split("\n")):
-                    line_key = (
-                        f"{parent_key}[line {i + 1}]" if "\n" in value else parent_key
-                    )
-                    yield from check_line_for_errors(line, file_path, line_key)
-            elif isinstance(value, list):
-                for index, item in enumerate(value):
-                    yield from process_value(item, f"{parent_key}[{index}]")
-            elif isinstance(value, dict):
-                for k, v in value.items():
-                    yield from process_value(
-                        v, f"{parent_key}.{k}" if parent_key else k
-                    )
-
-        yield from process_value(json_data)
+        yield from lint_entries(file_path, iter_strings(json_data), source_path, engine)
     except json.JSONDecodeError:
         yield ErrorRecord(file_path, "-", "-", "JSON 解析失败，请检查 JSON 格式")
     except FileNotFoundError:
@@ -65,31 +390,227 @@ def check_json(file_path: str) -> Generator[ErrorRecord, None, None]:
         yield ErrorRecord(file_path, "-", "-", f"打开或读取文件时出错：{str(e)}")
 
 
-def check_directory(dir_path: str) -> Generator[ErrorRecord, None, None]:
-    """递归检查指定目录下的所有 JSON 文件"""
+def check_snbt(
+    file_path: str,
+    source_path: Optional[str] = None,
+    engine: Optional[LintEngine] = None,
+) -> Generator[ErrorRecord, None, None]:
+    """检查 merge_all_to_snbt 输出的语言文件或章节文件，错误以对应的语言键标注。"""
+    engine = engine or lint_engine
+    try:
+        entries = iter_snbt_entries(file_path)
+        yield from lint_entries(file_path, entries, source_path, engine)
+    except snbt_reader.SNBTError as e:
+        yield ErrorRecord(file_path, "-", "-", f"SNBT 解析失败：{str(e)}")
+    except FileNotFoundError:
+        yield ErrorRecord(file_path, "-", "-", "文件未找到")
+    except Exception as e:
+        yield ErrorRecord(file_path, "-", "-", f"打开或读取文件时出错：{str(e)}")
+
+
+def is_checked_json(path: Path) -> bool:
+    return (
+        path.suffix == ".json"
+        and "patchouli_books" not in path.parts
+        and "productivemetalworks" not in path.parts
+    )
+
+
+def is_checked_snbt(path: Path) -> bool:
+    """FTB Quests 的译文语言文件与章节文件。"""
+    if path.suffix != ".snbt" or "ftbquests" not in path.parts:
+        return False
+    if path.parent.name == "lang":
+        return bool(TARGET_LANG_PATTERN.search(path.name))
+    return path.parent.name == "chapters"
+
+
+def is_checked_file(path: Path) -> bool:
+    return is_checked_json(path) or is_checked_snbt(path)
+
+
+def collect_files(dir_path: str) -> list[str]:
+    """按路径排序返回目录下需要检查的文件，保证串行与并行模式的输出顺序一致"""
+    return sorted(
+        str(entry) for entry in Path(dir_path).rglob("*") if is_checked_file(entry)
+    )
+
+
+def git_changed_files(
+    dir_path: str, since: str, until: Optional[str] = None
+) -> list[str]:
+    """
+    返回两个 git 版本之间目录下新增或修改过的待检查文件。
+    未指定 until 时与工作区比较，并包含尚未被 git 跟踪的新文件。
+    """
+
+    def git(*args: str) -> list[str]:
+        result = subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True, encoding="utf-8"
+        )
+        return result.stdout.splitlines()
+
+    top_level = git("rev-parse", "--show-toplevel")[0]
+    revisions = [since, until] if until else [since]
+    changed = [
+        os.path.relpath(os.path.join(top_level, name))
+        for name in git(
+            "diff", "--name-only", "--diff-filter=ACMR", *revisions, "--", dir_path
+        )
+    ]
+    if not until:
+        # ls-files 输出的路径本身就是相对当前目录的
+        changed += git("ls-files", "--others", "--exclude-standard", "--", dir_path)
+    return sorted(
+        str(Path(name))
+        for name in set(changed)
+        if is_checked_file(Path(name)) and os.path.isfile(name)
+    )
+
+
+class CheckCache:
+    """
+    以“文件路径 + 内容 SHA-256”为键缓存每个文件的检查结果，
+    摘要同时覆盖译文与对应的原文文件，两者均未改动时直接复用缓存，无需重新解析。
+    启用的规则与写入缓存时不同时，整个缓存作废。
+    """
+
+    def __init__(self, cache_path: str, rules: Optional[list[str]] = None):
+        self.cache_path = cache_path
+        self.rules = rule_names() if rules is None else rules
+        self.entries: dict[str, dict] = {}
+        self.hits = 0
+        self.misses = 0
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION and data.get("rules") == self.rules:
+                self.entries = data.get("files", {})
+        except (OSError, json.JSONDecodeError):
+            pass
+
+    @staticmethod
+    def digest(file_path: str, source_path: Optional[str] = None) -> Optional[str]:
+        sha256 = hashlib.sha256()
+        try:
+            for path in (file_path, source_path):
+                if path:
+                    with open(path, "rb") as f:
+                        sha256.update(f.read())
+                sha256.update(b"\0")
+        except OSError:
+            return None
+        return sha256.hexdigest()
+
+    def get(self, file_path: str, digest: Optional[str]) -> Optional[list[ErrorRecord]]:
+        entry = self.entries.get(file_path)
+        if digest is None or entry is None or entry["sha256"] != digest:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return [ErrorRecord(**record) for record in entry["errors"]]
+
+    def put(
+        self, file_path: str, digest: Optional[str], records: list[ErrorRecord]
+    ) -> None:
+        if digest is not None:
+            self.entries[file_path] = {
+                "sha256": digest,
+                "errors": [asdict(record) for record in records],
+            }
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        with open(self.cache_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": CACHE_VERSION, "rules": self.rules, "files": self.entries},
+                f,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+
+
+def check_file(
+    file_path: str, source_path: Optional[str] = None
+) -> tuple[list[ErrorRecord], dict[str, LintStats]]:
+    """检查单个文件，同时返回本次检查的规则统计，便于汇总子进程中的耗时。"""
+    lint_engine.reset_stats()
+    check = check_snbt if file_path.endswith(".snbt") else check_json
+    records = list(check(file_path, source_path))
+    return records, lint_engine.reset_stats()
+
+
+def check_directory(
+    dir_path: str,
+    jobs: int = 1,
+    cache: Optional[CheckCache] = None,
+    files: Optional[list[str]] = None,
+    source_dir: Optional[str] = None,
+    stats: Optional[dict[str, LintStats]] = None,
+) -> Generator[ErrorRecord, None, None]:
+    """
+    递归检查指定目录下的所有 JSON 与 FTB Quests SNBT 文件（或仅检查 files 中列出的文件）。
+    jobs > 1 时使用多进程并行检查；提供 cache 时，内容未变的文件直接使用缓存结果。
+    提供 source_dir 时，译文按键与其中对应的 en_us 原文比对；stats 用于汇总规则统计。
+    """
     print(f"正在检查目录: {dir_path}")
-    json_files_found = 0
-    for entry in Path(dir_path).rglob("*.json"):
-        if "patchouli_books" in entry.parts or "productivemetalworks" in entry.parts:
-            continue
-        json_files_found += 1
-        yield from check_json(str(entry))
-    if json_files_found == 0:
-        print(f"在目录 {dir_path} 中未找到任何 .json 文件。")
+    check_files = collect_files(dir_path) if files is None else files
+    if not check_files:
+        print(f"在目录 {dir_path} 中未找到任何 .json 或 .snbt 文件。")
+        return
+
+    # 原文同时计入缓存摘要，因此仅在启用了需要原文的规则时才查找
+    source_files = [
+        (
+            source_path_for(file_path, dir_path, source_dir)
+            if source_dir and lint_engine.needs_source
+            else None
+        )
+        for file_path in check_files
+    ]
+    results: list[Optional[list[ErrorRecord]]] = [None] * len(check_files)
+    digests: list[Optional[str]] = [None] * len(check_files)
+    if cache is not None:
+        for i, file_path in enumerate(check_files):
+            digests[i] = cache.digest(file_path, source_files[i])
+            results[i] = cache.get(file_path, digests[i])
+
+    pending = [i for i, records in enumerate(results) if records is None]
+    pending_files = [check_files[i] for i in pending]
+    pending_sources = [source_files[i] for i in pending]
+    if jobs > 1 and len(pending_files) > 1:
+        with ProcessPoolExecutor(
+            max_workers=jobs, initializer=use_rules, initargs=(rule_names(),)
+        ) as executor:
+            # map 按提交顺序返回结果，合并后的错误顺序与串行模式完全相同
+            checked = list(executor.map(check_file, pending_files, pending_sources))
+    else:
+        checked = list(map(check_file, pending_files, pending_sources))
 
+    for i, (records, file_stats) in zip(pending, checked):
+        if stats is not None:
+            merge_stats(stats, file_stats)
+        results[i] = records
+        if cache is not None:
+            cache.put(check_files[i], digests[i], records)
 
-def generate_html_report(
-    errors: list[ErrorRecord], output_path="error_report.html"
-) -> str:
-    html_content = f"""<!DOCTYPE html>
+    for records in results:
+        yield from records
+
+
+REPORT_HEAD = """<!DOCTYPE html>
 <html lang="zh">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>FTB任务颜色字符错误报告</title>
+    <title>{title}</title>
     <style>
         body {{ font-family: Arial, sans-serif; margin: 40px; background-color: #f5f5f5; text-align: center; }}
         h1 {{ color: #333; }}
+        .controls {{ margin: 20px auto; width: 90%; display: flex; gap: 12px; justify-content: center; flex-wrap: wrap; align-items: center; }}
+        .controls select, .controls input, .controls button {{ padding: 6px 10px; border: 1px solid #ccc; border-radius: 4px; max-width: 420px; }}
+        .controls button {{ background-color: #007bff; color: white; border: none; cursor: pointer; }}
+        .controls button:disabled {{ background-color: #9bbce0; cursor: default; }}
         table {{ margin: 20px auto; border-collapse: collapse; background: #fff; box-shadow: 0 4px 10px rgba(0, 0, 0, 0.1); table-layout: auto; width: 90%; }}
         th, td {{ padding: 12px; border-bottom: 1px solid #ddd; text-align: left; word-break: break-word; }}
         th {{ background-color: #007bff; color: white; }}
@@ -115,58 +636,149 @@ def generate_html_report(
     </style>
 </head>
 <body>
-    <h1>FTB任务颜色字符错误报告</h1>
-    <p>总共发现 {len(errors)} 个错误。</p>
+    <h1>{title}</h1>
+    <p id="summary"></p>
+    <div class="controls">
+        <select id="fileFilter"><option value="">全部文件</option></select>
+        <select id="typeFilter"><option value="">全部错误类型</option></select>
+        <input id="searchInput" type="text" placeholder="搜索键或值...">
+        <button id="prevPage">上一页</button>
+        <span id="pageInfo"></span>
+        <button id="nextPage">下一页</button>
+    </div>
     <table>
         <thead>
             <tr><th>文件路径</th><th>键</th><th>值</th><th>错误描述</th></tr>
         </thead>
-        <tbody>
-    """
-
-    def highlight(value: str, error_message: str) -> str:
-        result = []
-        i = 0
-        length = len(value)
-
-        while i < length:
-            if value[i] == "&":
-                if i + 1 < length:
-                    ch = value[i + 1]
-                    if not re.match(r"[a-v0-9\s\\#]", ch):
-                        # 是非法字符
-                        result.append("&<span class='highlight'>")
-                        result.append(html.escape(ch))
-                        result.append("</span>")
-                        i += 2  # 跳过这个非法字符
-                        continue
-            result.append(html.escape(value[i]))
-            i += 1
-
-        if error_message == "行尾包含非法字符 '&'" and value.endswith("&"):
-            result[-1] = "<span class='highlight'>&</span>"
-
-        return "".join(result)
-
-    for error in errors:
-        highlighted_value = highlight(error.value, error.error_message)
-        html_content += (
-            f"<tr>"
-            f"<td>{html.escape(error.file_path)}</td>"
-            f"<td>{html.escape(error.key)}</td>"
-            f"<td>{highlighted_value}</td>"
-            f"<td class='error'>{html.escape(error.error_message)}</td>"
-            f"</tr>\n"
-        )
-
-    html_content += """</tbody>
+        <tbody id="errorRows"></tbody>
     </table>
+    <script type="application/json" id="error-data">"""
+
+# 错误数据以 {"groups": [[文件序号, [[键, 值, 错误类型序号], ...]], ...], "files": [...], "types": [...]}
+# 的紧凑格式嵌入页面，只渲染当前页的行
+REPORT_TAIL = r"""</script>
+    <script>
+        const PAGE_SIZE = 200;
+        const data = JSON.parse(document.getElementById('error-data').textContent);
+        const rows = [];
+        data.groups.forEach(([fileIndex, items]) => {
+            items.forEach(([key, value, typeIndex]) => rows.push({ fileIndex, key, value, typeIndex }));
+        });
+        const state = { file: '', type: '', query: '', page: 0, filtered: rows };
+
+        function escapeHtml(text) {
+            return text.replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;')
+                .replace(/"/g, '&quot;').replace(/'/g, '&#x27;');
+        }
+
+        function highlight(value, message) {
+            let result = '';
+            for (let i = 0; i < value.length; i++) {
+                if (value[i] === '&' && i + 1 < value.length && !/[a-v0-9\s\\#]/.test(value[i + 1])) {
+                    result += "&amp;<span class='highlight'>" + escapeHtml(value[i + 1]) + '</span>';
+                    i++;
+                    continue;
+                }
+                result += escapeHtml(value[i]);
+            }
+            if (message === "行尾包含非法字符 '&'" && value.endsWith('&')) {
+                result = result.slice(0, -'&amp;'.length) + "<span class='highlight'>&</span>";
+            }
+            return result;
+        }
+
+        function fillSelect(id, labels) {
+            const select = document.getElementById(id);
+            labels.map((label, index) => [label, index])
+                .sort((a, b) => a[0].localeCompare(b[0]))
+                .forEach(([label, index]) => select.add(new Option(label, String(index))));
+        }
+
+        function applyFilters() {
+            const q = state.query.toLowerCase();
+            state.filtered = rows.filter(r =>
+                (state.file === '' || r.fileIndex === Number(state.file)) &&
+                (state.type === '' || r.typeIndex === Number(state.type)) &&
+                (!q || r.key.toLowerCase().includes(q) || r.value.toLowerCase().includes(q)));
+            state.page = 0;
+            render();
+        }
+
+        function render() {
+            const pages = Math.max(1, Math.ceil(state.filtered.length / PAGE_SIZE));
+            state.page = Math.min(state.page, pages - 1);
+            const start = state.page * PAGE_SIZE;
+            document.getElementById('errorRows').innerHTML = state.filtered.slice(start, start + PAGE_SIZE).map(r => {
+                const message = data.types[r.typeIndex];
+                return '<tr><td>' + escapeHtml(data.files[r.fileIndex]) + '</td><td>' + escapeHtml(r.key) +
+                    '</td><td>' + highlight(r.value, message) + "</td><td class='error'>" + escapeHtml(message) + '</td></tr>';
+            }).join('');
+            document.getElementById('summary').textContent = '总共发现 ' + rows.length + ' 个错误' +
+                (state.filtered.length !== rows.length ? '，筛选后 ' + state.filtered.length + ' 个' : '') + '。';
+            document.getElementById('pageInfo').textContent = '第 ' + (state.page + 1) + ' / ' + pages + ' 页';
+            document.getElementById('prevPage').disabled = state.page === 0;
+            document.getElementById('nextPage').disabled = state.page >= pages - 1;
+        }
+
+        fillSelect('fileFilter', data.files);
+        fillSelect('typeFilter', data.types);
+        document.getElementById('fileFilter').addEventListener('change', e => { state.file = e.target.value; applyFilters(); });
+        document.getElementById('typeFilter').addEventListener('change', e => { state.type = e.target.value; applyFilters(); });
+        document.getElementById('searchInput').addEventListener('input', e => { state.query = e.target.value; applyFilters(); });
+        document.getElementById('prevPage').addEventListener('click', () => { state.page--; render(); });
+        document.getElementById('nextPage').addEventListener('click', () => { state.page++; render(); });
+        render();
+    </script>
 </body>
 </html>"""
 
+
+def _json_for_script(value) -> str:
+    # 避免数据中的 "</script>" 提前结束脚本块
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).replace(
+        "</", "<\\/"
+    )
+
+
+def generate_html_report(
+    errors: Iterable[ErrorRecord],
+    output_path="error_report.html",
+    title="FTB任务颜色字符错误报告",
+) -> str:
+    """
+    逐条将错误写入 HTML 报告，不在内存中拼接整个页面。
+    连续属于同一文件的错误被合并为一组，文件路径与错误描述只存储一次。
+    """
+    file_indexes: dict[str, int] = {}
+    type_indexes: dict[str, int] = {}
     try:
         with open(output_path, "w", encoding="utf-8") as file:
-            file.write(html_content)
+            file.write(REPORT_HEAD.format(title=html.escape(title)))
+            file.write('{"groups":[')
+            current_file = None
+            for error in errors:
+                if error.file_path != current_file:
+                    if current_file is not None:
+                        file.write("]],")
+                    current_file = error.file_path
+                    file_index = file_indexes.setdefault(
+                        current_file, len(file_indexes)
+                    )
+                    file.write(f"[{file_index},[")
+                else:
+                    file.write(",")
+                type_index = type_indexes.setdefault(
+                    error.error_message, len(type_indexes)
+                )
+                file.write(_json_for_script([error.key, error.value, type_index]))
+            if current_file is not None:
+                file.write("]]")
+            file.write('],"files":')
+            file.write(_json_for_script(list(file_indexes)))
+            file.write(',"types":')
+            file.write(_json_for_script(list(type_indexes)))
+            file.write("}")
+            file.write(REPORT_TAIL)
         print(f"错误报告已生成到: {output_path}")
         return output_path
     except Exception as e:
@@ -175,9 +787,9 @@ def generate_html_report(
 
 
 def main():
-    parser = argparse.ArgumentParser(description="FTB任务颜色字符合法检查")
+    parser = argparse.ArgumentParser(description="FTB任务颜色字符与译文格式检查")
     parser.add_argument(
-        "path", help="要检查的 JSON 文件或包含 JSON 文件的目录的路径", type=str
+        "path", help="要检查的 JSON / SNBT 文件或包含这些文件的目录的路径", type=str
     )
     parser.add_argument(
         "--report-output",
@@ -185,29 +797,92 @@ def main():
         default="error_report.html",
         type=str,
     )
+    parser.add_argument(
+        "--source",
+        help="en_us 原文目录（检查目录时）或原文文件（检查单个文件时），"
+        "供 placeholder 与 newline_count 规则比对 (默认为 Source)",
+        default="Source",
+        type=str,
+    )
+    parser.add_argument(
+        "--rules",
+        help="启用的检查规则 (默认只检查 color_code 颜色代码)",
+        nargs="+",
+        choices=list(RULES),
+        default=[rule.name for rule in DEFAULT_RULES],
+    )
+    parser.add_argument(
+        "--jobs",
+        help="并行检查的进程数，0 表示使用全部 CPU 核心 (默认为 1，即串行检查)",
+        default=1,
+        type=int,
+    )
+    parser.add_argument(
+        "--cache",
+        help="检查结果缓存文件的路径，内容未改动的文件将直接使用缓存结果",
+        default=None,
+        type=str,
+    )
+    parser.add_argument(
+        "--changed-since",
+        help="只检查自该 git 版本以来新增或修改过的文件",
+        default=None,
+        type=str,
+    )
+    parser.add_argument(
+        "--changed-until",
+        help="与 --changed-since 配合使用的结束版本 (默认为当前工作区)",
+        default=None,
+        type=str,
+    )
 
     args = parser.parse_args()
     check_path = args.path
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
     report_output_path = args.report_output
+    use_rules(args.rules)
 
     if not os.path.exists(check_path):
         print(f"错误: 路径不存在 -> {check_path}", file=sys.stderr)
         sys.exit(1)
 
     errors: list[ErrorRecord] = []
+    stats: dict[str, LintStats] = {}
+    start = time.perf_counter()
+
+    cache = CheckCache(args.cache) if args.cache else None
 
     if os.path.isdir(check_path):
-        errors.extend(check_directory(check_path))
-    elif os.path.isfile(check_path) and check_path.lower().endswith(".json"):
-        errors.extend(check_json(check_path))
+        files = None
+        if args.changed_since:
+            files = git_changed_files(
+                check_path, args.changed_since, args.changed_until
+            )
+            print(f"自 {args.changed_since} 以来共有 {len(files)} 个文件发生变化。")
+        source_dir = args.source if os.path.isdir(args.source) else None
+        errors.extend(
+            check_directory(check_path, jobs, cache, files, source_dir, stats)
+        )
+    elif os.path.isfile(check_path) and check_path.lower().endswith((".json", ".snbt")):
+        source_path = args.source if os.path.isfile(args.source) else None
+        records, stats = check_file(check_path, source_path)
+        errors.extend(records)
     else:
         print(
-            f"错误: 无效的路径类型或文件格式 -> {check_path} (需要 .json 文件或目录)",
+            f"错误: 无效的路径类型或文件格式 -> {check_path} (需要 .json / .snbt 文件或目录)",
             file=sys.stderr,
         )
         sys.exit(1)
 
-    print(f"\n检查完成。总共发现 {len(errors)} 个错误。")
+    if cache is not None:
+        cache.save()
+        print(f"缓存命中 {cache.hits} 个文件，重新检查 {cache.misses} 个文件。")
+
+    report_stats(stats)
+    elapsed = time.perf_counter() - start
+    print(
+        f"\n检查完成（耗时 {elapsed * 1000:.1f} ms）。总共发现 {len(errors)} 个错误。"
+    )
 
     if errors:
         generated_report_path = generate_html_report(errors, report_output_path)
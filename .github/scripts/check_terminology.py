@@ -0,0 +1,187 @@
+"""
+术语一致性检查
+
+将术语表中的英文术语编译为 Aho-Corasick 自动机，一次扫描所有 en_us 原文，
+找出原文包含术语、但对应 zh_cn 译文中没有使用规定译名的词条，
+并生成与 check_ftb_colors.py 相同样式的 HTML 报告。
+
+术语表默认为 .github/configs/terminology.json，格式为
+{"英文术语": "译名"} 或 {"英文术语": ["译名1", "译名2"]}（任一译名出现即视为一致）。
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from collections.abc import Iterator
+from pathlib import Path
+
+from check_ftb_colors import ErrorRecord, generate_html_report
+from translation_memory import (
+    SOURCE_LANG,
+    load_lang_json,
+    normalize_text,
+    target_path_for,
+)
+
+DEFAULT_GLOSSARY_FILE = ".github/configs/terminology.json"
+
+
+class AhoCorasick:
+    """多模式字符串匹配自动机，扫描耗时与文本长度成正比，与术语数量无关。"""
+
+    def __init__(self, patterns: list[str]):
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.output: list[list[int]] = [[]]
+        self.patterns = patterns
+
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for ch in pattern:
+                next_state = self.goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][ch] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = next_state
+            self.output[state].append(index)
+
+        # 广度优先构建失败指针，并合并后缀状态的输出
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(ch, 0)
+                if self.fail[next_state] == next_state:
+                    self.fail[next_state] = 0
+                self.output[next_state] += self.output[self.fail[next_state]]
+
+    def iter(self, text: str) -> Iterator[tuple[int, int]]:
+        """产出 (匹配结束位置, 模式序号)，结束位置为匹配末字符的下一个下标。"""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for index in output[state]:
+                yield end, index
+
+
+def load_glossary(glossary_file: str) -> dict[str, list[str]]:
+    with open(glossary_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {
+        term: [approved] if isinstance(approved, str) else list(approved)
+        for term, approved in data.items()
+    }
+
+
+class TerminologyChecker:
+    def __init__(self, glossary: dict[str, list[str]]):
+        self.terms = list(glossary)
+        self.approved = [glossary[t] for t in self.terms]
+        self.automaton = AhoCorasick([t.lower() for t in self.terms])
+
+    def find_terms(self, text: str) -> list[int]:
+        """返回原文中出现的术语序号。被更长术语覆盖的短术语不计入，只匹配完整单词。"""
+        lowered = text.lower()
+        spans = []
+        for end, index in self.automaton.iter(lowered):
+            start = end - len(self.terms[index])
+            if start > 0 and lowered[start - 1].isalnum():
+                continue
+            if end < len(lowered) and lowered[end].isalnum():
+                continue
+            spans.append((start, end, index))
+        return [
+            index
+            for start, end, index in spans
+            if not any(
+                s <= start and end <= e and (e - s) > (end - start) for s, e, _ in spans
+            )
+        ]
+
+    def check_pair(
+        self, file_path: str, key: str, original: str, translation: str
+    ) -> Iterator[ErrorRecord]:
+        for index in dict.fromkeys(self.find_terms(original)):
+            approved = self.approved[index]
+            if not any(a in translation for a in approved):
+                yield ErrorRecord(
+                    file_path,
+                    key,
+                    translation,
+                    f"原文包含术语 '{self.terms[index]}'，译文未使用规定译名 "
+                    + " / ".join(f"'{a}'" for a in approved),
+                )
+
+
+def check_directory(
+    checker: TerminologyChecker, source_dir: str, target_dir: str
+) -> Iterator[ErrorRecord]:
+    source_root, target_root = Path(source_dir), Path(target_dir)
+    for source_file in sorted(source_root.rglob(f"*{SOURCE_LANG}*.json")):
+        rel = source_file.relative_to(source_root).as_posix()
+        target_file = target_root / target_path_for(rel)
+        if not target_file.exists():
+            continue
+        translations = load_lang_json(target_file)
+        for key, original in load_lang_json(source_file).items():
+            translation = translations.get(key)
+            # 未翻译的词条（回填了原文）不参与检查
+            if translation is None or normalize_text(translation) == normalize_text(
+                original
+            ):
+                continue
+            yield from checker.check_pair(str(target_file), key, original, translation)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="术语一致性检查")
+    parser.add_argument("--source-dir", default="Source", help="原文目录 (默认: Source)")
+    parser.add_argument("--target-dir", default="CNPack", help="译文目录 (默认: CNPack)")
+    parser.add_argument(
+        "--glossary",
+        default=DEFAULT_GLOSSARY_FILE,
+        help=f"术语表路径 (默认: {DEFAULT_GLOSSARY_FILE})",
+    )
+    parser.add_argument(
+        "--report-output",
+        default="terminology_report.html",
+        help="HTML 报告的输出路径 (默认为 terminology_report.html)",
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.glossary):
+        print(f"错误: 术语表不存在 -> {args.glossary}", file=sys.stderr)
+        sys.exit(1)
+
+    start = time.perf_counter()
+    checker = TerminologyChecker(load_glossary(args.glossary))
+    errors = list(check_directory(checker, args.source_dir, args.target_dir))
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"检查完成（{len(checker.terms)} 条术语，耗时 {elapsed * 1000:.1f} ms）。"
+        f"总共发现 {len(errors)} 处术语不一致。"
+    )
+    if errors:
+        generated_report_path = generate_html_report(
+            errors, args.report_output, title="术语一致性检查报告"
+        )
+        if generated_report_path:
+            print(f"详细报告请查看文件: {generated_report_path}")
+
+
+if __name__ == "__main__":
+    main()
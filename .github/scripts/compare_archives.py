@@ -1,729 +1,1388 @@
-#!/usr/bin/env python3
-# -*- coding: utf-8 -*-
-
-import argparse
-import difflib
-import hashlib
-import os
-import pathlib
-import tarfile
-import tempfile
-import zipfile
-import json
-from collections import deque
-from html import escape
-
-CSS_STYLES = """
-<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/styles/github.min.css">
-<style>
-    :root {
-        --font-sans: "Inter", -apple-system, BlinkMacSystemFont, "Segoe UI", Helvetica, Arial, sans-serif;
-        --font-mono: "JetBrains Mono", "SFMono-Regular", Consolas, monospace;
-
-        --c-bg: #ffffff;
-        --c-sidebar: #f8f9fa;
-        --c-border: #e5e7eb;
-        --c-text: #1f2937;
-        --c-text-muted: #6b7280;
-
-        /* Status Colors */
-        /* Added: Green/Emerald */
-        --c-add-bg: #ecfdf5; --c-add-border: #10b98180; --c-add-text: #047857;
-        /* Modified: Amber/Orange */
-        --c-mod-bg: #fffbeb; --c-mod-border: #f59e0b80; --c-mod-text: #b45309;
-        /* Deleted: Rose/Red */
-        --c-del-bg: #fff1f2; --c-del-border: #f43f5e80; --c-del-text: #be123c;
-
-        --diff-add-bg: #ecfdf5;
-        --diff-del-bg: #fff1f2;
-        --diff-hunk-bg: #f9fafb;
-        --diff-hunk-text: #6b7280;
-    }
-
-    * { box-sizing: border-box; }
-    body { margin: 0; font-family: var(--font-sans); background: var(--c-bg); height: 100vh; display: flex; flex-direction: column; color: var(--c-text); overflow: hidden; }
-
-    /* --- Header --- */
-    header { height: 56px; background: #fff; border-bottom: 1px solid var(--c-border); display: flex; align-items: center; padding: 0 20px; flex-shrink: 0; justify-content: space-between; z-index: 10; }
-    header h1 { font-size: 15px; font-weight: 600; color: var(--c-text); display: flex; gap: 8px; align-items: center; }
-    .header-left { display: flex; align-items: center; gap: 16px; flex-wrap: wrap; }
-    .archive-meta { display: flex; gap: 8px; flex-wrap: wrap; }
-    .archive-pill { padding: 4px 12px; border: 1px solid var(--c-border); border-radius: 6px; background: var(--c-sidebar); display: flex; flex-direction: column; min-width: 180px; }
-    .archive-pill .pill-label { font-size: 11px; color: var(--c-text-muted); text-transform: uppercase; letter-spacing: 0.04em; }
-    .archive-pill .pill-value { font-size: 13px; font-weight: 600; color: var(--c-text); }
-
-    .view-toggle { 
-        display: flex; background: #f3f4f6; padding: 2px; border-radius: 6px; 
-        position: relative; border: 1px solid #e5e7eb; height: 28px;
-    }
-    .toggle-btn { 
-        border: none; background: transparent; padding: 0 12px; font-size: 12px; font-weight: 500; color: #6b7280; 
-        cursor: pointer; z-index: 2; position: relative; transition: color 0.2s; line-height: 24px;
-    }
-    .toggle-btn.active { color: #1f2937; font-weight: 600; }
-    .toggle-bg {
-        position: absolute; top: 2px; left: 2px; bottom: 2px; width: 50%;
-        background: #fff; border-radius: 4px; box-shadow: 0 1px 2px rgba(0,0,0,0.05);
-        transition: transform 0.2s cubic-bezier(0.2, 0.0, 0.2, 1); z-index: 1;
-    }
-    .view-toggle[data-active="split"] .toggle-bg { transform: translateX(100%); }
-
-    /* --- Sidebar --- */
-    .main-container { display: flex; flex: 1; overflow: hidden; }
-    .sidebar { width: 340px; background: var(--c-sidebar); border-right: 1px solid var(--c-border); display: flex; flex-direction: column; flex-shrink: 0; }
-
-    .sidebar-header { padding: 12px; border-bottom: 1px solid var(--c-border); background: #fff; display: flex; flex-direction: column; gap: 10px; }
-
-    /* Filter Bar - Legend Style */
-    .filter-bar { display: flex; gap: 8px; }
-    .filter-btn { 
-        flex: 1; font-size: 11px; padding: 4px 0; border-radius: 4px; cursor: pointer; 
-        text-align: center; font-weight: 600; border: 1px solid;
-        transition: all 0.15s;
-        display: flex; align-items: center; justify-content: center; gap: 4px;
-    }
-
-    /* Default "Glowing" State (Legend) */
-    .filter-btn[data-type="all"] { 
-        background: #fff; border-color: #e5e7eb; color: #374151; 
-    }
-    .filter-btn[data-type="added"] { 
-        background: var(--c-add-bg); border-color: var(--c-add-border); color: var(--c-add-text); 
-    }
-    .filter-btn[data-type="modified"] { 
-        background: var(--c-mod-bg); border-color: var(--c-mod-border); color: var(--c-mod-text); 
-    }
-    .filter-btn[data-type="removed"] { 
-        background: var(--c-del-bg); border-color: var(--c-del-border); color: var(--c-del-text); 
-    }
-
-    /* Active State (Filled/Pressed) */
-    .filter-btn.active { transform: translateY(1px); box-shadow: inset 0 2px 4px rgba(0,0,0,0.05); filter: brightness(0.95); }
-    .filter-btn.active[data-type="all"] { background: #f3f4f6; }
-
-    .search-box { 
-        width: 100%; padding: 6px 10px; border: 1px solid var(--c-border); border-radius: 6px; 
-        font-size: 13px; outline: none; transition: 0.2s; background: #f9fafb;
-    }
-    .search-box:focus { border-color: #d1d5db; background: #fff; }
-
-    .sidebar-controls { display: flex; align-items: center; font-size: 12px; color: var(--c-text-muted); padding: 0 2px; }
-    .chk-label { display: flex; align-items: center; gap: 6px; cursor: pointer; user-select: none; }
-    .chk-label input { margin: 0; accent-color: #374151; }
-
-    /* Tree List */
-    .tree-container { flex: 1; overflow-y: auto; padding: 4px 0; }
-    .tree-node { user-select: none; }
-
-    .node-content { 
-        display: flex; align-items: center; height: 28px; cursor: pointer; 
-        font-size: 13px; padding-right: 0; position: relative; overflow: hidden;
-    }
-    .node-content:hover { background: #e5e7eb; }
-    .node-content.active { background: #eef2ff; color: #4f46e5; }
-
-    .node-indent { display: inline-block; height: 100%; flex-shrink: 0; }
-    .node-icon { margin-right: 6px; opacity: 0.6; width: 16px; text-align: center; flex-shrink: 0; }
-    .node-name { 
-        flex: 1; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; 
-        min-width: 0; margin-right: 8px;
-    }
-
-    /* Stats Typography */
-    .node-meta { display: flex; align-items: center; margin-left: auto; flex-shrink: 0; font-family: var(--font-mono); font-size: 10px; font-weight: 500; gap: 6px; margin-right: 4px;}
-    .stat-plus { color: #10b981; }
-    .stat-mod { color: #f59e0b; }
-    .stat-minus { color: #ef4444; }
-    .stat-bin { color: #9ca3af; }
-
-    /* Right Color Bar */
-    .status-bar { width: 4px; height: 50%; margin-left: 4px; flex-shrink: 0; opacity: 0.8; }
-    .s-added .status-bar { background: var(--c-add-border); box-shadow: -4px 0 12px var(--c-add-border); }
-    .s-added { background: linear-gradient(to left, rgba(16, 185, 129, 0.08) 0%, transparent 30%); }
-    .s-mod .status-bar { background: var(--c-mod-border); box-shadow: -4px 0 12px var(--c-mod-border); }
-    .s-mod { background: linear-gradient(to left, rgba(245, 158, 11, 0.08) 0%, transparent 30%); }
-    .s-del .status-bar { background: var(--c-del-border); box-shadow: -4px 0 12px var(--c-del-border); }
-    .s-del { background: linear-gradient(to left, rgba(244, 63, 94, 0.08) 0%, transparent 30%); }
-
-    /* Content */
-    .content-area { flex: 1; background: #fff; display: flex; flex-direction: column; overflow: hidden; position: relative; }
-    .empty-state { position: absolute; top: 45%; left: 50%; transform: translate(-50%, -50%); color: var(--c-text-muted); text-align: center; pointer-events: none; }
-
-    .diff-container { display: none; flex-direction: column; height: 100%; }
-    .diff-container.active { display: flex; }
-
-    .file-header { padding: 10px 20px; border-bottom: 1px solid var(--border-color); background: #fcfcfc; display: flex; justify-content: space-between; align-items: center; }
-    .diff-scroll-area { flex: 1; overflow: auto; background: #fff; }
-
-    table.diff-table { width: 100%; border-collapse: collapse; font-family: var(--font-mono); font-size: 12px; table-layout: fixed; }
-    table.diff-table td { padding: 0 4px; vertical-align: top; line-height: 1.6; word-break: break-all; white-space: pre-wrap; }
-
-    .line-num { text-align: right; padding-right: 12px !important; color: #d1d5db; user-select: none; background-color: #fff; border-right: 1px solid #f3f4f6; width: 48px; font-size: 11px; }
-    .diff-add { background-color: var(--diff-add-bg); }
-    .diff-del { background-color: var(--diff-del-bg); }
-    .diff-hunk { background-color: var(--diff-hunk-bg); color: var(--diff-hunk-text); padding: 8px 12px !important; border-top: 1px solid #f3f4f6; border-bottom: 1px solid #f3f4f6; font-weight: 600; font-size: 11px; }
-    .view-split .line-num { border-right: none; border-left: 1px solid #f3f4f6; text-align: center; padding: 0 !important; }
-    .empty-cell { background: #fafafa; border: none; }
-    .binary-msg { margin: 80px auto; text-align: center; padding: 30px; border: 1px dashed #e5e7eb; border-radius: 8px; background: #f9fafb; }
-
-    .inline-add { background: rgba(16, 185, 129, 0.25); border-radius: 3px; }
-    .inline-del { background: rgba(244, 63, 94, 0.25); border-radius: 3px; }
-
-    .hljs { background: transparent; padding: 0; font-family: inherit; font-size: inherit; }
-</style>
-<script src="https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/highlight.min.js"></script>
-"""
-
-JS_SCRIPT = """
-<script>
-    const state = {
-        files: [], tree: {}, currentFileId: null,
-        filterType: 'all', showBinary: true, viewMode: 'inline', searchQuery: '',
-        meta: { old_label: 'Archive 1', new_label: 'Archive 2' }
-    };
-
-    const LANG_MAP = { 'py': 'python', 'js': 'javascript', 'json': 'json', 'html': 'xml', 'css': 'css', 'java': 'java', 'c': 'c', 'cpp': 'cpp', 'h': 'c', 'rs': 'rust', 'go': 'go', 'ts': 'typescript', 'sh': 'bash', 'yaml': 'yaml', 'yml': 'yaml', 'md': 'markdown', 'xml': 'xml', 'sql': 'sql', 'toml': 'ini', 'ini': 'ini' };
-
-    document.addEventListener('DOMContentLoaded', () => {
-        const payload = document.getElementById('data-payload');
-        if (payload) {
-            const parsed = JSON.parse(payload.textContent);
-            state.files = parsed.files;
-            state.meta = parsed.meta || state.meta;
-            updateArchiveLabels();
-            buildTree();
-            calculateFolderStats(state.tree); // Pre-calc recursion
-            renderTree();
-        }
-
-        document.getElementById('searchInput').addEventListener('input', (e) => { state.searchQuery = e.target.value.toLowerCase(); renderTree(); });
-        document.querySelectorAll('.filter-btn').forEach(btn => btn.addEventListener('click', () => {
-            document.querySelectorAll('.filter-btn').forEach(b => b.classList.remove('active'));
-            btn.classList.add('active');
-            state.filterType = btn.dataset.type;
-            renderTree();
-        }));
-        document.getElementById('binaryToggle').addEventListener('change', (e) => { state.showBinary = e.target.checked; renderTree(); });
-
-        const toggleContainer = document.querySelector('.view-toggle');
-        document.querySelectorAll('.toggle-btn').forEach(btn => {
-            btn.addEventListener('click', () => {
-                document.querySelectorAll('.toggle-btn').forEach(b => b.classList.remove('active'));
-                btn.classList.add('active');
-                const mode = btn.dataset.mode;
-                state.viewMode = mode;
-                toggleContainer.dataset.active = mode;
-                renderDiff();
-            });
-        });
-    });
-
-    function updateArchiveLabels() {
-        const oldEl = document.getElementById('archiveOldLabel');
-        const newEl = document.getElementById('archiveNewLabel');
-        if (oldEl) oldEl.textContent = state.meta.old_label || '—';
-        if (newEl) newEl.textContent = state.meta.new_label || '—';
-    }
-
-    function highlightLine(code, filename) {
-        if (!code) return '';
-        const ext = filename.includes('.') ? filename.split('.').pop().toLowerCase() : '';
-        try { return (LANG_MAP[ext] && hljs.getLanguage(LANG_MAP[ext])) ? hljs.highlight(code, { language: LANG_MAP[ext] }).value : escape(code); } catch (e) { return escape(code); }
-    }
-
-    function getLineHtml(block, filename) {
-        if (block.inline_html) {
-            return block.inline_html;
-        }
-        return highlightLine(block.content, filename);
-    }
-
-    function buildTree() {
-        state.tree = { name: "root", children: {}, isFolder: true, path: "", expanded: true, stats: {a:0, m:0, r:0} };
-        state.files.forEach(f => {
-            let current = state.tree;
-            f.path.split('/').forEach((part, i, arr) => {
-                const isFile = i === arr.length - 1;
-                if (!current.children[part]) {
-                    current.children[part] = { 
-                        name: part, isFolder: !isFile, children: {}, expanded: false, fileData: isFile ? f : null, stats: {a:0, m:0, r:0}
-                    };
-                }
-                current = current.children[part];
-            });
-        });
-    }
-
-    // Recursive Stats Calculation
-    function calculateFolderStats(node) {
-        if (!node.isFolder) {
-            // Return 1 for the specific status
-            return {
-                a: node.fileData.status === 'added' ? 1 : 0,
-                m: node.fileData.status === 'modified' ? 1 : 0,
-                r: node.fileData.status === 'removed' ? 1 : 0
-            };
-        }
-
-        let total = { a: 0, m: 0, r: 0 };
-        Object.values(node.children).forEach(child => {
-            const s = calculateFolderStats(child);
-            total.a += s.a;
-            total.m += s.m;
-            total.r += s.r;
-        });
-        node.stats = total;
-        return total;
-    }
-
-    function toggleNode(node) {
-        if (state.searchQuery) return;
-        const startState = !node.expanded;
-        node.expanded = startState;
-
-        if (startState) {
-            let current = node;
-            while (true) {
-                const keys = Object.keys(current.children);
-                if (keys.length === 1) {
-                    const child = current.children[keys[0]];
-                    if (child.isFolder) {
-                        child.expanded = true;
-                        current = child;
-                        continue;
-                    }
-                }
-                break; 
-            }
-        }
-        renderTree();
-    }
-
-    function renderTree() {
-        const container = document.getElementById('treeContainer');
-        container.innerHTML = '';
-
-        const traverse = (node, depth) => {
-            if (!node.isFolder) {
-                const f = node.fileData;
-                if (state.filterType !== 'all' && f.status !== state.filterType) return null;
-                if (!state.showBinary && f.is_binary) return null;
-                if (state.searchQuery && !f.path.toLowerCase().includes(state.searchQuery)) return null;
-                return buildFileEl(node, depth);
-            }
-
-            const childKeys = Object.keys(node.children);
-            const folders = childKeys.filter(k => node.children[k].isFolder).sort();
-            const files = childKeys.filter(k => !node.children[k].isFolder).sort();
-
-            const childEls = [...folders, ...files].map(k => traverse(node.children[k], depth + 1)).filter(Boolean);
-            if (childEls.length === 0) return null;
-
-            const isExpanded = state.searchQuery ? true : node.expanded;
-            return buildFolderEl(node, depth, childEls, isExpanded);
-        };
-
-        const rootKeys = Object.keys(state.tree.children);
-        const rFolders = rootKeys.filter(k => state.tree.children[k].isFolder).sort();
-        const rFiles = rootKeys.filter(k => !state.tree.children[k].isFolder).sort();
-
-        [...rFolders, ...rFiles].forEach(k => {
-            const el = traverse(state.tree.children[k], 0);
-            if (el) container.appendChild(el);
-        });
-    }
-
-    function buildFileEl(node, depth) {
-        const f = node.fileData;
-        const div = document.createElement('div');
-        div.className = 'tree-node';
-
-        let statusClass = '';
-        if (f.status === 'added') statusClass = 's-added';
-        else if (f.status === 'modified') statusClass = 's-mod';
-        else if (f.status === 'removed') statusClass = 's-del';
-
-        let statsHtml = '';
-        if (!f.is_binary && (f.add_count > 0 || f.del_count > 0)) {
-            if(f.add_count) statsHtml += `<span class="stat-plus">+${f.add_count}</span>`;
-            if(f.del_count) statsHtml += `<span class="stat-minus">-${f.del_count}</span>`;
-        } else if (f.is_binary && f.size_diff) {
-            statsHtml = `<span class="stat-bin">${f.size_diff}</span>`;
-        }
-
-        div.innerHTML = `
-            <div class="node-content ${statusClass} ${state.currentFileId === f.id ? 'active' : ''}" onclick="selectFile('${f.id}')">
-                <span class="node-indent" style="width:${depth*16}px"></span>
-                <span class="node-icon">${f.is_binary?'📦':'📄'}</span>
-                <span class="node-name">${node.name}</span>
-                <div class="node-meta">${statsHtml}</div>
-                <div class="status-bar"></div>
-            </div>`;
-        return div;
-    }
-
-    function buildFolderEl(node, depth, children, expanded) {
-        const div = document.createElement('div');
-        div.className = 'tree-node';
-        const content = document.createElement('div');
-        content.className = 'node-content';
-        content.onclick = () => toggleNode(node);
-
-        // Folder Stats Logic: Only show if NOT expanded
-        let statsHtml = '';
-        if (!expanded && node.stats && (node.stats.a + node.stats.m + node.stats.r > 0)) {
-            if(node.stats.a) statsHtml += `<span class="stat-plus">+${node.stats.a}</span>`;
-            if(node.stats.m) statsHtml += `<span class="stat-mod">~${node.stats.m}</span>`;
-            if(node.stats.r) statsHtml += `<span class="stat-minus">-${node.stats.r}</span>`;
-        }
-
-        content.innerHTML = `
-            <span class="node-indent" style="width:${depth*16}px"></span>
-            <span class="node-icon">${expanded?'📂':'📁'}</span> 
-            <span class="node-name" style="font-weight:600">${node.name}</span>
-            <div class="node-meta">${statsHtml}</div>
-            <div class="status-bar" style="background:transparent"></div>`;
-
-        div.appendChild(content);
-        if(expanded) {
-            const sub = document.createElement('div');
-            children.forEach(c => sub.appendChild(c));
-            div.appendChild(sub);
-        }
-        return div;
-    }
-
-    window.selectFile = (id) => { state.currentFileId = id; renderDiff(); };
-
-    function renderDiff() {
-        const file = state.files.find(f => f.id === state.currentFileId);
-        if (!file) return;
-
-        document.getElementById('emptyState').style.display = 'none';
-        const container = document.getElementById('diffContainer');
-        container.className = 'diff-container active';
-
-        let html = `<div class="file-header">
-            <h2>${file.name}</h2>
-            <div class="file-path">${file.path}</div>
-        </div><div class="diff-scroll-area">`;
-
-        if (file.is_binary) {
-            html += `<div class="binary-msg">
-                <div style="font-size:32px; margin-bottom:16px">📊</div>
-                <div style="font-weight:600; font-size:16px">二进制文件 (${file.status})</div>
-                <br><div style="color:#57606a">${file.size_diff ? '大小变化: ' + file.size_diff : ''}</div>
-            </div>`;
-        } else if (!file.diff_blocks || file.diff_blocks.length === 0) {
-            html += `<div class="binary-msg">文件内容一致</div>`;
-        } else {
-            html += state.viewMode === 'split' ? renderSplit(file) : renderInline(file);
-        }
-        container.innerHTML = html + '</div>';
-    }
-
-    function renderInline(file) {
-        let html = `<table class="diff-table view-inline"><colgroup><col width="48"><col width="48"><col></colgroup><tbody>`;
-        file.diff_blocks.forEach(b => {
-            if (b.type === 'hunk') {
-                html += `<tr><td class="diff-hunk" colspan="3">${escape(b.content)}</td></tr>`;
-            } else {
-                const cls = b.type === 'add' ? 'diff-add' : (b.type === 'del' ? 'diff-del' : '');
-                const codeHtml = getLineHtml(b, file.name);
-                html += `<tr class="${cls}">
-                    <td class="line-num">${b.old_lineno || ''}</td>
-                    <td class="line-num">${b.new_lineno || ''}</td>
-                    <td>${codeHtml}</td>
-                </tr>`;
-            }
-        });
-        return html + '</tbody></table>';
-    }
-
-    function renderSplit(file) {
-        let html = `<table class="diff-table view-split"><colgroup><col width="50%"><col width="48"><col width="48"><col width="50%"></colgroup><tbody>`;
-        file.diff_blocks.forEach(b => {
-            if (b.type === 'hunk') {
-                html += `<tr><td class="diff-hunk" colspan="4" style="text-align:center">${escape(b.content)}</td></tr>`;
-            } else {
-                const code = getLineHtml(b, file.name);
-                if (b.type === 'add') {
-                    html += `<tr class="diff-add"><td class="empty-cell"></td><td class="line-num"></td><td class="line-num">${b.new_lineno}</td><td>${code}</td></tr>`;
-                } else if (b.type === 'del') {
-                    html += `<tr class="diff-del"><td>${code}</td><td class="line-num">${b.old_lineno}</td><td class="line-num"></td><td class="empty-cell"></td></tr>`;
-                } else {
-                    html += `<tr><td>${code}</td><td class="line-num">${b.old_lineno}</td><td class="line-num">${b.new_lineno}</td><td>${code}</td></tr>`;
-                }
-            }
-        });
-        return html + '</tbody></table>';
-    }
-
-    function escape(text) {
-        return text ? text.replace(/&/g, "&amp;").replace(/</g, "&lt;").replace(/>/g, "&gt;") : '';
-    }
-</script>
-"""
-
-HTML_SHELL = """
-<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Diff Report</title>
-    {css}
-</head>
-<body>
-    <header>
-        <div class="header-left">
-            <h1>📂 档案对比分析</h1>
-            <div class="archive-meta">
-                <div class="archive-pill">
-                    <span class="pill-label">旧版本</span>
-                    <span class="pill-value" id="archiveOldLabel">—</span>
-                </div>
-                <div class="archive-pill">
-                    <span class="pill-label">新版本</span>
-                    <span class="pill-value" id="archiveNewLabel">—</span>
-                </div>
-            </div>
-        </div>
-        <div class="header-controls">
-             <div class="view-toggle" data-active="inline">
-                <div class="toggle-bg"></div>
-                <button class="toggle-btn active" data-mode="inline">Inline</button>
-                <button class="toggle-btn" data-mode="split">Split</button>
-             </div>
-        </div>
-    </header>
-    <div class="main-container">
-        <aside class="sidebar">
-            <div class="sidebar-header">
-                <div class="filter-bar">
-                    <div class="filter-btn active" data-type="all">ALL</div>
-                    <div class="filter-btn" data-type="added">NEW</div>
-                    <div class="filter-btn" data-type="modified">MOD</div>
-                    <div class="filter-btn" data-type="removed">DEL</div>
-                </div>
-                <input type="text" id="searchInput" class="search-box" placeholder="Search files...">
-                <div class="sidebar-controls">
-                     <label class="chk-label">
-                        <input type="checkbox" id="binaryToggle" checked>
-                        <span>显示二进制文件</span>
-                     </label>
-                </div>
-            </div>
-            <div id="treeContainer" class="tree-container"></div>
-        </aside>
-        <main class="content-area">
-            <div id="emptyState" class="empty-state">
-                <div style="font-size:48px;margin-bottom:16px;opacity:0.2">👈</div>
-                <div>Select a file to view changes</div>
-            </div>
-            <div id="diffContainer" class="diff-container"></div>
-        </main>
-    </div>
-    <script type="application/json" id="data-payload">{json_data}</script>
-    {js}
-</body>
-</html>
-"""
-
-
-class ArchiveComparator:
-    def __init__(self, archive1, archive2, output_path, old_label=None, new_label=None):
-        self.archive1 = archive1
-        self.archive2 = archive2
-        self.output_path = output_path
-        self.files_data = []
-        self.old_label = old_label or pathlib.Path(archive1).name
-        self.new_label = new_label or pathlib.Path(archive2).name
-
-    def _try_convert_binary_to_text(self, file_path, original_ext):
-        return None, False
-
-    def _read_content(self, path):
-        if not path or not path.exists(): return [], False
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                return f.read().splitlines(), True
-        except UnicodeDecodeError:
-            pass
-        except Exception:
-            return None, False
-
-        converted, success = self._try_convert_binary_to_text(path, path.suffix.lower())
-        return (converted.splitlines(), True) if success else (None, False)
-
-    def get_size_diff(self, p1, p2):
-        s1 = p1.stat().st_size if p1 and p1.exists() else 0
-        s2 = p2.stat().st_size if p2 and p2.exists() else 0
-        diff = s2 - s1
-        if diff == 0: return "0 B"
-        abs_diff = abs(diff)
-        unit = "B"
-        for u in ["B", "KB", "MB"]:
-            if abs_diff < 1024: break
-            abs_diff /= 1024
-            unit = u
-        return f"{'+' if diff > 0 else ''}{abs_diff:.1f} {unit}"
-
-    def build_inline_diff(self, old_text, new_text):
-        matcher = difflib.SequenceMatcher(None, old_text, new_text)
-        old_parts, new_parts = [], []
-        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
-            old_seg = escape(old_text[i1:i2])
-            new_seg = escape(new_text[j1:j2])
-            if tag == 'equal':
-                if old_seg: old_parts.append(old_seg)
-                if new_seg: new_parts.append(new_seg)
-            elif tag == 'delete':
-                if old_seg: old_parts.append(f"<span class='inline-del'>{old_seg}</span>")
-            elif tag == 'insert':
-                if new_seg: new_parts.append(f"<span class='inline-add'>{new_seg}</span>")
-            elif tag == 'replace':
-                if old_seg: old_parts.append(f"<span class='inline-del'>{old_seg}</span>")
-                if new_seg: new_parts.append(f"<span class='inline-add'>{new_seg}</span>")
-        return ''.join(old_parts) or escape(old_text), ''.join(new_parts) or escape(new_text)
-
-    def generate_diff_blocks(self, lines1, lines2):
-        blocks = []
-        add_count, del_count = 0, 0
-
-        diff_gen = difflib.unified_diff(lines1, lines2, n=3, lineterm='')
-        try:
-            next(diff_gen);
-            next(diff_gen)
-        except StopIteration:
-            pass
-
-        old_line, new_line = 0, 0
-        pending_deletions = deque()
-        for line in diff_gen:
-            if line.startswith('@@'):
-                pending_deletions.clear()
-                blocks.append({'type': 'hunk', 'content': line})
-                try:
-                    parts = line.split(' ')
-                    old_line = int(parts[1].split(',')[0].replace('-', '')) - 1
-                    new_line = int(parts[2].split(',')[0].replace('+', '')) - 1
-                except:
-                    pass
-            elif line.startswith('+'):
-                new_line += 1;
-                add_count += 1
-                entry = {'type': 'add', 'content': line[1:], 'new_lineno': new_line}
-                if pending_deletions:
-                    partner = pending_deletions.popleft()
-                    old_html, new_html = self.build_inline_diff(partner['content'], entry['content'])
-                    partner['inline_html'] = old_html
-                    entry['inline_html'] = new_html
-                blocks.append(entry)
-            elif line.startswith('-'):
-                old_line += 1;
-                del_count += 1
-                entry = {'type': 'del', 'content': line[1:], 'old_lineno': old_line}
-                blocks.append(entry)
-                pending_deletions.append(entry)
-            else:
-                pending_deletions.clear()
-                old_line += 1;
-                new_line += 1
-                blocks.append({'type': 'eq', 'content': line[1:], 'old_lineno': old_line, 'new_lineno': new_line})
-        return blocks, add_count, del_count
-
-    def process(self):
-        with tempfile.TemporaryDirectory() as td1, tempfile.TemporaryDirectory() as td2:
-            print(f"Processing archives...")
-            self._extract(self.archive1, td1)
-            self._extract(self.archive2, td2)
-            self._compare(td1, td2)
-            self._write()
-
-    def _extract(self, arc, dest):
-        try:
-            if arc.endswith(('.zip', '.jar')):
-                with zipfile.ZipFile(arc, 'r') as z:
-                    z.extractall(dest)
-            elif arc.endswith(('.tar.gz', '.tar')):
-                with tarfile.open(arc, 'r:*') as t:
-                    t.extractall(dest)
-            else:
-                with zipfile.ZipFile(arc, 'r') as z:
-                    z.extractall(dest)
-        except Exception:
-            pass
-
-    def _compare(self, d1, d2):
-        p1, p2 = pathlib.Path(d1), pathlib.Path(d2)
-        files1 = {p.relative_to(p1) for p in p1.rglob('*') if p.is_file()}
-        files2 = {p.relative_to(p2) for p in p2.rglob('*') if p.is_file()}
-
-        count = 0
-        for rel in sorted(list(files1 | files2)):
-            f1, f2 = p1 / rel, p2 / rel
-            item = {
-                "id": f"f{count}", "path": rel.as_posix(), "name": rel.name,
-                "diff_blocks": [], "add_count": 0, "del_count": 0, "size_diff": ""
-            }
-            count += 1
-
-            lines1, is_text1 = self._read_content(f1) if rel in files1 else ([], True)
-            lines2, is_text2 = self._read_content(f2) if rel in files2 else ([], True)
-
-            if rel in files1 and rel not in files2:
-                item['status'] = 'removed'
-                is_text = is_text1
-            elif rel not in files1 and rel in files2:
-                item['status'] = 'added'
-                is_text = is_text2
-            else:
-                item['status'] = 'modified'
-                is_text = is_text1 and is_text2
-                if hashlib.sha256(f1.read_bytes()).hexdigest() == hashlib.sha256(f2.read_bytes()).hexdigest():
-                    continue
-
-            item['is_binary'] = not is_text
-
-            if is_text:
-                blocks, adds, dels = self.generate_diff_blocks(lines1, lines2)
-                item.update({'diff_blocks': blocks, 'add_count': adds, 'del_count': dels})
-            else:
-                item['size_diff'] = self.get_size_diff(f1, f2)
-
-            self.files_data.append(item)
-
-    def _write(self):
-        payload = {
-            "files": self.files_data,
-            "meta": {
-                "old_label": self.old_label,
-                "new_label": self.new_label
-            }
-        }
-        data = json.dumps(payload, ensure_ascii=False)
-        html = HTML_SHELL.format(css=CSS_STYLES, js=JS_SCRIPT, json_data=data)
-        with open(self.output_path, 'w', encoding='utf-8') as f: f.write(html)
-        print(f"Report generated: {os.path.abspath(self.output_path)}")
-
-
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser()
-    parser.add_argument("old_file")
-    parser.add_argument("new_file")
-    parser.add_argument("-o", "--output", default="diff_report.html")
-    parser.add_argument("--old-label", dest="old_label")
-    parser.add_argument("--new-label", dest="new_label")
-    args = parser.parse_args()
-
-    if os.path.exists(args.old_file) and os.path.exists(args.new_file):
-        ArchiveComparator(
-            args.old_file,
-            args.new_file,
-            args.output,
-            old_label=args.old_label,
-            new_label=args.new_label
-        ).process()
-    else:
-        print("Files not found.")
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import base64
+import difflib
+import gzip
+import hashlib
+import os
+import pathlib
+import shutil
+import tarfile
+import time
+import zipfile
+import zlib
+import json
+from collections import defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from html import escape
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+import diff_engine
+import lang_diff
+from minhash import LSHIndex, MinHasher, jaccard
+from snbt_reader import SNBTError
+
+# Members larger than this are first probed for text with a prefix of this size
+SNIFF_BYTES = 64 * 1024
+DEFAULT_DIFF_ALGORITHM = 'difflib'
+# Suggested limits for very large files, which are then summarized with line counts instead of being diffed
+# line by line. They are opt-in (--max-diff-lines/--max-diff-bytes/--max-diff-cost) so the default report is unchanged
+MAX_DIFF_LINES = 200000
+MAX_DIFF_BYTES = 16 * 1024 * 1024
+MAX_DIFF_COST = 2000
+# Diff blocks are written as [code, content(, inline html)]; the report recomputes line numbers from the hunks
+BLOCK_CODES = {'hunk': 0, 'eq': 1, 'add': 2, 'del': 3}
+# Sharded reports pack the diffs of consecutive files into gzip shards of about this much JSON
+SHARD_BYTES = 1024 * 1024
+# A removed and an added text file count as a rename when the Jaccard similarity of their lines reaches this
+RENAME_SIMILARITY = 0.5
+# Larger files are only paired as renames when their content is identical
+MAX_RENAME_BYTES = 1024 * 1024
+# MinHash sketch of the lines of a renamed file: 8 bands of 2 rows still find ~90% of the pairs at 0.5 similarity
+RENAME_MINHASH_PERMUTATIONS = 16
+RENAME_LSH_BANDS = 8
+# Bytes read for rename detection are kept up to this total, so paired files are not decompressed again to be diffed
+RENAME_KEEP_BYTES = 256 * 1024 * 1024
+# Added and removed files show at most this many lines (their counts stay complete)
+MAX_ADDED_LINES = 2000
+# Suggested --max-inline-length: paired lines longer than this only get their common prefix and suffix matched
+MAX_INLINE_LINE_LENGTH = 2000
+
+CSS_STYLES = """
+<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/styles/github.min.css">
+<style>
+    :root {
+        --font-sans: "Inter", -apple-system, BlinkMacSystemFont, "Segoe UI", Helvetica, Arial, sans-serif;
+        --font-mono: "JetBrains Mono", "SFMono-Regular", Consolas, monospace;
+
+        --c-bg: #ffffff;
+        --c-sidebar: #f8f9fa;
+        --c-border: #e5e7eb;
+        --c-text: #1f2937;
+        --c-text-muted: #6b7280;
+
+        /* Status Colors */
+        /* Added: Green/Emerald */
+        --c-add-bg: #ecfdf5; --c-add-border: #10b98180; --c-add-text: #047857;
+        /* Modified: Amber/Orange */
+        --c-mod-bg: #fffbeb; --c-mod-border: #f59e0b80; --c-mod-text: #b45309;
+        /* Deleted: Rose/Red */
+        --c-del-bg: #fff1f2; --c-del-border: #f43f5e80; --c-del-text: #be123c;
+
+        --diff-add-bg: #ecfdf5;
+        --diff-del-bg: #fff1f2;
+        --diff-hunk-bg: #f9fafb;
+        --diff-hunk-text: #6b7280;
+    }
+
+    * { box-sizing: border-box; }
+    body { margin: 0; font-family: var(--font-sans); background: var(--c-bg); height: 100vh; display: flex; flex-direction: column; color: var(--c-text); overflow: hidden; }
+
+    /* --- Header --- */
+    header { height: 56px; background: #fff; border-bottom: 1px solid var(--c-border); display: flex; align-items: center; padding: 0 20px; flex-shrink: 0; justify-content: space-between; z-index: 10; }
+    header h1 { font-size: 15px; font-weight: 600; color: var(--c-text); display: flex; gap: 8px; align-items: center; }
+    .header-left { display: flex; align-items: center; gap: 16px; flex-wrap: wrap; }
+    .archive-meta { display: flex; gap: 8px; flex-wrap: wrap; }
+    .archive-pill { padding: 4px 12px; border: 1px solid var(--c-border); border-radius: 6px; background: var(--c-sidebar); display: flex; flex-direction: column; min-width: 180px; }
+    .archive-pill .pill-label { font-size: 11px; color: var(--c-text-muted); text-transform: uppercase; letter-spacing: 0.04em; }
+    .archive-pill .pill-value { font-size: 13px; font-weight: 600; color: var(--c-text); }
+
+    .view-toggle { 
+        display: flex; background: #f3f4f6; padding: 2px; border-radius: 6px; 
+        position: relative; border: 1px solid #e5e7eb; height: 28px;
+    }
+    .toggle-btn { 
+        border: none; background: transparent; padding: 0 12px; font-size: 12px; font-weight: 500; color: #6b7280; 
+        cursor: pointer; z-index: 2; position: relative; transition: color 0.2s; line-height: 24px;
+    }
+    .toggle-btn.active { color: #1f2937; font-weight: 600; }
+    .toggle-bg {
+        position: absolute; top: 2px; left: 2px; bottom: 2px; width: 50%;
+        background: #fff; border-radius: 4px; box-shadow: 0 1px 2px rgba(0,0,0,0.05);
+        transition: transform 0.2s cubic-bezier(0.2, 0.0, 0.2, 1); z-index: 1;
+    }
+    .view-toggle[data-active="split"] .toggle-bg { transform: translateX(100%); }
+
+    /* --- Sidebar --- */
+    .main-container { display: flex; flex: 1; overflow: hidden; }
+    .sidebar { width: 340px; background: var(--c-sidebar); border-right: 1px solid var(--c-border); display: flex; flex-direction: column; flex-shrink: 0; }
+
+    .sidebar-header { padding: 12px; border-bottom: 1px solid var(--c-border); background: #fff; display: flex; flex-direction: column; gap: 10px; }
+
+    /* Filter Bar - Legend Style */
+    .filter-bar { display: flex; gap: 8px; }
+    .filter-btn { 
+        flex: 1; font-size: 11px; padding: 4px 0; border-radius: 4px; cursor: pointer; 
+        text-align: center; font-weight: 600; border: 1px solid;
+        transition: all 0.15s;
+        display: flex; align-items: center; justify-content: center; gap: 4px;
+    }
+
+    /* Default "Glowing" State (Legend) */
+    .filter-btn[data-type="all"] { 
+        background: #fff; border-color: #e5e7eb; color: #374151; 
+    }
+    .filter-btn[data-type="added"] { 
+        background: var(--c-add-bg); border-color: var(--c-add-border); color: var(--c-add-text); 
+    }
+    .filter-btn[data-type="modified"] { 
+        background: var(--c-mod-bg); border-color: var(--c-mod-border); color: var(--c-mod-text); 
+    }
+    .filter-btn[data-type="removed"] { 
+        background: var(--c-del-bg); border-color: var(--c-del-border); color: var(--c-del-text); 
+    }
+
+    /* Active State (Filled/Pressed) */
+    .filter-btn.active { transform: translateY(1px); box-shadow: inset 0 2px 4px rgba(0,0,0,0.05); filter: brightness(0.95); }
+    .filter-btn.active[data-type="all"] { background: #f3f4f6; }
+
+    .search-box { 
+        width: 100%; padding: 6px 10px; border: 1px solid var(--c-border); border-radius: 6px; 
+        font-size: 13px; outline: none; transition: 0.2s; background: #f9fafb;
+    }
+    .search-box:focus { border-color: #d1d5db; background: #fff; }
+
+    .sidebar-controls { display: flex; align-items: center; font-size: 12px; color: var(--c-text-muted); padding: 0 2px; }
+    .chk-label { display: flex; align-items: center; gap: 6px; cursor: pointer; user-select: none; }
+    .chk-label input { margin: 0; accent-color: #374151; }
+
+    /* Tree List */
+    .tree-container { flex: 1; overflow-y: auto; padding: 4px 0; }
+    .tree-node { user-select: none; }
+
+    .node-content { 
+        display: flex; align-items: center; height: 28px; cursor: pointer; 
+        font-size: 13px; padding-right: 0; position: relative; overflow: hidden;
+    }
+    .node-content:hover { background: #e5e7eb; }
+    .node-content.active { background: #eef2ff; color: #4f46e5; }
+
+    .node-indent { display: inline-block; height: 100%; flex-shrink: 0; }
+    .node-icon { margin-right: 6px; opacity: 0.6; width: 16px; text-align: center; flex-shrink: 0; }
+    .node-name { 
+        flex: 1; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; 
+        min-width: 0; margin-right: 8px;
+    }
+
+    /* Stats Typography */
+    .node-meta { display: flex; align-items: center; margin-left: auto; flex-shrink: 0; font-family: var(--font-mono); font-size: 10px; font-weight: 500; gap: 6px; margin-right: 4px;}
+    .stat-plus { color: #10b981; }
+    .stat-mod { color: #f59e0b; }
+    .stat-minus { color: #ef4444; }
+    .stat-bin { color: #9ca3af; }
+
+    /* Right Color Bar */
+    .status-bar { width: 4px; height: 50%; margin-left: 4px; flex-shrink: 0; opacity: 0.8; }
+    .s-added .status-bar { background: var(--c-add-border); box-shadow: -4px 0 12px var(--c-add-border); }
+    .s-added { background: linear-gradient(to left, rgba(16, 185, 129, 0.08) 0%, transparent 30%); }
+    .s-mod .status-bar { background: var(--c-mod-border); box-shadow: -4px 0 12px var(--c-mod-border); }
+    .s-mod { background: linear-gradient(to left, rgba(245, 158, 11, 0.08) 0%, transparent 30%); }
+    .s-del .status-bar { background: var(--c-del-border); box-shadow: -4px 0 12px var(--c-del-border); }
+    .s-del { background: linear-gradient(to left, rgba(244, 63, 94, 0.08) 0%, transparent 30%); }
+
+    /* Content */
+    .content-area { flex: 1; background: #fff; display: flex; flex-direction: column; overflow: hidden; position: relative; }
+    .empty-state { position: absolute; top: 45%; left: 50%; transform: translate(-50%, -50%); color: var(--c-text-muted); text-align: center; pointer-events: none; }
+
+    .diff-container { display: none; flex-direction: column; height: 100%; }
+    .diff-container.active { display: flex; }
+
+    .file-header { padding: 10px 20px; border-bottom: 1px solid var(--border-color); background: #fcfcfc; display: flex; justify-content: space-between; align-items: center; }
+    .diff-scroll-area { flex: 1; overflow: auto; background: #fff; }
+
+    table.diff-table { width: 100%; border-collapse: collapse; font-family: var(--font-mono); font-size: 12px; table-layout: fixed; }
+    table.diff-table td { padding: 0 4px; vertical-align: top; line-height: 1.6; word-break: break-all; white-space: pre-wrap; }
+
+    .line-num { text-align: right; padding-right: 12px !important; color: #d1d5db; user-select: none; background-color: #fff; border-right: 1px solid #f3f4f6; width: 48px; font-size: 11px; }
+    .diff-add { background-color: var(--diff-add-bg); }
+    .diff-del { background-color: var(--diff-del-bg); }
+    .diff-hunk { background-color: var(--diff-hunk-bg); color: var(--diff-hunk-text); padding: 8px 12px !important; border-top: 1px solid #f3f4f6; border-bottom: 1px solid #f3f4f6; font-weight: 600; font-size: 11px; }
+    .view-split .line-num { border-right: none; border-left: 1px solid #f3f4f6; text-align: center; padding: 0 !important; }
+    .empty-cell { background: #fafafa; border: none; }
+    .binary-msg { margin: 80px auto; text-align: center; padding: 30px; border: 1px dashed #e5e7eb; border-radius: 8px; background: #f9fafb; }
+
+    .inline-add { background: rgba(16, 185, 129, 0.25); border-radius: 3px; }
+    .inline-del { background: rgba(244, 63, 94, 0.25); border-radius: 3px; }
+
+    .hljs { background: transparent; padding: 0; font-family: inherit; font-size: inherit; }
+</style>
+<script src="https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/highlight.min.js"></script>
+"""
+
+JS_SCRIPT = """
+<script>
+    const state = {
+        files: [], tree: {}, currentFileId: null,
+        filterType: 'all', showBinary: true, viewMode: 'inline', searchQuery: '',
+        meta: { old_label: 'Archive 1', new_label: 'Archive 2' }
+    };
+
+    const BLOCK_TYPES = ['hunk', 'eq', 'add', 'del'];
+    const shardRequests = {};
+
+    const LANG_MAP = { 'py': 'python', 'js': 'javascript', 'json': 'json', 'html': 'xml', 'css': 'css', 'java': 'java', 'c': 'c', 'cpp': 'cpp', 'h': 'c', 'rs': 'rust', 'go': 'go', 'ts': 'typescript', 'sh': 'bash', 'yaml': 'yaml', 'yml': 'yaml', 'md': 'markdown', 'xml': 'xml', 'sql': 'sql', 'toml': 'ini', 'ini': 'ini' };
+
+    document.addEventListener('DOMContentLoaded', () => {
+        const payload = document.getElementById('data-payload');
+        if (payload) {
+            const parsed = JSON.parse(payload.textContent);
+            state.files = parsed.files;
+            state.meta = parsed.meta || state.meta;
+            state.shardDir = parsed.shard_dir;
+            updateArchiveLabels();
+            buildTree();
+            calculateFolderStats(state.tree); // Pre-calc recursion
+            renderTree();
+        }
+
+        document.getElementById('searchInput').addEventListener('input', (e) => { state.searchQuery = e.target.value.toLowerCase(); renderTree(); });
+        document.querySelectorAll('.filter-btn').forEach(btn => btn.addEventListener('click', () => {
+            document.querySelectorAll('.filter-btn').forEach(b => b.classList.remove('active'));
+            btn.classList.add('active');
+            state.filterType = btn.dataset.type;
+            renderTree();
+        }));
+        document.getElementById('binaryToggle').addEventListener('change', (e) => { state.showBinary = e.target.checked; renderTree(); });
+
+        const toggleContainer = document.querySelector('.view-toggle');
+        document.querySelectorAll('.toggle-btn').forEach(btn => {
+            btn.addEventListener('click', () => {
+                document.querySelectorAll('.toggle-btn').forEach(b => b.classList.remove('active'));
+                btn.classList.add('active');
+                const mode = btn.dataset.mode;
+                state.viewMode = mode;
+                toggleContainer.dataset.active = mode;
+                renderDiff();
+            });
+        });
+    });
+
+    function updateArchiveLabels() {
+        const oldEl = document.getElementById('archiveOldLabel');
+        const newEl = document.getElementById('archiveNewLabel');
+        if (oldEl) oldEl.textContent = state.meta.old_label || '—';
+        if (newEl) newEl.textContent = state.meta.new_label || '—';
+    }
+
+    function highlightLine(code, filename) {
+        if (!code) return '';
+        const ext = filename.includes('.') ? filename.split('.').pop().toLowerCase() : '';
+        try { return (LANG_MAP[ext] && hljs.getLanguage(LANG_MAP[ext])) ? hljs.highlight(code, { language: LANG_MAP[ext] }).value : escape(code); } catch (e) { return escape(code); }
+    }
+
+    function getLineHtml(block, filename) {
+        if (block.inline_html) {
+            return block.inline_html;
+        }
+        return highlightLine(block.content, filename);
+    }
+
+    // Renamed files are listed, filtered and counted with the modified ones
+    function statusCategory(f) {
+        return f.status === 'renamed' ? 'modified' : f.status;
+    }
+
+    function buildTree() {
+        state.tree = { name: "root", children: {}, isFolder: true, path: "", expanded: true, stats: {a:0, m:0, r:0} };
+        state.files.forEach(f => {
+            let current = state.tree;
+            f.path.split('/').forEach((part, i, arr) => {
+                const isFile = i === arr.length - 1;
+                if (!current.children[part]) {
+                    current.children[part] = { 
+                        name: part, isFolder: !isFile, children: {}, expanded: false, fileData: isFile ? f : null, stats: {a:0, m:0, r:0}
+                    };
+                }
+                current = current.children[part];
+            });
+        });
+    }
+
+    // Recursive Stats Calculation
+    function calculateFolderStats(node) {
+        if (!node.isFolder) {
+            // Return 1 for the specific status
+            return {
+                a: node.fileData.status === 'added' ? 1 : 0,
+                m: statusCategory(node.fileData) === 'modified' ? 1 : 0,
+                r: node.fileData.status === 'removed' ? 1 : 0
+            };
+        }
+
+        let total = { a: 0, m: 0, r: 0 };
+        Object.values(node.children).forEach(child => {
+            const s = calculateFolderStats(child);
+            total.a += s.a;
+            total.m += s.m;
+            total.r += s.r;
+        });
+        node.stats = total;
+        return total;
+    }
+
+    function toggleNode(node) {
+        if (state.searchQuery) return;
+        const startState = !node.expanded;
+        node.expanded = startState;
+
+        if (startState) {
+            let current = node;
+            while (true) {
+                const keys = Object.keys(current.children);
+                if (keys.length === 1) {
+                    const child = current.children[keys[0]];
+                    if (child.isFolder) {
+                        child.expanded = true;
+                        current = child;
+                        continue;
+                    }
+                }
+                break; 
+            }
+        }
+        renderTree();
+    }
+
+    function renderTree() {
+        const container = document.getElementById('treeContainer');
+        container.innerHTML = '';
+
+        const traverse = (node, depth) => {
+            if (!node.isFolder) {
+                const f = node.fileData;
+                if (state.filterType !== 'all' && statusCategory(f) !== state.filterType) return null;
+                if (!state.showBinary && f.is_binary) return null;
+                if (state.searchQuery && !f.path.toLowerCase().includes(state.searchQuery)
+                    && !(f.old_path && f.old_path.toLowerCase().includes(state.searchQuery))) return null;
+                return buildFileEl(node, depth);
+            }
+
+            const childKeys = Object.keys(node.children);
+            const folders = childKeys.filter(k => node.children[k].isFolder).sort();
+            const files = childKeys.filter(k => !node.children[k].isFolder).sort();
+
+            const childEls = [...folders, ...files].map(k => traverse(node.children[k], depth + 1)).filter(Boolean);
+            if (childEls.length === 0) return null;
+
+            const isExpanded = state.searchQuery ? true : node.expanded;
+            return buildFolderEl(node, depth, childEls, isExpanded);
+        };
+
+        const rootKeys = Object.keys(state.tree.children);
+        const rFolders = rootKeys.filter(k => state.tree.children[k].isFolder).sort();
+        const rFiles = rootKeys.filter(k => !state.tree.children[k].isFolder).sort();
+
+        [...rFolders, ...rFiles].forEach(k => {
+            const el = traverse(state.tree.children[k], 0);
+            if (el) container.appendChild(el);
+        });
+    }
+
+    function buildFileEl(node, depth) {
+        const f = node.fileData;
+        const div = document.createElement('div');
+        div.className = 'tree-node';
+
+        let statusClass = '';
+        if (f.status === 'added') statusClass = 's-added';
+        else if (statusCategory(f) === 'modified') statusClass = 's-mod';
+        else if (f.status === 'removed') statusClass = 's-del';
+
+        let statsHtml = f.status === 'renamed' ? `<span class="stat-mod" title="${escape(f.old_path)}">R</span>` : '';
+        if (!f.is_binary && (f.add_count > 0 || f.del_count > 0)) {
+            if(f.add_count) statsHtml += `<span class="stat-plus">+${f.add_count}</span>`;
+            if(f.del_count) statsHtml += `<span class="stat-minus">-${f.del_count}</span>`;
+        } else if (f.is_binary && f.size_diff) {
+            statsHtml = `<span class="stat-bin">${f.size_diff}</span>`;
+        }
+
+        div.innerHTML = `
+            <div class="node-content ${statusClass} ${state.currentFileId === f.id ? 'active' : ''}" onclick="selectFile('${f.id}')">
+                <span class="node-indent" style="width:${depth*16}px"></span>
+                <span class="node-icon">${f.is_binary?'📦':'📄'}</span>
+                <span class="node-name">${node.name}</span>
+                <div class="node-meta">${statsHtml}</div>
+                <div class="status-bar"></div>
+            </div>`;
+        return div;
+    }
+
+    function buildFolderEl(node, depth, children, expanded) {
+        const div = document.createElement('div');
+        div.className = 'tree-node';
+        const content = document.createElement('div');
+        content.className = 'node-content';
+        content.onclick = () => toggleNode(node);
+
+        // Folder Stats Logic: Only show if NOT expanded
+        let statsHtml = '';
+        if (!expanded && node.stats && (node.stats.a + node.stats.m + node.stats.r > 0)) {
+            if(node.stats.a) statsHtml += `<span class="stat-plus">+${node.stats.a}</span>`;
+            if(node.stats.m) statsHtml += `<span class="stat-mod">~${node.stats.m}</span>`;
+            if(node.stats.r) statsHtml += `<span class="stat-minus">-${node.stats.r}</span>`;
+        }
+
+        content.innerHTML = `
+            <span class="node-indent" style="width:${depth*16}px"></span>
+            <span class="node-icon">${expanded?'📂':'📁'}</span> 
+            <span class="node-name" style="font-weight:600">${node.name}</span>
+            <div class="node-meta">${statsHtml}</div>
+            <div class="status-bar" style="background:transparent"></div>`;
+
+        div.appendChild(content);
+        if(expanded) {
+            const sub = document.createElement('div');
+            children.forEach(c => sub.appendChild(c));
+            div.appendChild(sub);
+        }
+        return div;
+    }
+
+    // Blocks arrive as [code, content, inline html?]; line numbers are recomputed from the hunk headers
+    // (summaries and structural diffs have none)
+    function decodeBlocks(rows) {
+        let oldLine = 0, newLine = 0, numbered = true;
+        return rows.map(([code, content, inline]) => {
+            const b = { type: BLOCK_TYPES[code], content };
+            if (inline !== undefined) b.inline_html = inline;
+            if (code === 0) {
+                const m = /^@@ -(\d+)(?:,\d+)? \+(\d+)/.exec(content);
+                numbered = m !== null;
+                if (m) { oldLine = parseInt(m[1]) - 1; newLine = parseInt(m[2]) - 1; }
+            } else if (numbered) {
+                if (code !== 2) b.old_lineno = ++oldLine;
+                if (code !== 3) b.new_lineno = ++newLine;
+            }
+            return b;
+        });
+    }
+
+    // Called by each shard script with its gzip-compressed, base64-encoded {file id: blocks} map
+    window.loadDiffShard = async (index, data) => {
+        const request = shardRequests[index];
+        try {
+            const bytes = Uint8Array.from(atob(data), c => c.charCodeAt(0));
+            const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+            const shard = JSON.parse(await new Response(stream).text());
+            state.files.forEach(f => { if (f.shard === index) f.diff_blocks = decodeBlocks(shard[f.id] || []); });
+            request.resolve();
+        } catch (e) {
+            delete shardRequests[index];
+            request.reject(e);
+        }
+    };
+
+    function loadShard(index) {
+        if (!shardRequests[index]) {
+            const request = {};
+            request.promise = new Promise((resolve, reject) => { request.resolve = resolve; request.reject = reject; });
+            shardRequests[index] = request;
+            const script = document.createElement('script');
+            script.src = `${state.shardDir}/shard_${index}.js`;
+            script.onerror = () => { delete shardRequests[index]; request.reject(new Error(script.src)); };
+            document.head.appendChild(script);
+        }
+        return shardRequests[index].promise;
+    }
+
+    function ensureBlocks(file) {
+        if (file.diff_blocks) return Promise.resolve();
+        if (file.shard === undefined) {
+            file.diff_blocks = decodeBlocks(file.blocks || []);
+            delete file.blocks;
+            return Promise.resolve();
+        }
+        return loadShard(file.shard);
+    }
+
+    window.selectFile = (id) => {
+        state.currentFileId = id;
+        const file = state.files.find(f => f.id === id);
+        if (!file) return;
+        const ready = ensureBlocks(file);
+        renderDiff();
+        ready.then(() => { if (state.currentFileId === id) renderDiff(); })
+             .catch(() => { file.loadError = true; if (state.currentFileId === id) renderDiff(); });
+    };
+
+    function renderDiff() {
+        const file = state.files.find(f => f.id === state.currentFileId);
+        if (!file) return;
+
+        document.getElementById('emptyState').style.display = 'none';
+        const container = document.getElementById('diffContainer');
+        container.className = 'diff-container active';
+
+        let html = `<div class="file-header">
+            <h2>${file.name}</h2>
+            <div class="file-path">${file.old_path ? file.old_path + ' → ' : ''}${file.path}</div>
+        </div><div class="diff-scroll-area">`;
+
+        if (file.is_binary) {
+            html += `<div class="binary-msg">
+                <div style="font-size:32px; margin-bottom:16px">📊</div>
+                <div style="font-weight:600; font-size:16px">二进制文件 (${file.status})</div>
+                <br><div style="color:#57606a">${file.size_diff ? '大小变化: ' + file.size_diff : ''}</div>
+            </div>`;
+        } else if (file.loadError) {
+            html += `<div class="binary-msg">差异数据加载失败，请确认 ${escape(state.shardDir)} 目录与报告位于同一位置</div>`;
+        } else if (!file.diff_blocks) {
+            html += `<div class="binary-msg">正在加载差异…</div>`;
+        } else if (file.diff_blocks.length === 0) {
+            html += `<div class="binary-msg">${file.status === 'renamed' ? '文件已移动，内容一致' : '文件内容一致'}</div>`;
+        } else {
+            html += state.viewMode === 'split' ? renderSplit(file) : renderInline(file);
+        }
+        container.innerHTML = html + '</div>';
+    }
+
+    function renderInline(file) {
+        let html = `<table class="diff-table view-inline"><colgroup><col width="48"><col width="48"><col></colgroup><tbody>`;
+        file.diff_blocks.forEach(b => {
+            if (b.type === 'hunk') {
+                html += `<tr><td class="diff-hunk" colspan="3">${escape(b.content)}</td></tr>`;
+            } else {
+                const cls = b.type === 'add' ? 'diff-add' : (b.type === 'del' ? 'diff-del' : '');
+                const codeHtml = getLineHtml(b, file.name);
+                html += `<tr class="${cls}">
+                    <td class="line-num">${b.old_lineno || ''}</td>
+                    <td class="line-num">${b.new_lineno || ''}</td>
+                    <td>${codeHtml}</td>
+                </tr>`;
+            }
+        });
+        return html + '</tbody></table>';
+    }
+
+    function renderSplit(file) {
+        let html = `<table class="diff-table view-split"><colgroup><col width="50%"><col width="48"><col width="48"><col width="50%"></colgroup><tbody>`;
+        file.diff_blocks.forEach(b => {
+            if (b.type === 'hunk') {
+                html += `<tr><td class="diff-hunk" colspan="4" style="text-align:center">${escape(b.content)}</td></tr>`;
+            } else {
+                const code = getLineHtml(b, file.name);
+                if (b.type === 'add') {
+                    html += `<tr class="diff-add"><td class="empty-cell"></td><td class="line-num"></td><td class="line-num">${b.new_lineno}</td><td>${code}</td></tr>`;
+                } else if (b.type === 'del') {
+                    html += `<tr class="diff-del"><td>${code}</td><td class="line-num">${b.old_lineno}</td><td class="line-num"></td><td class="empty-cell"></td></tr>`;
+                } else {
+                    html += `<tr><td>${code}</td><td class="line-num">${b.old_lineno}</td><td class="line-num">${b.new_lineno}</td><td>${code}</td></tr>`;
+                }
+            }
+        });
+        return html + '</tbody></table>';
+    }
+
+    function escape(text) {
+        return text ? text.replace(/&/g, "&amp;").replace(/</g, "&lt;").replace(/>/g, "&gt;") : '';
+    }
+</script>
+"""
+
+HTML_SHELL = """
+<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Diff Report</title>
+    {css}
+</head>
+<body>
+    <header>
+        <div class="header-left">
+            <h1>📂 档案对比分析</h1>
+            <div class="archive-meta">
+                <div class="archive-pill">
+                    <span class="pill-label">旧版本</span>
+                    <span class="pill-value" id="archiveOldLabel">—</span>
+                </div>
+                <div class="archive-pill">
+                    <span class="pill-label">新版本</span>
+                    <span class="pill-value" id="archiveNewLabel">—</span>
+                </div>
+            </div>
+        </div>
+        <div class="header-controls">
+             <div class="view-toggle" data-active="inline">
+                <div class="toggle-bg"></div>
+                <button class="toggle-btn active" data-mode="inline">Inline</button>
+                <button class="toggle-btn" data-mode="split">Split</button>
+             </div>
+        </div>
+    </header>
+    <div class="main-container">
+        <aside class="sidebar">
+            <div class="sidebar-header">
+                <div class="filter-bar">
+                    <div class="filter-btn active" data-type="all">ALL</div>
+                    <div class="filter-btn" data-type="added">NEW</div>
+                    <div class="filter-btn" data-type="modified">MOD</div>
+                    <div class="filter-btn" data-type="removed">DEL</div>
+                </div>
+                <input type="text" id="searchInput" class="search-box" placeholder="Search files...">
+                <div class="sidebar-controls">
+                     <label class="chk-label">
+                        <input type="checkbox" id="binaryToggle" checked>
+                        <span>显示二进制文件</span>
+                     </label>
+                </div>
+            </div>
+            <div id="treeContainer" class="tree-container"></div>
+        </aside>
+        <main class="content-area">
+            <div id="emptyState" class="empty-state">
+                <div style="font-size:48px;margin-bottom:16px;opacity:0.2">👈</div>
+                <div>Select a file to view changes</div>
+            </div>
+            <div id="diffContainer" class="diff-container"></div>
+        </main>
+    </div>
+    <script type="application/json" id="data-payload">{json_data}</script>
+    {js}
+</body>
+</html>
+"""
+
+
+class DirectorySide:
+    """
+    One side of a comparison: a tree of files addressed by posix relative paths.
+    Anything with files(), read_bytes(rel) and size(rel) can be compared, e.g. the open
+    pack archive and the source tree that update_checker.py already holds. Sides that also
+    provide crc32(rel) let identical entries be skipped without reading them.
+    """
+
+    def __init__(self, root):
+        self.root = pathlib.Path(root)
+        self.bytes_read = 0
+
+    def files(self):
+        return (p.relative_to(self.root).as_posix() for p in self.root.rglob('*') if p.is_file())
+
+    def read_bytes(self, rel):
+        data = (self.root / rel).read_bytes()
+        self.bytes_read += len(data)
+        return data
+
+    def size(self, rel):
+        return (self.root / rel).stat().st_size
+
+
+class RenameReads:
+    """Members read while detecting renames, kept (within RENAME_KEEP_BYTES) for the diff of the pairs found."""
+
+    def __init__(self):
+        self.kept = {}
+        self.kept_bytes = 0
+
+    def read(self, side, rel, read=None):
+        data = self.kept.get((id(side), rel))
+        if data is None:
+            data = read(side, rel) if read else side.read_bytes(rel)
+            if data is not None and self.kept_bytes + len(data) <= RENAME_KEEP_BYTES:
+                self.kept[(id(side), rel)] = data
+                self.kept_bytes += len(data)
+        return data
+
+    def take(self, side, rel):
+        """Hands over the kept bytes of a member (None when they were not kept) and forgets them."""
+        data = self.kept.pop((id(side), rel), None)
+        if data is not None: self.kept_bytes -= len(data)
+        return data
+
+    def clear(self):
+        self.kept.clear()
+        self.kept_bytes = 0
+
+
+def _member_path(name):
+    return name.lstrip('/').removeprefix('./')
+
+
+class ZipSide:
+    """A zip/jar read in place: members come from the central directory, with their stored size and CRC32."""
+
+    def __init__(self, path):
+        self.zip = zipfile.ZipFile(path, 'r')
+        self.members = {_member_path(info.filename): info for info in self.zip.infolist() if not info.is_dir()}
+        self.bytes_read = 0
+
+    def close(self):
+        self.zip.close()
+
+    def files(self):
+        return iter(self.members)
+
+    def size(self, rel):
+        return self.members[rel].file_size
+
+    def crc32(self, rel):
+        return self.members[rel].CRC
+
+    def open(self, rel):
+        return self.zip.open(self.members[rel])
+
+    def read_bytes(self, rel):
+        data = self.zip.read(self.members[rel])
+        self.bytes_read += len(data)
+        return data
+
+
+class TarSide:
+    """
+    A tar(.gz) read in place. Tar headers carry no checksum of the content, so equal-sized members have to be read;
+    order(rel) lets the comparator read them in archive order, keeping a compressed stream to a single forward pass.
+    """
+
+    def __init__(self, path):
+        self.tar = tarfile.open(path, 'r:*')
+        self.members = {}
+        for member in self.tar.getmembers():
+            if member.isfile(): self.members[_member_path(member.name)] = member
+        self.offsets = {rel: member.offset for rel, member in self.members.items()}
+        self.bytes_read = 0
+
+    def close(self):
+        self.tar.close()
+
+    def files(self):
+        return iter(self.members)
+
+    def size(self, rel):
+        return self.members[rel].size
+
+    def order(self, rel):
+        return self.offsets[rel]
+
+    def open(self, rel):
+        return self.tar.extractfile(self.members[rel])
+
+    def read_bytes(self, rel):
+        with self.tar.extractfile(self.members[rel]) as f:
+            data = f.read()
+        self.bytes_read += len(data)
+        return data
+
+
+class EmptySide:
+    """Stands in for an archive that cannot be opened, which the report shows as empty."""
+    bytes_read = 0
+
+    def files(self):
+        return iter(())
+
+    def close(self):
+        pass
+
+
+def encode_blocks(blocks):
+    return [[BLOCK_CODES[b['type']], b['content'], b['inline_html']] if 'inline_html' in b
+            else [BLOCK_CODES[b['type']], b['content']] for b in blocks]
+
+
+def _dumps(value):
+    # "</" is escaped so that file contents cannot close the payload's script tag
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+
+
+class ReportWriter:
+    """
+    Writes the report file by file, so only the file index and the diff being written are held in memory.
+    A single-file report streams each file's blocks into the payload as it arrives; a sharded report writes
+    the blocks of consecutive files into gzip shards in <output>_files/ and the index page at the end.
+    """
+
+    def __init__(self, output_path, old_label, new_label, sharded=False):
+        self.output_path = output_path
+        self.meta = {"old_label": old_label, "new_label": new_label}
+        self.files = []
+        self.shard_bytes = 0
+        self.out = None
+        if sharded:
+            self.shard_dir = pathlib.Path(output_path).with_name(pathlib.Path(output_path).stem + '_files')
+            if self.shard_dir.exists(): shutil.rmtree(self.shard_dir)
+            self.shard_dir.mkdir(parents=True)
+            self.shard, self.shard_size, self.shard_count = [], 0, 0
+        else:
+            self.shard_dir = None
+            head, self.tail = HTML_SHELL.format(css=CSS_STYLES, js=JS_SCRIPT, json_data='\0').split('\0')
+            self.out = open(output_path, 'w', encoding='utf-8')
+            self.out.write(head + '{"files":[')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.finish()
+        elif self.out is not None:
+            self.out.close()
+        return False
+
+    def add(self, item, blocks=None):
+        """Writes one file: item is its index entry, blocks its diff blocks (None or empty for none)."""
+        self.files.append(item)
+        if self.shard_dir is None:
+            entry = dict(item, blocks=encode_blocks(blocks)) if blocks else item
+            self.out.write((',' if len(self.files) > 1 else '') + _dumps(entry))
+            return
+        if not blocks: return
+        entry = f"{json.dumps(item['id'])}:{json.dumps(encode_blocks(blocks), ensure_ascii=False, separators=(',', ':'))}"
+        if self.shard and self.shard_size + len(entry) > SHARD_BYTES: self._flush_shard()
+        item['shard'] = self.shard_count
+        self.shard.append(entry)
+        self.shard_size += len(entry)
+
+    def _flush_shard(self):
+        compressed = gzip.compress(('{' + ','.join(self.shard) + '}').encode('utf-8'), compresslevel=6, mtime=0)
+        path = self.shard_dir / f"shard_{self.shard_count}.js"
+        path.write_text(f'loadDiffShard({self.shard_count},"{base64.b64encode(compressed).decode("ascii")}");\n', encoding='ascii')
+        self.shard_bytes += path.stat().st_size
+        self.shard_count += 1
+        self.shard, self.shard_size = [], 0
+
+    def finish(self):
+        if self.shard_dir is None:
+            self.out.write('],"meta":' + _dumps(self.meta) + '}' + self.tail)
+            self.out.close()
+        else:
+            if self.shard: self._flush_shard()
+            print(f"Wrote {self.shard_count} diff shards to {self.shard_dir}")
+            data = _dumps({"files": self.files, "meta": self.meta, "shard_dir": self.shard_dir.name})
+            with open(self.output_path, 'w', encoding='utf-8') as f:
+                f.write(HTML_SHELL.format(css=CSS_STYLES, js=JS_SCRIPT, json_data=data))
+        size = os.path.getsize(self.output_path) + self.shard_bytes
+        print(f"Report generated: {os.path.abspath(self.output_path)} ({size / 1024 / 1024:.1f} MB)")
+
+
+def open_side(path):
+    try:
+        if path.endswith(('.tar.gz', '.tar')): return TarSide(path)
+        return ZipSide(path)
+    except Exception:
+        return EmptySide()
+
+
+class ArchiveComparator:
+    def __init__(self, archive1=None, archive2=None, output_path="diff_report.html", old_label=None, new_label=None, jobs=1,
+                 diff_algorithm=DEFAULT_DIFF_ALGORITHM, max_diff_lines=None, max_diff_bytes=None,
+                 max_diff_cost=None, max_inline_length=None, sharded=False,
+                 semantic=False, max_added_lines=MAX_ADDED_LINES, detect_renames=True,
+                 rename_similarity=RENAME_SIMILARITY):
+        self.archive1 = archive1
+        self.archive2 = archive2
+        self.output_path = output_path
+        self.jobs = jobs
+        self.sharded = sharded
+        self.semantic = semantic
+        self.max_added_lines = max_added_lines
+        self.detect_renames = detect_renames
+        self.rename_similarity = rename_similarity
+        self.diff_algorithm = diff_algorithm
+        self.max_diff_lines = max_diff_lines
+        self.max_diff_bytes = max_diff_bytes
+        self.max_diff_cost = max_diff_cost
+        self.max_inline_length = max_inline_length
+        self.files_data = []
+        self.old_label = old_label or (pathlib.Path(archive1).name if archive1 else "old")
+        self.new_label = new_label or (pathlib.Path(archive2).name if archive2 else "new")
+
+    def _try_convert_binary_to_text(self, data, original_ext):
+        return None, False
+
+    def _read_content(self, side, rel, data=None):
+        try:
+            if data is None: data = side.read_bytes(rel)
+        except Exception:
+            return None, False
+        try:
+            return data.decode('utf-8').splitlines(), True
+        except UnicodeDecodeError:
+            pass
+
+        converted, success = self._try_convert_binary_to_text(data, pathlib.PurePosixPath(rel).suffix.lower())
+        return (converted.splitlines(), True) if success else (None, False)
+
+    def get_size_diff(self, s1, s2):
+        diff = s2 - s1
+        if diff == 0: return "0 B"
+        abs_diff = abs(diff)
+        unit = "B"
+        for u in ["B", "KB", "MB"]:
+            if abs_diff < 1024: break
+            abs_diff /= 1024
+            unit = u
+        return f"{'+' if diff > 0 else ''}{abs_diff:.1f} {unit}"
+
+    def build_inline_diff(self, old_text, new_text):
+        if self.max_inline_length is not None and max(len(old_text), len(new_text)) > self.max_inline_length:
+            # Character matching is quadratic on long, very different lines (minified JSON): only trim the common ends
+            prefix = len(os.path.commonprefix([old_text, new_text]))
+            suffix = len(os.path.commonprefix([old_text[prefix:][::-1], new_text[prefix:][::-1]]))
+            opcodes = [('equal', 0, prefix, 0, prefix),
+                       ('replace', prefix, len(old_text) - suffix, prefix, len(new_text) - suffix),
+                       ('equal', len(old_text) - suffix, len(old_text), len(new_text) - suffix, len(new_text))]
+        else:
+            opcodes = difflib.SequenceMatcher(None, old_text, new_text).get_opcodes()
+        old_parts, new_parts = [], []
+        for tag, i1, i2, j1, j2 in opcodes:
+            old_seg = escape(old_text[i1:i2])
+            new_seg = escape(new_text[j1:j2])
+            if tag == 'equal':
+                if old_seg: old_parts.append(old_seg)
+                if new_seg: new_parts.append(new_seg)
+            elif tag == 'delete':
+                if old_seg: old_parts.append(f"<span class='inline-del'>{old_seg}</span>")
+            elif tag == 'insert':
+                if new_seg: new_parts.append(f"<span class='inline-add'>{new_seg}</span>")
+            elif tag == 'replace':
+                if old_seg: old_parts.append(f"<span class='inline-del'>{old_seg}</span>")
+                if new_seg: new_parts.append(f"<span class='inline-add'>{new_seg}</span>")
+        return ''.join(old_parts) or escape(old_text), ''.join(new_parts) or escape(new_text)
+
+    def _summary_blocks(self, lines1, lines2, reason):
+        adds, dels = diff_engine.count_changes(lines1, lines2)
+        return [{'type': 'hunk', 'content': f"@@ Diff skipped: {reason} (+{adds} -{dels} lines by content) @@"}], adds, dels
+
+    def semantic_diff_blocks(self, rel, lines1, lines2):
+        """Blocks listing changed values by key path, or None when a side does not parse as JSON/SNBT."""
+        try:
+            changes = lang_diff.diff_structured(rel, '\n'.join(lines1).encode('utf-8'), '\n'.join(lines2).encode('utf-8'))
+        except (SNBTError, ValueError, RecursionError):
+            return None
+        show = lambda value: json.dumps(value, ensure_ascii=False)
+        counts = {status: sum(1 for c in changes if c[0] == status) for status in ('changed', 'added', 'removed')}
+        header = (f"@@ Structural diff: {counts['changed']} changed, {counts['added']} added, {counts['removed']} removed values @@"
+                  if changes else "@@ Structural diff: no value changed (only formatting or order) @@")
+        blocks = [{'type': 'hunk', 'content': header}]
+        for status, path, old, new in changes:
+            old_entry = {'type': 'del', 'content': f"{path}: {show(old)}"}
+            new_entry = {'type': 'add', 'content': f"{path}: {show(new)}"}
+            if status == 'changed':
+                old_entry['inline_html'], new_entry['inline_html'] = self.build_inline_diff(old_entry['content'], new_entry['content'])
+            if status != 'added': blocks.append(old_entry)
+            if status != 'removed': blocks.append(new_entry)
+        return blocks, counts['changed'] + counts['added'], counts['changed'] + counts['removed']
+
+    def generate_diff_blocks(self, lines1, lines2, rel=None):
+        if (not lines1 or not lines2) and len(lines1) + len(lines2) > self.max_added_lines:
+            shown = self.max_added_lines
+            blocks, _, _ = self.generate_diff_blocks(lines1[:shown], lines2[:shown], rel)
+            blocks.append({'type': 'hunk', 'content': f"@@ {len(lines1) + len(lines2) - shown} more lines not shown @@"})
+            return blocks, len(lines2), len(lines1)
+        if self.semantic and rel is not None and rel.endswith(('.json', '.snbt')) and lines1 and lines2:
+            result = self.semantic_diff_blocks(rel, lines1, lines2)
+            if result is not None: return result
+
+        line_count = len(lines1) + len(lines2)
+        if self.max_diff_lines is not None and line_count > self.max_diff_lines:
+            return self._summary_blocks(lines1, lines2, f"{line_count} lines exceed the limit of {self.max_diff_lines}")
+        byte_count = sum(map(len, lines1)) + sum(map(len, lines2))
+        if self.max_diff_bytes is not None and byte_count > self.max_diff_bytes:
+            return self._summary_blocks(lines1, lines2, f"{byte_count} characters exceed the limit of {self.max_diff_bytes}")
+
+        blocks = []
+        add_count, del_count = 0, 0
+
+        diff_gen = diff_engine.unified_diff(lines1, lines2, n=3, algorithm=self.diff_algorithm, max_cost=self.max_diff_cost)
+        try:
+            next(diff_gen);
+            next(diff_gen)
+        except StopIteration:
+            pass
+        except diff_engine.DiffTooCostly as e:
+            return self._summary_blocks(lines1, lines2, str(e))
+
+        old_line, new_line = 0, 0
+        pending_deletions = deque()
+        for line in diff_gen:
+            if line.startswith('@@'):
+                pending_deletions.clear()
+                blocks.append({'type': 'hunk', 'content': line})
+                try:
+                    parts = line.split(' ')
+                    old_line = int(parts[1].split(',')[0].replace('-', '')) - 1
+                    new_line = int(parts[2].split(',')[0].replace('+', '')) - 1
+                except:
+                    pass
+            elif line.startswith('+'):
+                new_line += 1;
+                add_count += 1
+                entry = {'type': 'add', 'content': line[1:], 'new_lineno': new_line}
+                if pending_deletions:
+                    partner = pending_deletions.popleft()
+                    old_html, new_html = self.build_inline_diff(partner['content'], entry['content'])
+                    partner['inline_html'] = old_html
+                    entry['inline_html'] = new_html
+                blocks.append(entry)
+            elif line.startswith('-'):
+                old_line += 1;
+                del_count += 1
+                entry = {'type': 'del', 'content': line[1:], 'old_lineno': old_line}
+                blocks.append(entry)
+                pending_deletions.append(entry)
+            else:
+                pending_deletions.clear()
+                old_line += 1;
+                new_line += 1
+                blocks.append({'type': 'eq', 'content': line[1:], 'old_lineno': old_line, 'new_lineno': new_line})
+        return blocks, add_count, del_count
+
+    def process(self):
+        print(f"Processing archives...")
+        start = time.perf_counter()
+        old_side, new_side = open_side(self.archive1), open_side(self.archive2)
+        try:
+            self.compare_sides(old_side, new_side)
+        finally:
+            old_side.close()
+            new_side.close()
+        self.report_cost(old_side, new_side, time.perf_counter() - start)
+
+    def report_cost(self, old_side, new_side, elapsed):
+        """Prints time and bytes decompressed; members are read in memory, so no temporary disk space is used."""
+        extracted = sum(side.size(rel) for side in (old_side, new_side) for rel in side.files())
+        skipped, common = self.stats['skipped_by_crc'], self.stats['common']
+        print(f"Compared in {elapsed:.2f}s: {skipped} of {common} common members skipped by CRC32/size, "
+              f"{(old_side.bytes_read + new_side.bytes_read) / 1024 / 1024:.1f} MB decompressed, "
+              f"0 MB temporary disk (extracting both archives would write {extracted / 1024 / 1024:.1f} MB)"
+              + (f", peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB." if resource else "."))
+
+    def report(self, old_side, new_side, paths=None):
+        """Writes the report for two already opened sides, limited to `paths` (posix relative) when given."""
+        self.compare_sides(old_side, new_side, paths)
+
+    def _extract(self, arc, dest):
+        """Legacy full extraction, kept for comparing the cost of reading the archives in place."""
+        try:
+            if arc.endswith(('.zip', '.jar')):
+                with zipfile.ZipFile(arc, 'r') as z:
+                    z.extractall(dest)
+            elif arc.endswith(('.tar.gz', '.tar')):
+                with tarfile.open(arc, 'r:*') as t:
+                    t.extractall(dest)
+            else:
+                with zipfile.ZipFile(arc, 'r') as z:
+                    z.extractall(dest)
+        except Exception:
+            pass
+
+    def _compare(self, d1, d2):
+        self.compare_sides(DirectorySide(d1), DirectorySide(d2))
+
+    def _has_binary_prefix(self, side, rel):
+        """
+        Decides from the first bytes that a large member is not UTF-8 text, so changed binaries such as mod jars
+        are never fully decompressed. Only applies while _try_convert_binary_to_text is not overridden.
+        """
+        if not self._sniffs(side, rel): return False
+        try:
+            with side.open(rel) as f:
+                prefix = f.read(SNIFF_BYTES)
+        except Exception:
+            return False
+        side.bytes_read += len(prefix)
+        return self._binary_prefix(prefix)
+
+    def _sniffs(self, side, rel):
+        return (type(self)._try_convert_binary_to_text is ArchiveComparator._try_convert_binary_to_text
+                and hasattr(side, 'open') and side.size(rel) > SNIFF_BYTES)
+
+    @staticmethod
+    def _binary_prefix(prefix):
+        try:
+            prefix.decode('utf-8')
+        except UnicodeDecodeError as e:
+            # A multi-byte character cut off by the prefix boundary is not evidence of binary content
+            return e.reason != 'unexpected end of data'
+        return False
+
+    def _read_unless_binary(self, side, rel):
+        """The bytes of a member, or None when its first bytes are not text; a text member is streamed only once."""
+        if not self._sniffs(side, rel): return side.read_bytes(rel)
+        with side.open(rel) as f:
+            data = f.read(SNIFF_BYTES)
+            binary = self._binary_prefix(data)
+            if not binary: data += f.read()
+        side.bytes_read += len(data)
+        return None if binary else data
+
+    def _same_without_reading(self, old_side, new_side, rel):
+        """True/False when size and stored CRC32 decide, None when the content has to be read."""
+        if old_side.size(rel) != new_side.size(rel): return False
+        if hasattr(old_side, 'crc32') and hasattr(new_side, 'crc32'):
+            return old_side.crc32(rel) == new_side.crc32(rel)
+        return None
+
+    def compare_sides(self, old_side, new_side, paths=None):
+        files1, files2 = set(old_side.files()), set(new_side.files())
+        if paths is not None:
+            paths = set(paths)
+            files1, files2 = files1 & paths, files2 & paths
+
+        ordered = sorted(list(files1 | files2))
+        ids = {rel: f"f{i}" for i, rel in enumerate(ordered)}
+        # Tar members are visited in archive order so a compressed stream is only read forward
+        for side in (new_side, old_side):
+            if hasattr(side, 'order'):
+                ordered.sort(key=lambda rel, side=side: (rel not in side.members, side.order(rel) if rel in side.members else 0))
+                break
+
+        self.stats = {'common': 0, 'skipped_by_crc': 0, 'renamed': 0, 'renamed_exact': 0}
+        reads = RenameReads()
+        renames = (self._detect_renames(old_side, new_side, files1 - files2, files2 - files1, reads)
+                   if self.detect_renames else {})
+        pending = deque()
+        # Archives are read in this process; only the CPU-bound diffing of text files goes to the pool
+        executor = ProcessPoolExecutor(max_workers=self.jobs) if self.jobs > 1 else None
+        # Results are written in submission order, so the report is identical to serial mode; the window bounds
+        # how many diffs (and their input lines) are held at once
+        window = 2 * self.jobs if executor is not None else 0
+        try:
+            with ReportWriter(self.output_path, self.old_label, self.new_label, self.sharded) as writer:
+                for item, lines1, lines2 in self._iter_changed(old_side, new_side, files1, files2, ordered, ids, renames, reads):
+                    if item['is_binary'] or lines1 is None:
+                        result = None
+                    elif executor is not None:
+                        result = executor.submit(self.generate_diff_blocks, lines1, lines2, item['path'])
+                    else:
+                        result = self.generate_diff_blocks(lines1, lines2, item['path'])
+                    pending.append((item, result))
+                    self._write_finished(writer, pending, window)
+                self._write_finished(writer, pending, 0)
+        finally:
+            if executor is not None: executor.shutdown(cancel_futures=True)
+        self.files_data = writer.files
+
+    def _content_key(self, side, rel, reads):
+        """(size, CRC32) of a file: from the zip directory when available, else computed from its bytes."""
+        try:
+            crc = side.crc32(rel) if hasattr(side, 'crc32') else zlib.crc32(reads.read(side, rel))
+        except Exception:
+            return None
+        return side.size(rel), crc
+
+    def _content_digest(self, side, rel, reads):
+        """SHA-256 of a file's bytes, to confirm a (size, CRC32) match before calling it identical."""
+        try:
+            return hashlib.sha256(reads.read(side, rel)).digest()
+        except Exception:
+            return None
+
+    def _rename_sketch(self, side, rel, reads):
+        """The set of line hashes of a text file, or None when it is too large, binary or empty."""
+        if side.size(rel) > MAX_RENAME_BYTES: return None
+        try:
+            data = reads.read(side, rel, self._read_unless_binary)
+        except Exception:
+            return None
+        if data is None: return None
+        lines, is_text = self._read_content(side, rel, data)
+        if not is_text: return None
+        return {zlib.crc32(line.strip().encode('utf-8')) for line in lines if line.strip()} or None
+
+    def _detect_renames(self, old_side, new_side, removed, added, reads=None):
+        """
+        Pairs removed with added files -> {new path: (old path, exact)}. Identical files are found through an index
+        of (size, CRC32) keys, computed only for sizes present on both sides, and confirmed by SHA-256 of the
+        candidate pair; the remaining text files are paired through a MinHash sketch of their lines when the
+        Jaccard similarity reaches self.rename_similarity. `reads` keeps the bytes of the similar pairs found.
+        """
+        reads = reads if reads is not None else RenameReads()
+        renames = {}
+        if not removed or not added: return renames
+        start = time.perf_counter()
+        removed_sizes = {rel: old_side.size(rel) for rel in removed}
+        added_sizes = {rel: new_side.size(rel) for rel in added}
+        shared_sizes = set(removed_sizes.values()) & set(added_sizes.values())
+        by_key = defaultdict(list)
+        for rel in sorted(removed):
+            if removed_sizes[rel] in shared_sizes: by_key[self._content_key(old_side, rel, reads)].append(rel)
+        by_key.pop(None, None)
+        old_digests = {}
+        for rel in sorted(added):
+            if added_sizes[rel] not in shared_sizes: continue
+            candidates = by_key.get(self._content_key(new_side, rel, reads))
+            if not candidates: continue
+            digest = self._content_digest(new_side, rel, reads)
+            if digest is None: continue
+            # Prefer a file with the same name, as when a folder was moved
+            name = rel.rsplit('/', 1)[-1]
+            for old in sorted(candidates, key=lambda c: c.rsplit('/', 1)[-1] != name):
+                if old not in old_digests: old_digests[old] = self._content_digest(old_side, old, reads)
+                if old_digests[old] == digest:
+                    candidates.remove(old)
+                    renames[rel] = (old, True)
+                    break
+        self.stats['renamed_exact'] = len(renames)
+
+        moved = {old for old, _ in renames.values()}
+        left_removed = sorted(rel for rel in removed if rel not in moved)
+        left_added = sorted(rel for rel in added if rel not in renames)
+        if left_removed and left_added and self.rename_similarity <= 1:
+            hasher = MinHasher(RENAME_MINHASH_PERMUTATIONS)
+            index, sketches = LSHIndex(RENAME_LSH_BANDS, RENAME_MINHASH_PERMUTATIONS // RENAME_LSH_BANDS), {}
+            for rel in left_removed:
+                sketch = self._rename_sketch(old_side, rel, reads)
+                if sketch is None: continue
+                sketches[rel] = sketch
+                index.insert(rel, hasher.signature(sketch))
+            scored = []
+            for rel in left_added:
+                sketch = self._rename_sketch(new_side, rel, reads) if sketches else None
+                if sketch is None: continue
+                for old in index.query(hasher.signature(sketch)):
+                    score = jaccard(sketch, sketches[old])
+                    if score >= self.rename_similarity: scored.append((-score, rel, old))
+            for _, rel, old in sorted(scored):
+                if rel in renames or old in moved: continue
+                renames[rel] = (old, False)
+                moved.add(old)
+        # Only the similar pairs are read again, to be diffed: keep their bytes and drop everything else
+        paired = {(old, rel): (reads.take(old_side, old), reads.take(new_side, rel))
+                  for rel, (old, exact) in renames.items() if not exact}
+        reads.clear()
+        for (old, rel), (data1, data2) in paired.items():
+            if data1 is not None: reads.kept[(id(old_side), old)] = data1
+            if data2 is not None: reads.kept[(id(new_side), rel)] = data2
+        self.stats['renamed'] = len(renames)
+        if renames:
+            print(f"Detected {len(renames)} renamed files ({self.stats['renamed_exact']} identical) "
+                  f"in {time.perf_counter() - start:.2f}s.")
+        return renames
+
+    def _write_finished(self, writer, pending, keep):
+        while len(pending) > keep:
+            item, result = pending.popleft()
+            if isinstance(result, Future): result = result.result()
+            blocks = None
+            if result is not None:
+                blocks, item['add_count'], item['del_count'] = result
+            writer.add(item, blocks)
+
+    def _iter_changed(self, old_side, new_side, files1, files2, ordered, ids, renames=None, reads=None):
+        """
+        Yields (item, old lines, new lines) for every differing file; binary items already carry their size diff.
+        renames maps new paths to (old path, exact): such pairs become one 'renamed' item under the new path,
+        without lines when the content is identical, and diffed from the bytes kept in `reads` otherwise.
+        """
+        renames = renames or {}
+        moved_away = {old for old, _ in renames.values()}
+        for rel in ordered:
+            if rel in moved_away: continue  # reported under its new path
+            old_rel, exact = renames.get(rel, (rel, False))
+            in_old, in_new = old_rel in files1, rel in files2
+            item = {
+                "id": ids[rel], "path": rel, "name": rel.rsplit('/', 1)[-1],
+                "add_count": 0, "del_count": 0, "size_diff": ""
+            }
+            if rel in renames:
+                item['old_path'] = old_rel
+                if exact:
+                    item.update({'status': 'renamed', 'is_binary': False})
+                    yield item, None, None
+                    continue
+
+            # Each member is decompressed at most once: the bytes read for the equality check or the rename
+            # detection are also diffed
+            data1 = data2 = None
+            if rel in renames and reads is not None:
+                data1, data2 = reads.take(old_side, old_rel), reads.take(new_side, rel)
+            if in_old and in_new and rel not in renames:
+                self.stats['common'] += 1
+                same = self._same_without_reading(old_side, new_side, rel)
+                if same is not None: self.stats['skipped_by_crc'] += same
+                if same is None:
+                    try:
+                        data1, data2 = old_side.read_bytes(rel), new_side.read_bytes(rel)
+                    except Exception:
+                        data1 = data2 = None
+                    same = data1 is not None and data1 == data2
+                if same: continue
+            if data1 is None and data2 is None and (
+                    (in_old and self._has_binary_prefix(old_side, old_rel))
+                    or (in_new and self._has_binary_prefix(new_side, rel))):
+                lines1 = lines2 = None
+                is_text1 = is_text2 = False
+            else:
+                lines1, is_text1 = self._read_content(old_side, old_rel, data1) if in_old else ([], True)
+                lines2, is_text2 = self._read_content(new_side, rel, data2) if in_new else ([], True)
+
+            if in_old and not in_new:
+                item['status'] = 'removed'
+                is_text = is_text1
+            elif not in_old and in_new:
+                item['status'] = 'added'
+                is_text = is_text2
+            else:
+                item['status'] = 'renamed' if rel in renames else 'modified'
+                is_text = is_text1 and is_text2
+
+            item['is_binary'] = not is_text
+
+            if not is_text:
+                item['size_diff'] = self.get_size_diff(old_side.size(old_rel) if in_old else 0,
+                                                       new_side.size(rel) if in_new else 0)
+            yield item, lines1, lines2
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("old_file")
+    parser.add_argument("new_file")
+    parser.add_argument("-o", "--output", default="diff_report.html")
+    parser.add_argument("--old-label", dest="old_label")
+    parser.add_argument("--new-label", dest="new_label")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Processes used to diff changed text files, 0 for all CPU cores (default: 1, serial)")
+    parser.add_argument("--diff-algorithm", choices=diff_engine.ALGORITHMS, default=DEFAULT_DIFF_ALGORITHM,
+                        help=f"Line diff engine (default: {DEFAULT_DIFF_ALGORITHM}, the original output; "
+                             "myers, patience and histogram stay fast on large files)")
+    parser.add_argument("--max-diff-lines", type=int,
+                        help=f"Summarize files with more lines than this on both sides together (off by default, e.g. {MAX_DIFF_LINES})")
+    parser.add_argument("--max-diff-bytes", type=int,
+                        help=f"Summarize files with more characters than this on both sides together (off by default, e.g. {MAX_DIFF_BYTES})")
+    parser.add_argument("--max-diff-cost", type=int,
+                        help=f"Summarize files whose edit distance exceeds this many lines; not applied to difflib (off by default, e.g. {MAX_DIFF_COST})")
+    parser.add_argument("--max-inline-length", type=int,
+                        help=f"Only match the common prefix and suffix of paired lines longer than this (off by default, e.g. {MAX_INLINE_LINE_LENGTH})")
+    parser.add_argument("--max-added-lines", type=int, default=MAX_ADDED_LINES,
+                        help="Lines shown for added and removed files")
+    parser.add_argument("--no-renames", dest="detect_renames", action="store_false",
+                        help="Report moved files as removed and added instead of pairing them")
+    parser.add_argument("--rename-similarity", type=float, default=RENAME_SIMILARITY,
+                        help="Line similarity (0-1) from which a removed and an added file are paired as a rename; above 1 only pairs identical files")
+    parser.add_argument("--semantic", action="store_true",
+                        help="Diff .json and .snbt files by key path (lists of objects by id) instead of line by line")
+    parser.add_argument("--sharded", action="store_true",
+                        help="Write a small index page and load each file's diff on demand from gzip shards in <output>_files/")
+    args = parser.parse_args()
+
+    if os.path.exists(args.old_file) and os.path.exists(args.new_file):
+        ArchiveComparator(
+            args.old_file,
+            args.new_file,
+            args.output,
+            old_label=args.old_label,
+            new_label=args.new_label,
+            jobs=args.jobs if args.jobs > 0 else (os.cpu_count() or 1),
+            diff_algorithm=args.diff_algorithm,
+            max_diff_lines=args.max_diff_lines,
+            max_diff_bytes=args.max_diff_bytes,
+            max_diff_cost=args.max_diff_cost,
+            max_inline_length=args.max_inline_length,
+            sharded=args.sharded,
+            semantic=args.semantic,
+            max_added_lines=args.max_added_lines,
+            detect_renames=args.detect_renames,
+            rename_similarity=args.rename_similarity
+        ).process()
+    else:
+        print("Files not found.")
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Line diff engines for compare_archives.py.
+
+Every engine returns difflib-style opcodes (tag, i1, i2, j1, j2), so reports can switch between them:
+  - myers:     minimal edit script, linear-space O((N+M)D) divide and conquer on the middle snake
+  - patience:  anchors on lines that are unique on both sides, Myers in between
+  - histogram: anchors on the least frequent common line (as in git), Myers when no line is rare enough
+  - difflib:   difflib.SequenceMatcher, the original behaviour
+
+Before any engine runs, the common prefix and suffix are stripped and lines that occur on one side only
+are dropped (they can never match), which keeps very different files cheap. The Myers search gives up
+with DiffTooCostly once the edit distance exceeds max_cost, so callers can summarise instead.
+"""
+
+import difflib
+from bisect import bisect_left
+from collections import Counter
+
+ALGORITHMS = ('myers', 'patience', 'histogram', 'difflib')
+HISTOGRAM_MAX_OCCURRENCES = 64
+
+
+class DiffTooCostly(Exception):
+    pass
+
+
+def _middle_snake(a, alo, ahi, b, blo, bhi, max_cost):
+    """Returns (x, y, u, v): the middle snake of the shortest edit script, in absolute indices."""
+    n, m = ahi - alo, bhi - blo
+    delta = n - m
+    odd = delta & 1
+    max_d = (n + m + 1) // 2
+    # The snake meets halfway, so half the cost bounds the search
+    if max_cost is not None and max_d > (max_cost + 1) // 2:
+        max_d = (max_cost + 1) // 2
+    size = 2 * max_d + 2
+    vf, vb = [0] * size, [0] * size
+    for d in range(max_d + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and vf[k - 1] < vf[k + 1]):
+                x = vf[k + 1]
+            else:
+                x = vf[k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            vf[k] = x
+            if odd and -(d - 1) <= delta - k <= d - 1 and x + vb[delta - k] >= n:
+                return alo + x0, blo + y0, alo + x, blo + y
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and vb[k - 1] < vb[k + 1]):
+                x = vb[k + 1]
+            else:
+                x = vb[k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[ahi - 1 - x] == b[bhi - 1 - y]:
+                x += 1
+                y += 1
+            vb[k] = x
+            if not odd and -d <= delta - k <= d and x + vf[delta - k] >= n:
+                return ahi - x, bhi - y, ahi - x0, bhi - y0
+    raise DiffTooCostly(f"edit distance exceeds {max_cost} lines")
+
+
+def _myers(a, alo, ahi, b, blo, bhi, matches, max_cost):
+    """Appends matched index pairs of a[alo:ahi] and b[blo:bhi] to `matches`, in order."""
+    stack = [(alo, ahi, blo, bhi)]
+    # Explicit stack of pending ranges; a range is replaced by (left, snake, right) pieces in order
+    while stack:
+        item = stack.pop()
+        if item[0] is None:
+            matches.extend(item[1])
+            continue
+        alo, ahi, blo, bhi = item
+        head = []
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            head.append((alo, blo))
+            alo += 1
+            blo += 1
+        tail = []
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            tail.append((ahi, bhi))
+        tail.reverse()
+        matches.extend(head)
+        if alo < ahi and blo < bhi:
+            x, y, u, v = _middle_snake(a, alo, ahi, b, blo, bhi, max_cost)
+            stack.append((None, tail))
+            stack.append((u, ahi, v, bhi))
+            stack.append((None, [(x + i, y + i) for i in range(u - x)]))
+            stack.append((alo, x, blo, y))
+        else:
+            matches.extend(tail)
+
+
+def _unique_positions(seq, lo, hi):
+    seen = {}
+    for i in range(lo, hi):
+        seen[seq[i]] = -1 if seq[i] in seen else i
+    return {line: i for line, i in seen.items() if i >= 0}
+
+
+def _longest_increasing(pairs):
+    """Patience sorting: the longest run of pairs whose b indices increase along increasing a indices."""
+    tops, links = [], []
+    for index, (_, j) in enumerate(pairs):
+        lo, hi = 0, len(tops)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if pairs[tops[mid]][1] < j:
+                lo = mid + 1
+            else:
+                hi = mid
+        links.append(tops[lo - 1] if lo else -1)
+        if lo == len(tops):
+            tops.append(index)
+        else:
+            tops[lo] = index
+    result, index = [], tops[-1] if tops else -1
+    while index >= 0:
+        result.append(pairs[index])
+        index = links[index]
+    return result[::-1]
+
+
+def _patience(a, alo, ahi, b, blo, bhi, matches, max_cost):
+    stack = [(alo, ahi, blo, bhi)]
+    # Explicit stack like _myers: a range is replaced by its gaps and anchors, in order
+    while stack:
+        item = stack.pop()
+        if item[0] is None:
+            matches.extend(item[1])
+            continue
+        alo, ahi, blo, bhi = item
+        unique_a = _unique_positions(a, alo, ahi)
+        unique_b = _unique_positions(b, blo, bhi)
+        pairs = sorted((i, unique_b[line]) for line, i in unique_a.items() if line in unique_b)
+        anchors = _longest_increasing(pairs)
+        if not anchors:
+            _myers(a, alo, ahi, b, blo, bhi, matches, max_cost)
+            continue
+        pieces = []
+        for i, j in anchors:
+            pieces.append((alo, i, blo, j))
+            pieces.append((None, [(i, j)]))
+            alo, blo = i + 1, j + 1
+        pieces.append((alo, ahi, blo, bhi))
+        stack.extend(reversed(pieces))
+
+
+def _histogram(a, alo, ahi, b, blo, bhi, matches, max_cost):
+    # Sorted positions of each line in a, so occurrences within any range are counted by bisection
+    positions = {}
+    for i in range(alo, ahi):
+        positions.setdefault(a[i], []).append(i)
+    stack = [(alo, ahi, blo, bhi)]
+    # Explicit stack like _myers: a range is replaced by (left, anchor run, right) pieces in order
+    while stack:
+        item = stack.pop()
+        if item[0] is None:
+            matches.extend(item[1])
+            continue
+        alo, ahi, blo, bhi = item
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            matches.append((alo, blo))
+            alo += 1
+            blo += 1
+        if alo == ahi or blo == bhi:
+            continue
+        best = None
+        for j in range(blo, bhi):
+            found = positions.get(b[j])
+            if not found:
+                continue
+            first = bisect_left(found, alo)
+            count = bisect_left(found, ahi, first) - first
+            if count and count <= HISTOGRAM_MAX_OCCURRENCES and (best is None or count < best[0]):
+                best = (count, j, found[first])
+                if count == 1:
+                    break
+        if best is None:
+            _myers(a, alo, ahi, b, blo, bhi, matches, max_cost)
+            continue
+        _, j, i = best
+        # Grow the anchor into the whole run of equal lines around it
+        i0, j0 = i, j
+        while i0 > alo and j0 > blo and a[i0 - 1] == b[j0 - 1]:
+            i0 -= 1
+            j0 -= 1
+        i1, j1 = i + 1, j + 1
+        while i1 < ahi and j1 < bhi and a[i1] == b[j1]:
+            i1 += 1
+            j1 += 1
+        stack.append((i1, ahi, j1, bhi))
+        stack.append((None, [(i0 + k, j0 + k) for k in range(i1 - i0)]))
+        stack.append((alo, i0, blo, j0))
+
+
+ENGINES = {'myers': _myers, 'patience': _patience, 'histogram': _histogram}
+
+
+def _opcodes_from_matches(matches, n, m):
+    """Turns ordered matched pairs into difflib-style opcodes."""
+    opcodes = []
+    i = j = 0
+    k = 0
+    while k <= len(matches):
+        if k < len(matches):
+            mi, mj = matches[k]
+            size = 1
+            while k + size < len(matches) and matches[k + size] == (mi + size, mj + size):
+                size += 1
+        else:
+            mi, mj, size = n, m, 0
+        tag = 'replace' if i < mi and j < mj else 'delete' if i < mi else 'insert' if j < mj else ''
+        if tag:
+            opcodes.append((tag, i, mi, j, mj))
+        if size:
+            opcodes.append(('equal', mi, mi + size, mj, mj + size))
+        i, j = mi + size, mj + size
+        k += size or 1
+    return opcodes
+
+
+def get_opcodes(a, b, algorithm='myers', max_cost=None):
+    """
+    Diffs two lists of lines and returns difflib-style opcodes.
+    Raises DiffTooCostly when the edit distance of the remaining lines exceeds max_cost.
+    """
+    if algorithm == 'difflib':
+        return difflib.SequenceMatcher(None, a, b).get_opcodes()
+    # Work on small integers, and leave out lines that have no counterpart on the other side
+    ids = {}
+    a_ids = [ids.setdefault(line, len(ids)) for line in a]
+    b_ids = [ids.setdefault(line, len(ids)) for line in b]
+    in_b, in_a = set(b_ids), set(a_ids)
+    a_keep = [i for i, line in enumerate(a_ids) if line in in_b]
+    b_keep = [j for j, line in enumerate(b_ids) if line in in_a]
+    a_seq = [a_ids[i] for i in a_keep]
+    b_seq = [b_ids[j] for j in b_keep]
+    matches = []
+    ENGINES[algorithm](a_seq, 0, len(a_seq), b_seq, 0, len(b_seq), matches, max_cost)
+    return _opcodes_from_matches([(a_keep[i], b_keep[j]) for i, j in matches], len(a), len(b))
+
+
+def group_opcodes(opcodes, n=3):
+    """Splits opcodes into hunks with n lines of context, like SequenceMatcher.get_grouped_opcodes."""
+    codes = list(opcodes) or [('equal', 0, 1, 0, 1)]
+    if codes[0][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+    group = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == 'equal' and i2 - i1 > 2 * n:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == 'equal'):
+        yield group
+
+
+def _format_range(start, stop):
+    beginning, length = start + 1, stop - start
+    if length == 1:
+        return f'{beginning}'
+    if not length:
+        beginning -= 1
+    return f'{beginning},{length}'
+
+
+def unified_diff(a, b, n=3, algorithm='myers', max_cost=None):
+    """Same lines as difflib.unified_diff(a, b, n=n, lineterm=''), computed with the chosen engine."""
+    if algorithm == 'difflib':
+        yield from difflib.unified_diff(a, b, n=n, lineterm='')
+        return
+    started = False
+    for group in group_opcodes(get_opcodes(a, b, algorithm, max_cost), n):
+        if not started:
+            started = True
+            yield '--- '
+            yield '+++ '
+        first, last = group[0], group[-1]
+        yield f'@@ -{_format_range(first[1], last[2])} +{_format_range(first[3], last[4])} @@'
+        for tag, i1, i2, j1, j2 in group:
+            if tag == 'equal':
+                for line in a[i1:i2]:
+                    yield ' ' + line
+                continue
+            if tag in ('replace', 'delete'):
+                for line in a[i1:i2]:
+                    yield '-' + line
+            if tag in ('replace', 'insert'):
+                for line in b[j1:j2]:
+                    yield '+' + line
+
+
+def count_changes(a, b):
+    """Lines added and removed by content (multiset difference), an O(N) stand-in when a file is not diffed."""
+    old, new = Counter(a), Counter(b)
+    return sum((new - old).values()), sum((old - new).values())
@@ -0,0 +1,298 @@
+# .github/scripts/download_cache.py
+"""
+Content-addressed cache for modpack archives.
+
+Archives are stored once under blobs/<sha256> and looked up by a key made of the pack ID and the
+file ID (e.g. "130/12345"), so re-running the update checker or the diff report for a version that
+was already fetched costs no network. Downloads stream in 1 MiB chunks into a partial file that is
+resumed with an HTTP Range request after an interrupted run, and the result is verified against the
+sizes and hashes published by CurseForge before it enters the cache. Least recently used entries are
+evicted once the cache grows past its size limit. On GitHub Actions the cache only pays off across
+runs when the job restores .cache/downloads with actions/cache, as is done for .cache/ftb_colors.json.
+
+Usage:
+  python download_cache.py fetch 130 12345 --url https://edge.forgecdn.net/...
+  python download_cache.py fetch 130 12345 --curse-the-beast
+  python download_cache.py list
+  python download_cache.py prune --max-size-mb 2048
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+import requests
+from pathlib import Path
+
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_CACHE_DIR = '.cache/downloads'
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024 * 1024
+INDEX_VERSION = 1
+DOWNLOAD_RETRIES = 3
+# CurseForge reports file hashes with numeric algorithm ids
+CURSEFORGE_HASH_ALGOS = {1: 'sha1', 2: 'md5'}
+
+
+class DownloadError(RuntimeError):
+    pass
+
+
+def cache_key(pack_id, file_id):
+    return f"{pack_id}/{file_id}"
+
+def curseforge_expected_hashes(file_info):
+    """Returns {algorithm: hex digest} from the 'hashes' field of a CurseForge file object."""
+    return {CURSEFORGE_HASH_ALGOS[h['algo']]: h['value'].lower()
+            for h in file_info.get('hashes', []) if h.get('algo') in CURSEFORGE_HASH_ALGOS}
+
+
+class Hasher:
+    """Feeds every chunk to SHA256 (the cache address) and to any extra algorithms being verified."""
+
+    def __init__(self, algorithms=()):
+        self.algorithms = ['sha256'] + [a for a in algorithms if a != 'sha256']
+        self.reset()
+
+    def reset(self):
+        self.digests = {algo: hashlib.new(algo) for algo in self.algorithms}
+        self.size = 0
+
+    def update(self, chunk):
+        for h in self.digests.values(): h.update(chunk)
+        self.size += len(chunk)
+
+    def update_from_file(self, path):
+        with open(path, 'rb', buffering=0) as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk: break
+                self.update(chunk)
+
+    def hexdigests(self):
+        return {algo: h.hexdigest() for algo, h in self.digests.items()}
+
+
+def verify(hasher, expected_size=None, expected_hashes=None):
+    if expected_size is not None and hasher.size != expected_size:
+        raise DownloadError(f"Size mismatch: expected {expected_size} bytes, got {hasher.size}.")
+    digests = hasher.hexdigests()
+    for algo, expected in (expected_hashes or {}).items():
+        if digests[algo] != expected.lower():
+            raise DownloadError(f"{algo} mismatch: expected {expected}, got {digests[algo]}.")
+
+
+class DownloadCache:
+    """
+    index.json maps each key to {sha256, size, last_used}; several keys may share one blob.
+    Partial downloads live in partial/ until they are verified and moved into blobs/.
+    One instance may serve several threads: the index is guarded by a lock, and the files handed
+    out by this process are pinned so that another thread's eviction never deletes them.
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.blob_dir = self.root / 'blobs'
+        self.partial_dir = self.root / 'partial'
+        self.index_path = self.root / 'index.json'
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+        self.entries = self._load_index()
+        self.bytes_downloaded = 0
+        self.lock = threading.RLock()
+        self.pinned = set()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION: return data.get('entries', {})
+            print(f"Warning: Download cache index {self.index_path} has an unsupported version, starting empty.")
+        except FileNotFoundError:
+            pass
+        except json.JSONDecodeError as e:
+            print(f"Warning: Could not parse download cache index {self.index_path}: {e}")
+        return {}
+
+    def _save_index(self):
+        tmp_path = self.index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'entries': self.entries}, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def blob_path(self, sha256):
+        return self.blob_dir / sha256
+
+    def _partial_path(self, key, suffix='.part'):
+        return self.partial_dir / (key.replace('/', '_') + suffix)
+
+    def lookup(self, key):
+        """Returns the cached file for a key, or None. A blob whose size no longer matches is dropped."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None: return None
+            path = self.blob_path(entry['sha256'])
+            if not path.is_file() or path.stat().st_size != entry['size']:
+                print(f"Warning: Cached file for {key} is missing or truncated, it will be fetched again.")
+                self._remove(key)
+                self._save_index()
+                return None
+            entry['last_used'] = time.time()
+            self.pinned.add(key)
+            self._save_index()
+            return path
+
+    def fetch(self, key, url, expected_size=None, expected_hashes=None, session=None):
+        """Returns the cached file for a key, downloading it (with resume and verification) on a miss."""
+        path = self.lookup(key)
+        if path is not None:
+            print(f"Download cache hit for {key}: {path}")
+            return path
+        partial = self._partial_path(key)
+        hasher = Hasher(expected_hashes or ())
+        start = time.perf_counter()
+        session = session or requests.Session()
+        for attempt in range(1, DOWNLOAD_RETRIES + 1):
+            try:
+                self._download(session, url, partial, hasher)
+                break
+            except requests.exceptions.RequestException as e:
+                if attempt == DOWNLOAD_RETRIES:
+                    raise DownloadError(f"Failed to download {url}: {e}")
+                print(f"Warning: Download interrupted ({e}), resuming (attempt {attempt + 1}/{DOWNLOAD_RETRIES})...")
+        elapsed = time.perf_counter() - start
+        rate = hasher.size / elapsed / 1024 / 1024 if elapsed > 0 else float('inf')
+        print(f"Downloaded {key} ({hasher.size / 1024 / 1024:.1f} MB) in {elapsed:.2f}s ({rate:.1f} MB/s).")
+        try:
+            verify(hasher, expected_size, expected_hashes)
+        except DownloadError:
+            partial.unlink(missing_ok=True)
+            raise
+        return self._store(key, partial, hasher)
+
+    def _download(self, session, url, partial, hasher):
+        """Appends the rest of the file to the partial download, re-hashing what is already on disk."""
+        offset = partial.stat().st_size if partial.exists() else 0
+        if hasher.size != offset:
+            hasher.reset()
+            if offset: hasher.update_from_file(partial)
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+        with session.get(url, stream=True, headers=headers, timeout=60) as r:
+            if offset and r.status_code == 416:
+                return  # the partial file is already complete
+            r.raise_for_status()
+            if offset and (r.status_code != 206 or not r.headers.get('Content-Range', '').startswith(f'bytes {offset}-')):
+                print("Server ignored the range request, restarting the download.")
+                offset = 0
+                hasher.reset()
+            if offset: print(f"Resuming download at {offset / 1024 / 1024:.1f} MB.")
+            with open(partial, 'ab' if offset else 'wb') as f:
+                for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+                    hasher.update(chunk)
+                    self.bytes_downloaded += len(chunk)
+
+    def fetch_with(self, key, producer, expected_size=None, expected_hashes=None):
+        """
+        Caches a file written by an external tool: producer(dest_path) is only called on a miss.
+        The produced file is hashed once and verified like a regular download.
+        """
+        path = self.lookup(key)
+        if path is not None:
+            print(f"Download cache hit for {key}: {path}")
+            return path
+        # External tools such as CurseTheBeast are handed a .zip path, like the archive path they were given before
+        partial = self._partial_path(key, '.zip')
+        partial.unlink(missing_ok=True)
+        producer(partial)
+        if not partial.is_file():
+            raise DownloadError(f"The download for {key} did not produce {partial}.")
+        hasher = Hasher(expected_hashes or ())
+        hasher.update_from_file(partial)
+        try:
+            verify(hasher, expected_size, expected_hashes)
+        except DownloadError:
+            partial.unlink(missing_ok=True)
+            raise
+        return self._store(key, partial, hasher)
+
+    def _store(self, key, partial, hasher):
+        sha256 = hasher.hexdigests()['sha256']
+        path = self.blob_path(sha256)
+        with self.lock:
+            if path.exists(): partial.unlink()  # same content already cached under another key
+            else: os.replace(partial, path)
+            self.entries[key] = {'sha256': sha256, 'size': hasher.size, 'last_used': time.time()}
+            self.pinned.add(key)
+            self.evict()
+            self._save_index()
+        return path
+
+    def _remove(self, key):
+        sha256 = self.entries.pop(key)['sha256']
+        if not any(e['sha256'] == sha256 for e in self.entries.values()):
+            self.blob_path(sha256).unlink(missing_ok=True)
+
+    def total_bytes(self):
+        return sum(e['size'] for e in {e['sha256']: e for e in self.entries.values()}.values())
+
+    def evict(self):
+        """Drops least recently used entries until the cache fits its size limit; never drops pinned entries."""
+        evicted = []
+        with self.lock:
+            for key in sorted(self.entries, key=lambda k: self.entries[k]['last_used']):
+                if self.total_bytes() <= self.max_bytes: break
+                if key in self.pinned: continue
+                self._remove(key)
+                evicted.append(key)
+        if evicted: print(f"Evicted {len(evicted)} cached downloads: {', '.join(evicted)}")
+        return evicted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-addressed cache for modpack archives.")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help=f"Cache directory (default: {DEFAULT_CACHE_DIR}).")
+    parser.add_argument('--max-size-mb', type=int, default=DEFAULT_MAX_BYTES // 1024 // 1024,
+                        help="Evict least recently used archives beyond this size.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    fetch_parser = subparsers.add_parser('fetch', help="Print the cached path of a pack file, downloading it on a miss.")
+    fetch_parser.add_argument('pack_id')
+    fetch_parser.add_argument('file_id')
+    source = fetch_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--url', help="Direct download URL.")
+    source.add_argument('--curse-the-beast', action='store_true', help="Download with ./CurseTheBeast.")
+    fetch_parser.add_argument('--sha1', help="Expected SHA1 of the file.")
+    fetch_parser.add_argument('--size', type=int, help="Expected size of the file in bytes.")
+    subparsers.add_parser('list', help="List cached archives.")
+    subparsers.add_parser('prune', help="Evict archives beyond the size limit.")
+    args = parser.parse_args()
+
+    cache = DownloadCache(args.cache_dir, args.max_size_mb * 1024 * 1024)
+    if args.command == 'fetch':
+        key = cache_key(args.pack_id, args.file_id)
+        expected_hashes = {'sha1': args.sha1} if args.sha1 else None
+        if args.curse_the_beast:
+            from update_checker import run_command
+            path = cache.fetch_with(key, lambda dest: run_command(
+                ['./CurseTheBeast', 'download', args.pack_id, args.file_id, '--output', str(dest)]),
+                args.size, expected_hashes)
+        else:
+            path = cache.fetch(key, args.url, args.size, expected_hashes)
+        print(path)
+    elif args.command == 'list':
+        for key, entry in sorted(cache.entries.items(), key=lambda item: item[1]['last_used'], reverse=True):
+            print(f"{key}\t{entry['size'] / 1024 / 1024:.1f} MB\t{entry['sha256'][:12]}")
+        print(f"Total: {cache.total_bytes() / 1024 / 1024:.1f} MB / {cache.max_bytes / 1024 / 1024:.0f} MB")
+    else:
+        cache.evict()
+        cache._save_index()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except DownloadError as e:
+        sys.exit(f"Error: {e}")
@@ -2,17 +2,24 @@ import asyncio
 import json
 import os
 import shutil
+import tempfile
 from pprint import pprint
 
 import paratranz_client
 from pydantic import ValidationError
 
 from LangSpliter import split_and_process_all
+from translation_memory import TranslationMemory
 
 configuration = paratranz_client.Configuration(host="https://paratranz.cn/api")
 configuration.api_key["Token"] = os.environ["API_TOKEN"]
 
-target_languages = ["zh_cn", "zh_hk", "zh_tw"]
+# 配置了 OpenCC 词典 (OPENCC_DICT_DIR) 时，zh_hk / zh_tw 由 para2github 在本地从 zh_cn 转换生成，
+# 只需上传 zh_cn
+if os.environ.get("OPENCC_DICT_DIR"):
+    target_languages = ["zh_cn"]
+else:
+    target_languages = ["zh_cn", "zh_hk", "zh_tw"]
 
 
 async def upload_file(api_client, project_id, path, file, existing_files_dict):
@@ -53,6 +60,31 @@ async def upload_file(api_client, project_id, path, file, existing_files_dict):
                 print(f"上传文件 {file} 时发生未知错误，已达到最大重试次数: {e}")
 
 
+async def prefill_from_translation_memory(api_client, project_id, existing_files_dict):
+    """
+    使用翻译记忆为 Paratranz 上已存在文件中尚未翻译的词条预填译文。
+    译文来自其他文件中相同原文的已有翻译（见 translation_memory.py）。
+    """
+    api_instance = paratranz_client.FilesApi(api_client)
+    prefill = TranslationMemory.build("./Source", "./CNPack").prefill()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for file_path, items in sorted(prefill.items()):
+            existing_file = existing_files_dict.get(file_path)
+            if not existing_file:
+                continue
+            temp_file = os.path.join(temp_dir, os.path.basename(file_path))
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(items, f, ensure_ascii=False)
+            try:
+                await api_instance.update_file_translation(
+                    project_id, file_id=existing_file.id, file=temp_file, force=False
+                )
+                print(f"已为 {file_path} 预填 {len(items)} 条译文")
+            except Exception as e:
+                print(f"为 {file_path} 预填译文失败: {e}")
+
+
 def get_filelist(dir):
     filelist = []
     for root, _, files in os.walk(dir):
@@ -152,6 +184,12 @@ async def main():
 
         await asyncio.gather(*tasks)
 
+        # 设置 TM_PREFILL=true 时，使用翻译记忆为重复原文预填译文
+        if os.environ.get("TM_PREFILL", "").lower() == "true":
+            await prefill_from_translation_memory(
+                api_client, project_id, existing_files_dict
+            )
+
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,196 @@
+# .github/scripts/lang_diff.py
+"""
+Key-level diff of the translatable content touched by a pack update.
+
+Lang files (kubejs/assets/*/lang/*.json, FTB Quests lang/*.snbt) are compared key by key: each side is
+loaded into a dict once and the key sets are compared, so a file costs O(keys) regardless of how much
+moved around. Quest chapter files are additionally indexed by chapter, quest, task and reward ID;
+an object counts as changed when its own fields differ (nested tasks/rewards are compared separately).
+
+The result is a compact JSON changeset that downstream sync can use to push and re-review only the
+affected keys, plus a short summary for the PR body. flatten_paths / diff_structured give the same
+kind of comparison for any JSON or SNBT file, by key path, for the semantic mode of compare_archives.
+"""
+
+import json
+import time
+
+from snbt_reader import SNBTError, iter_chapter_entries, iter_lang_entries, loads, loads_lang
+
+CHANGESET_VERSION = 1
+# Child lists holding objects with their own IDs, and the kind recorded for their elements
+QUEST_OBJECT_LISTS = {'quests': 'quests', 'tasks': 'tasks', 'rewards': 'rewards'}
+QUEST_KINDS = ('chapters', 'quests', 'tasks', 'rewards')
+SUMMARY_KEY_LIMIT = 20
+
+
+def is_lang_file(rel):
+    return '/lang/' in f'/{rel}' and rel.endswith(('.json', '.snbt'))
+
+def is_diffable(rel):
+    return is_lang_file(rel) or (rel.endswith('.snbt') and 'ftbquests' in rel)
+
+def _own_fields(obj):
+    """A quest object's own fields, leaving out nested objects that are indexed separately (dict equality ignores order)."""
+    return {k: v for k, v in obj.items() if k not in QUEST_OBJECT_LISTS}
+
+def _index_list(index, obj, key):
+    """Indexes obj[key] (a list of objects with IDs) and recurses into their own nested lists."""
+    objects = obj.get(key)
+    if not isinstance(objects, list): return
+    for child in objects:
+        if isinstance(child, dict) and isinstance(child.get('id'), str):
+            index[QUEST_OBJECT_LISTS[key]][child['id']] = _own_fields(child)
+            for nested in QUEST_OBJECT_LISTS:
+                if nested in child: _index_list(index, child, nested)
+
+def index_quest_objects(data):
+    """
+    Returns {kind: {id: own fields}} for the chapter, quests, tasks and rewards of a parsed SNBT file.
+    Only the chapter -> quests -> tasks/rewards structure is followed, not the whole tree.
+    """
+    index = {kind: {} for kind in QUEST_KINDS}
+    if not isinstance(data, dict): return index
+    if 'id' in data and 'quests' in data:
+        index['chapters'][data['id']] = _own_fields(data)
+    for key in QUEST_OBJECT_LISTS:
+        if key in data: _index_list(index, data, key)
+    return index
+
+def parse_content(rel, raw):
+    """Parses one file into (strings {key: text}, quest index or None)."""
+    text = raw.decode('utf-8-sig')
+    if rel.endswith('.json'):
+        data = json.loads(text)
+        return {k: v for k, v in data.items() if isinstance(v, str)} if isinstance(data, dict) else {}, None
+    if is_lang_file(rel):
+        return dict(iter_lang_entries(loads_lang(text))), None
+    data = loads(text)
+    return dict(iter_chapter_entries(data)), index_quest_objects(data)
+
+def diff_mapping(old, new):
+    """Indexed comparison of two {key: value} dicts -> (added keys, removed keys, changed keys)."""
+    added = [k for k in new if k not in old]
+    removed = [k for k in old if k not in new]
+    changed = [k for k, v in new.items() if k in old and old[k] != v]
+    return added, removed, changed
+
+def diff_file(rel, old_raw, new_raw):
+    """
+    Returns the changeset entry of one file; old_raw / new_raw are None for added / deleted files.
+    Strings are keyed by their lang key, so the entry carries the new text of added and changed keys.
+    """
+    status = 'added' if old_raw is None else 'deleted' if new_raw is None else 'modified'
+    try:
+        old_strings, old_index = parse_content(rel, old_raw) if old_raw is not None else ({}, None)
+        new_strings, new_index = parse_content(rel, new_raw) if new_raw is not None else ({}, None)
+    except (SNBTError, ValueError) as e:
+        return {'status': status, 'error': str(e)}
+
+    added, removed, changed = diff_mapping(old_strings, new_strings)
+    entry = {'status': status}
+    if added: entry['added'] = {k: new_strings[k] for k in added}
+    if removed: entry['removed'] = removed
+    if changed: entry['changed'] = {k: [old_strings[k], new_strings[k]] for k in changed}
+    if old_index or new_index:
+        empty = {kind: {} for kind in QUEST_KINDS}
+        old_index, new_index = old_index or empty, new_index or empty
+        for kind in QUEST_KINDS:
+            added_ids, removed_ids, changed_ids = diff_mapping(old_index[kind], new_index[kind])
+            ids = {name: sorted(values) for name, values in
+                   (('added', added_ids), ('removed', removed_ids), ('changed', changed_ids)) if values}
+            if ids: entry[kind] = ids
+    return entry
+
+def _path_key(prefix, key):
+    return f'{prefix}.{key}' if prefix else str(key)
+
+def _id_keys(items):
+    """The ids of a list of objects when every element has a distinct string id, else None."""
+    ids = [item.get('id') if isinstance(item, dict) else None for item in items]
+    if not ids or not all(isinstance(i, str) for i in ids) or len(set(ids)) != len(ids): return None
+    return ids
+
+def flatten_paths(data, prefix='', out=None):
+    """
+    Flattens parsed JSON/SNBT into {key path: leaf value}. Lists of objects with distinct string ids
+    (quests, tasks, rewards, ...) are keyed by id, so reordering them is not a change; other lists by index.
+    """
+    if out is None: out = {}
+    if isinstance(data, dict):
+        if not data: out[prefix] = {}
+        for key, value in data.items():
+            flatten_paths(value, _path_key(prefix, key), out)
+    elif isinstance(data, list):
+        if not data: out[prefix] = []
+        ids = _id_keys(data)
+        for i, value in enumerate(data):
+            flatten_paths(value, f'{prefix}[id={ids[i]}]' if ids else f'{prefix}[{i}]', out)
+    else:
+        out[prefix] = data
+    return out
+
+def parse_structured(rel, raw):
+    text = raw.decode('utf-8-sig')
+    if rel.endswith('.json'): return json.loads(text)
+    return loads_lang(text) if is_lang_file(rel) else loads(text)
+
+def diff_structured(rel, old_raw, new_raw):
+    """
+    Compares two versions of a .json / .snbt file by key path -> [(status, path, old value, new value)],
+    in the order of the new file with removed paths last. Raises SNBTError / ValueError when a side does not parse.
+    """
+    old = flatten_paths(parse_structured(rel, old_raw))
+    new = flatten_paths(parse_structured(rel, new_raw))
+    added, removed, changed = diff_mapping(old, new)
+    added, changed = set(added), set(changed)
+    changes = [('added' if path in added else 'changed', path, old.get(path), value)
+               for path, value in new.items() if path in added or path in changed]
+    return changes + [('removed', path, old[path], None) for path in removed]
+
+def build_changeset(pack_name, old_version, new_version, pairs):
+    """
+    pairs yields (rel path, old bytes or None, new bytes or None) for the updated, added and deleted files.
+    Files whose diff comes out empty (e.g. only formatting changed) are left out.
+    """
+    start = time.perf_counter()
+    files, count = {}, 0
+    for rel, old_raw, new_raw in pairs:
+        count += 1
+        entry = diff_file(rel, old_raw, new_raw)
+        if len(entry) > 1 or entry['status'] != 'modified': files[rel] = entry
+    print(f"Key-level diff of {count} files in {time.perf_counter() - start:.2f}s.")
+    return {'version': CHANGESET_VERSION, 'pack': pack_name, 'from': old_version, 'to': new_version,
+            'files': dict(sorted(files.items()))}
+
+def write_changeset(changeset, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(changeset, f, ensure_ascii=False, separators=(',', ':'))
+
+def _count(entry, name):
+    value = entry.get(name)
+    return len(value) if value else 0
+
+def summarize_changeset(changeset, changeset_name='lang_changeset.json'):
+    """Markdown summary of the changeset for the PR body, pointing to the written changeset file; empty when no key changed."""
+    files = changeset['files']
+    if not files: return ""
+    totals = [sum(_count(e, name) for e in files.values()) for name in ('added', 'removed', 'changed')]
+    body = (f"### 🔤 语言键变更\n共 {len(files)} 个文件：新增 {totals[0]}、删除 {totals[1]}、修改 {totals[2]} 个原文键。"
+            f"完整的键级变更见 `{changeset_name}`。\n\n"
+            "| 文件 | 新增 | 删除 | 修改 | 任务 ID 变更 |\n|---|---|---|---|---|\n")
+    for rel, entry in files.items():
+        if 'error' in entry:
+            body += f"| `{rel}` | 解析失败：{entry['error']} | | | |\n"
+            continue
+        quest_ids = ", ".join(
+            f"{kind} +{len(ids.get('added', []))} -{len(ids.get('removed', []))} ~{len(ids.get('changed', []))}"
+            for kind in QUEST_KINDS if (ids := entry.get(kind)))
+        body += f"| `{rel}` | {_count(entry, 'added')} | {_count(entry, 'removed')} | {_count(entry, 'changed')} | {quest_ids} |\n"
+
+    changed_keys = [k for e in files.values() for k in e.get('changed', {})]
+    if changed_keys:
+        shown = "".join(f"- `{k}`\n" for k in changed_keys[:SUMMARY_KEY_LIMIT])
+        more = f"- ……以及另外 {len(changed_keys) - SUMMARY_KEY_LIMIT} 个键\n" if len(changed_keys) > SUMMARY_KEY_LIMIT else ""
+        body += f"\n<details><summary>原文被修改的键（需要复核译文）</summary>\n\n{shown}{more}\n</details>\n"
+    return body + "\n"
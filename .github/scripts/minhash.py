@@ -0,0 +1,87 @@
+"""
+MinHash 与 LSH（局部敏感哈希）相似度索引
+
+用于在大量文本中快速查找近似重复项：每段文本被切分为字符 n-gram，
+计算固定长度的 MinHash 签名，再按 band 分桶。查询时只需比对落入相同
+桶的候选项，耗时与语料规模基本无关。
+"""
+
+import re
+import zlib
+from collections import defaultdict
+from collections.abc import Iterable, Hashable
+
+# Minecraft 格式代码（§6、&l 等）不影响语义，计算相似度前先去除
+FORMAT_CODE_PATTERN = re.compile(r"[§&][0-9a-fk-or]", re.IGNORECASE)
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+
+def shingles(text: str, n: int = 3) -> set[int]:
+    """返回文本规范化后的字符 n-gram 集合（以 crc32 表示）。"""
+    text = " ".join(FORMAT_CODE_PATTERN.sub("", text).lower().split())
+    if len(text) <= n:
+        return {zlib.crc32(text.encode("utf-8"))} if text else set()
+    return {
+        zlib.crc32(text[i : i + n].encode("utf-8")) for i in range(len(text) - n + 1)
+    }
+
+
+def jaccard(a: set, b: set) -> float:
+    # 空集合（空文本或只有格式代码）没有可比较的内容，不视为相同
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 32, seed: int = 1):
+        # 使用线性同余生成器得到稳定的置换参数，保证持久化的签名在不同进程间可比
+        params = []
+        state = seed
+        for _ in range(num_perm):
+            state = (state * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+            a = (state >> 3) % MERSENNE_PRIME or 1
+            state = (state * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+            b = (state >> 3) % MERSENNE_PRIME
+            params.append((a, b))
+        self.num_perm = num_perm
+        self.params = params
+
+    def signature(self, shingle_set: Iterable[int]) -> list[int]:
+        values = list(shingle_set)
+        if not values:
+            return [MAX_HASH] * self.num_perm
+        return [
+            min(((a * v + b) % MERSENNE_PRIME) & MAX_HASH for v in values)
+            for a, b in self.params
+        ]
+
+
+class LSHIndex:
+    """将签名切分为 bands 段，每段 rows 个值；任意一段完全相同即成为候选。"""
+
+    def __init__(self, bands: int = 16, rows: int = 2):
+        self.bands = bands
+        self.rows = rows
+        self.buckets: list[dict[tuple, list[Hashable]]] = [
+            defaultdict(list) for _ in range(bands)
+        ]
+
+    def _band_keys(self, signature: list[int]) -> Iterable[tuple[int, tuple]]:
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, tuple(signature[start : start + self.rows])
+
+    def insert(self, key: Hashable, signature: list[int]) -> None:
+        for band, band_key in self._band_keys(signature):
+            self.buckets[band][band_key].append(key)
+
+    def query(self, signature: list[int]) -> set[Hashable]:
+        candidates = set()
+        for band, band_key in self._band_keys(signature):
+            bucket = self.buckets[band].get(band_key)
+            if bucket:
+                candidates.update(bucket)
+        return candidates
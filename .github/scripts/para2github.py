@@ -3,12 +3,16 @@ import os
 import re
 import sys
 import shutil
+import time
 from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Callable, Optional
 
 import requests
 
 from LangSpliter import merge_all_to_snbt
+from zh_convert import TARGET_LANGUAGES, derive_variants, load_converters
 
 TOKEN: str = os.getenv("API_TOKEN", "")
 GH_TOKEN: str = os.getenv("GH_TOKEN", "")
@@ -22,6 +26,111 @@ if not TOKEN or not PROJECT_ID:
 file_id_list: list[int] = []
 file_path_list: list[str] = []
 
+# --- 译文后处理规则 ---
+# 规则按声明顺序作用于每条译文，字段含义：
+#   paths:   规则适用的文件路径片段，"*" 表示所有文件
+#   unless:  任一条件成立时跳过该规则
+#            json_like  -> 去除首尾空白后以 { 开头、以 } 结尾
+#            contains   -> 包含任一子串
+#            startswith -> 以任一前缀开头
+#   replace: (原字符串, 替换字符串)
+# 新增规则只需在此追加条目，无需再修改 process_translation。
+VALUE_RULES: list[dict] = [
+    {
+        "name": "unescape_quotes",
+        "paths": ["*"],
+        "replace": ('\\"', '"'),
+    },
+    {
+        # 任务文本中的空格替换为不换行空格，避免 FTB Quests 在空格处错误折行
+        "name": "quest_nbsp",
+        "paths": ["quests"],
+        "unless": {
+            "json_like": True,
+            "contains": ["image", '"color": '],
+            "startswith": ['["'],
+        },
+        "replace": (" ", "\u00a0"),
+    },
+]
+
+
+@dataclass
+class RuleStats:
+    hits: int = 0
+    skips: int = 0
+    seconds: float = 0.0
+
+
+class CompiledRule:
+    """由单条规则声明编译而来，跳过条件被合并为一个正则，每条译文只需搜索一次。"""
+
+    def __init__(self, spec: dict):
+        self.name: str = spec["name"]
+        self.paths: list[str] = spec.get("paths", ["*"])
+        self.old, self.new = spec["replace"]
+
+        unless = spec.get("unless", {})
+        alternatives = []
+        if unless.get("json_like"):
+            alternatives.append(r"\A\s*\{.*\}\s*\Z")
+        alternatives += [r"\A" + re.escape(p) for p in unless.get("startswith", [])]
+        alternatives += [re.escape(s) for s in unless.get("contains", [])]
+        self.guard: Optional[re.Pattern] = (
+            re.compile("|".join(alternatives), re.DOTALL) if alternatives else None
+        )
+
+    def applies_to(self, path: str) -> bool:
+        return any(p == "*" or p in path for p in self.paths)
+
+
+class ValuePostProcessor:
+    """
+    将 VALUE_RULES 编译为按文件路径缓存的规则链，并统计每条规则的命中次数与耗时。
+    """
+
+    def __init__(self, rules: list[dict]):
+        self.rules = [CompiledRule(spec) for spec in rules]
+        self.stats = {rule.name: RuleStats() for rule in self.rules}
+        self._chains: dict[str, Callable[[str], str]] = {}
+
+    def for_path(self, path: str) -> Callable[[str], str]:
+        """返回适用于该文件路径的处理函数，同一路径只编译一次。"""
+        chain = self._chains.get(path)
+        if chain is None:
+            chain = self._build_chain([r for r in self.rules if r.applies_to(path)])
+            self._chains[path] = chain
+        return chain
+
+    def _build_chain(self, rules: list[CompiledRule]) -> Callable[[str], str]:
+        stats = self.stats
+        perf_counter = time.perf_counter
+
+        def apply(value: str) -> str:
+            for rule in rules:
+                start = perf_counter()
+                rule_stats = stats[rule.name]
+                if rule.guard is not None and rule.guard.search(value):
+                    rule_stats.skips += 1
+                elif rule.old in value:
+                    value = value.replace(rule.old, rule.new)
+                    rule_stats.hits += 1
+                rule_stats.seconds += perf_counter() - start
+            return value
+
+        return apply
+
+    def report(self) -> None:
+        print("\n译文后处理规则统计：")
+        for name, rule_stats in self.stats.items():
+            print(
+                f"  -> {name}: 命中 {rule_stats.hits} 次，跳过 {rule_stats.skips} 次，"
+                f"耗时 {rule_stats.seconds * 1000:.1f} ms"
+            )
+
+
+value_post_processor = ValuePostProcessor(VALUE_RULES)
+
 
 def fetch_json(url: str, headers: dict[str, str]) -> list[dict[str, str]]:
     response = requests.get(url, headers=headers)
@@ -68,13 +177,14 @@ def get_files() -> None:
         file_path_list.append(file["name"])
 
 
-def save_translation(zh_cn_dict: dict[str, str], path: Path) -> None:
+def save_translation(zh_cn_dict: dict[str, str], path: Path) -> Path:
     """
     保存翻译内容到指定的 JSON 文件，并保持与源文件完全相同的格式。
     （已修复 \n 等转义字符被错误解析的问题）
 
     :param zh_cn_dict: 翻译内容的字典
     :param path: 原始文件路径
+    :return: 写入的文件路径
     """
     dir_path = Path("CNPack") / path.parent
     dir_path.mkdir(parents=True, exist_ok=True)
@@ -125,6 +235,8 @@ def save_translation(zh_cn_dict: dict[str, str], path: Path) -> None:
                 sort_keys=True,
             )
 
+    return file_path
+
 
 def process_translation(file_id: int, path: Path) -> dict[str, str]:
     """
@@ -181,25 +293,11 @@ def process_translation(file_id: int, path: Path) -> dict[str, str]:
         print(f"错误: 无法读取文件 {source_file_path}: {e}")
         sys.exit(1)
 
-    # 检查路径是否包含quests
-    is_quest_file = "quests" in str(path)
+    # 按文件路径取得已编译的后处理规则链（见 VALUE_RULES）
+    post_process = value_post_processor.for_path(str(path))
 
     for key, value in zip(keys, values):
-        value = re.sub(r'\\"', '"', value)
-
-        # 增加一个判断：如果值像一个JSON对象（以{开头，以}结尾），则跳过全局替换
-        is_json_like = value.strip().startswith("{") and value.strip().endswith("}")
-
-        if (
-            is_quest_file
-            and not is_json_like
-            and "image" not in value
-            and not value.startswith('["')
-            and '"color": ' not in value
-        ):
-            value = value.replace(" ", "\u00a0")
-
-        zh_cn_dict[key] = value
+        zh_cn_dict[key] = post_process(value)
 
     return zh_cn_dict
 
@@ -208,14 +306,25 @@ def main() -> None:
     get_files()
     ftb_quests_lang_dir = None  # 用于记录FTB Quests语言文件所在的目录
 
+    # 配置了 OpenCC 词典时，zh_hk / zh_tw 由 zh_cn 在本地转换生成，不再从 Paratranz 下载
+    converters = load_converters()
+    if converters:
+        print("已启用本地简繁转换，将由 zh_cn 生成 zh_hk / zh_tw。")
+
     for file_id, path_str in zip(file_id_list, file_path_list):
         if "TM" in path_str:  # 跳过 TM 文件
             continue
+        if converters and any(lang in path_str for lang in TARGET_LANGUAGES):
+            continue
 
         path = Path(path_str)
         zh_cn_dict = process_translation(file_id, path)
 
-        save_translation(zh_cn_dict, path)
+        saved_path = save_translation(zh_cn_dict, path)
+
+        # 任务文本的临时 JSON 会在合并后被删除，只需转换合并后的 SNBT
+        if converters and "kubejs/assets/quests/lang/" not in path_str:
+            derive_variants(saved_path, converters)
 
         # 打印日志时，文件名也相应地从 en_us 变为 zh_cn
         log_path = re.sub("en_us", "zh_cn", path_str)
@@ -267,6 +376,12 @@ def main() -> None:
 
         print(f"SNBT 合并完成，文件已生成于: {output_snbt_file}")
 
+        if converters and os.path.exists(output_snbt_file):
+            for variant_file in derive_variants(Path(output_snbt_file), converters):
+                print(f"已由 zh_cn 转换生成: {variant_file}")
+
+    value_post_processor.report()
+
 
 if __name__ == "__main__":
     main()
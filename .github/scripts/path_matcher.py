@@ -0,0 +1,101 @@
+"""
+Compiled gitignore-style path matcher.
+
+An ordered list of (pattern, value) rules is compiled into a single regular
+expression. Every rule becomes a named alternative, and the alternatives are
+joined in reverse order, so the first alternative that fully matches a path is
+the *last* rule that matches it, which is gitignore's "last match wins".
+Classifying a path is one regex call no matter how many rules there are.
+
+Pattern semantics follow .gitignore:
+  - '*' and '?' never cross '/', '[...]' is a character class ('[!...]' negates)
+  - a pattern containing a '/' (other than a trailing one) is anchored to the
+    root; otherwise it matches the file or directory name at any depth
+  - '**/' matches any number of leading directories, '/**/' zero or more
+    directories in the middle, and a trailing '/**' everything inside
+  - a pattern matching a directory also matches everything inside it; a
+    trailing '/' restricts the pattern to directories
+  - a leading '!' negates a pattern (see PathMatcher.from_gitignore)
+"""
+
+import re
+from collections.abc import Iterable
+from typing import Any, Optional
+
+
+def _translate_segment(segment: str) -> str:
+    out = []
+    i, n = 0, len(segment)
+    while i < n:
+        c = segment[i]
+        i += 1
+        if c == "*":
+            while i < n and segment[i] == "*":
+                i += 1
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "\\" and i < n:
+            out.append(re.escape(segment[i]))
+            i += 1
+        elif c == "[":
+            j = i + 1 if i < n and segment[i] in "!^" else i
+            j = segment.find("]", j + 1)
+            if j == -1:
+                out.append(re.escape(c))
+                continue
+            body = segment[i:j].replace("\\", "\\\\")
+            if body[0] in "!^":
+                body = "^" + body[1:]
+            out.append(f"(?!/)[{body}]")
+            i = j + 1
+        else:
+            out.append(re.escape(c))
+    return "".join(out)
+
+
+def translate(pattern: str) -> str:
+    """Translates one gitignore-style pattern (without '!') into a regex for posix relative paths."""
+    directory_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    anchored = "/" in pattern
+    segments = pattern.lstrip("/").split("/")
+
+    regex = "" if anchored else "(?:[^/]+/)*"
+    for i, segment in enumerate(segments):
+        last = i == len(segments) - 1
+        if segment == "**":
+            regex += ".*" if last else "(?:[^/]+/)*"
+        else:
+            regex += _translate_segment(segment) + ("" if last else "/")
+    return regex + ("/.+" if directory_only else "(?:/.*)?")
+
+
+class PathMatcher:
+    """Maps a posix relative path to the value of the last rule whose pattern matches it."""
+
+    def __init__(self, rules: Iterable[tuple[str, Any]], default: Any = None):
+        self.rules = list(rules)
+        self.default = default
+        alternatives = [
+            f"(?P<r{i}>{translate(pattern)})"
+            for i, (pattern, _) in reversed(list(enumerate(self.rules)))
+        ]
+        self.regex: Optional[re.Pattern] = (
+            re.compile("|".join(alternatives), re.DOTALL) if alternatives else None
+        )
+
+    @classmethod
+    def from_gitignore(cls, patterns: Iterable[str]) -> "PathMatcher":
+        """Builds a matcher returning True for paths excluded by the patterns ('!' re-includes)."""
+        return cls(
+            ((p[1:], False) if p.startswith("!") else (p, True) for p in patterns),
+            default=False,
+        )
+
+    def match(self, rel_path: str) -> Any:
+        if self.regex is not None:
+            m = self.regex.fullmatch(rel_path)
+            if m is not None:
+                return self.rules[int(m.lastgroup[1:])][1]
+        return self.default
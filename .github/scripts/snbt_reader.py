@@ -0,0 +1,217 @@
+"""
+轻量 SNBT 读取器
+
+为检查脚本提供只读的快速解析：整份文本由一个正则切分为记号，再用显式栈构建
+dict / list / str，不创建 ftb_snbt_lib 的 Tag 对象。未加引号的数值、布尔值等
+按原文以字符串返回，类型化数组（[I; 1, 2]）按普通列表处理。
+
+另外按 LangSpliter 的键名规则，从语言文件与章节文件中取出玩家可见的文本，
+使检查结果可以对应回 Paratranz 上的语言键。
+"""
+
+import re
+from collections.abc import Iterator
+from typing import Union
+
+TOKEN_PATTERN = re.compile(
+    r"""\s+
+    |(?P<string>"[^"\\]*(?:\\.[^"\\]*)*"|'[^'\\]*(?:\\.[^'\\]*)*')
+    |(?P<punct>[{}\[\]:,;])
+    |(?P<bare>[^\s{}\[\]:,;"']+)
+    |(?P<invalid>.)""",
+    re.VERBOSE | re.DOTALL,
+)
+ESCAPE_PATTERN = re.compile(r"\\([\"'\\])")
+
+# 语言文件的形状固定为 “键: 字符串” 或 “键: [字符串, ...]”，可以逐条目整体匹配
+_STRING = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+LANG_ENTRY_PATTERN = re.compile(
+    rf"""\s*(?:({_STRING})|([^\s{{}}\[\]:,;"']+))\s*:\s*
+    (?:({_STRING})|\[((?:\s*{_STRING}\s*,?)*)\s*\])\s*,?""",
+    re.VERBOSE,
+)
+LANG_LINE_PATTERN = re.compile(_STRING)
+LANG_OPEN_PATTERN = re.compile(r"\s*\{")
+LANG_CLOSE_PATTERN = re.compile(r"\s*\}\s*\Z")
+
+SNBTValue = Union[dict, list, str]
+
+
+class SNBTError(ValueError):
+    pass
+
+
+def unescape(token: str) -> str:
+    """去掉引号并还原 \\" 与 \\\\，与 LangSpliter.unescape_string 的处理一致。"""
+    text = token[1:-1]
+    return ESCAPE_PATTERN.sub(r"\1", text) if "\\" in text else text
+
+
+def loads(text: str) -> SNBTValue:
+    # 栈中每一帧为 [容器, 等待赋值的键]
+    stack: list[list] = []
+    result = None
+    done = False
+    expect_colon = False
+
+    def add(value):
+        nonlocal result, done, expect_colon
+        if not stack:
+            if done:
+                raise SNBTError("SNBT 顶层存在多个值")
+            result, done = value, True
+            return
+        frame = stack[-1]
+        container = frame[0]
+        if isinstance(container, list):
+            container.append(value)
+        elif frame[1] is None:
+            if not isinstance(value, str):
+                raise SNBTError("SNBT 复合标签的键必须是字符串")
+            frame[1] = value
+            expect_colon = True
+        else:
+            container[frame[1]] = value
+            frame[1] = None
+
+    for match in TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if kind is None:
+            continue
+        token = match.group()
+        if expect_colon:
+            if token != ":":
+                raise SNBTError(f"第 {match.start()} 个字符处缺少 ':'")
+            expect_colon = False
+            continue
+        if kind == "string":
+            add(unescape(token))
+        elif kind == "bare":
+            add(token)
+        elif kind == "invalid":
+            raise SNBTError(f"第 {match.start()} 个字符处存在未闭合的字符串")
+        elif token in "{[":
+            stack.append([{} if token == "{" else [], None])
+        elif token in "}]":
+            if not stack:
+                raise SNBTError(
+                    f"第 {match.start()} 个字符处的 '{token}' 没有对应的开括号"
+                )
+            container, pending_key = stack.pop()
+            if pending_key is not None or isinstance(container, dict) != (token == "}"):
+                raise SNBTError(f"第 {match.start()} 个字符处的 '{token}' 不匹配")
+            add(container)
+        elif token == ";":
+            # 类型化数组的类型前缀，如 [I; 1, 2] 中的 I
+            if stack and isinstance(stack[-1][0], list):
+                stack[-1][0].clear()
+        elif token == ":":
+            raise SNBTError(f"第 {match.start()} 个字符处存在多余的 ':'")
+
+    if stack or not done:
+        raise SNBTError("SNBT 文本不完整")
+    return result
+
+
+def loads_lang(text: str) -> dict[str, Union[str, list[str]]]:
+    """
+    按语言文件的固定形状整条目匹配，比逐记号解析快一个数量级；
+    文本不符合该形状时退回通用的 loads。
+    """
+    opening = LANG_OPEN_PATTERN.match(text)
+    if opening is None:
+        return loads(text)
+    data: dict[str, Union[str, list[str]]] = {}
+    pos = opening.end()
+    match_entry = LANG_ENTRY_PATTERN.match
+    while True:
+        match = match_entry(text, pos)
+        if match is None:
+            break
+        quoted_key, bare_key, string, lines = match.groups()
+        key = unescape(quoted_key) if quoted_key else bare_key
+        if string is not None:
+            data[key] = unescape(string)
+        else:
+            data[key] = [unescape(line) for line in LANG_LINE_PATTERN.findall(lines)]
+        pos = match.end()
+    if LANG_CLOSE_PATTERN.match(text, pos) is None:
+        return loads(text)
+    return data
+
+
+def load(path: str) -> SNBTValue:
+    with open(path, "r", encoding="utf-8") as f:
+        return loads(f.read())
+
+
+def load_lang(path: str) -> dict[str, Union[str, list[str]]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return loads_lang(f.read())
+
+
+def _lines(key: str, value) -> Iterator[tuple[str, str]]:
+    """字符串对应单个键，列表的每一行对应 “键 + 两位行号”。"""
+    if isinstance(value, str):
+        yield key, value
+    elif isinstance(value, list):
+        for i, line in enumerate(value, 1):
+            if isinstance(line, str):
+                yield f"{key}{i:02d}", line
+
+
+def iter_lang_entries(data: SNBTValue) -> Iterator[tuple[str, str]]:
+    """展开 FTB Quests 语言文件（如 zh_cn.snbt），键名与拆分后的 JSON 一致。"""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from _lines(key, value)
+
+
+def _iter_components(data, list_key_name: str, item_id: str):
+    if isinstance(data, dict):
+        components = data.get("components")
+        if isinstance(components, dict):
+            name = components.get("minecraft:custom_name")
+            if isinstance(name, str):
+                yield f"{list_key_name}.{item_id}.custom_name", name
+            lore = components.get("minecraft:lore")
+            if isinstance(lore, list):
+                yield from _lines(f"{list_key_name}.{item_id}.lore", lore)
+        for value in data.values():
+            yield from _iter_components(value, list_key_name, item_id)
+    elif isinstance(data, list):
+        for element in data:
+            yield from _iter_components(element, list_key_name, item_id)
+
+
+def iter_chapter_entries(data: SNBTValue) -> Iterator[tuple[str, str]]:
+    """
+    取出章节文件中由 merge_all_to_snbt 回填的文本：图片 hover、任务与奖励物品的
+    custom_name / lore，以及奖励的 feedback_message。
+    """
+    if not isinstance(data, dict):
+        return
+    chapter_id = data.get("id")
+    images = data.get("images")
+    if chapter_id and isinstance(images, list):
+        for i, image in enumerate(images):
+            if isinstance(image, dict) and "hover" in image:
+                yield from _lines(
+                    f"chapter.{chapter_id}.image.{i}.hover", image["hover"]
+                )
+
+    quests = data.get("quests")
+    for quest in quests if isinstance(quests, list) else []:
+        if not isinstance(quest, dict):
+            continue
+        for list_key_name in ("tasks", "rewards"):
+            items = quest.get(list_key_name)
+            for item in items if isinstance(items, list) else []:
+                if not isinstance(item, dict) or "id" not in item:
+                    continue
+                yield from _iter_components(item, list_key_name, item["id"])
+                if list_key_name == "rewards" and "feedback_message" in item:
+                    yield from _lines(
+                        f"reward.{item['id']}.feedback_message",
+                        item["feedback_message"],
+                    )
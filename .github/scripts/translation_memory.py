@@ -0,0 +1,437 @@
+"""
+翻译记忆索引
+
+对 Source 下的所有 en_us 语言文件与 CNPack 下对应的 zh_cn 文件建立索引，
+以规范化后的原文哈希为键，找出在多个文件中重复出现的原文及其已有译文，
+并可为尚未翻译的词条预填已有译文，供上传 Paratranz 前使用。
+
+整合包更新后，还可以基于 MinHash/LSH 近似索引，为新增或改动的原文
+查找最相近的已翻译原文及其译文，作为翻译起点。
+
+用法:
+  python translation_memory.py report [--min-count 2] [--output tm_report.json]
+  python translation_memory.py prefill --output-dir tm_prefill
+  python translation_memory.py fuzzy-index [--index .cache/tm_fuzzy.json]
+  python translation_memory.py suggest --new-dir temp_update/extracted/overrides [--top-k 5]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from minhash import LSHIndex, MinHasher, jaccard, shingles
+
+SOURCE_LANG = "en_us"
+TARGET_LANG = "zh_cn"
+DEFAULT_INDEX_PATH = ".cache/tm_fuzzy.json"
+
+
+def normalize_text(text: str) -> str:
+    """统一空白字符，使排版差异不影响匹配。str.split() 同样会切分任务文本中的不换行空格。"""
+    return " ".join(text.split())
+
+
+def text_digest(text: str) -> str:
+    return hashlib.blake2b(
+        normalize_text(text).encode("utf-8"), digest_size=16
+    ).hexdigest()
+
+
+@dataclass
+class TMEntry:
+    file: str  # 相对 Source 的源文件路径
+    key: str
+    original: str
+    translation: Optional[str]  # 未翻译时为 None
+
+    @property
+    def translated(self) -> bool:
+        return self.translation is not None
+
+
+def target_path_for(source_rel: str, lang: str = TARGET_LANG) -> str:
+    """与 para2github.save_translation 保持一致：文件名中的 en_us 替换为目标语言。"""
+    path = Path(source_rel)
+    return (path.parent / path.name.replace(SOURCE_LANG, lang)).as_posix()
+
+
+def load_lang_json(path: Path) -> dict[str, str]:
+    try:
+        with open(path, "r", encoding="utf-8-sig") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"警告：读取 {path} 失败：{e}", file=sys.stderr)
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {k: v for k, v in data.items() if isinstance(v, str)}
+
+
+class TranslationMemory:
+    def __init__(self):
+        self.entries: list[TMEntry] = []
+        self.index: dict[str, list[TMEntry]] = defaultdict(list)
+
+    def add(self, entry: TMEntry) -> None:
+        self.entries.append(entry)
+        self.index[text_digest(entry.original)].append(entry)
+
+    @classmethod
+    def build(
+        cls, source_dir: str = "Source", target_dir: str = "CNPack"
+    ) -> "TranslationMemory":
+        tm = cls()
+        source_root = Path(source_dir)
+        target_root = Path(target_dir)
+        for source_file in sorted(source_root.rglob(f"*{SOURCE_LANG}*.json")):
+            rel = source_file.relative_to(source_root).as_posix()
+            originals = load_lang_json(source_file)
+            target_file = target_root / target_path_for(rel)
+            translations = load_lang_json(target_file) if target_file.exists() else {}
+            for key, original in originals.items():
+                translation = translations.get(key)
+                # para2github 对未翻译词条回填原文，因此与原文相同视为未翻译
+                if translation is not None and (
+                    not translation.strip()
+                    or normalize_text(translation) == normalize_text(original)
+                ):
+                    translation = None
+                tm.add(TMEntry(rel, key, original, translation))
+        return tm
+
+    def lookup(self, original: str) -> list[TMEntry]:
+        return self.index.get(text_digest(original), [])
+
+    def best_translation(self, original: str) -> Optional[str]:
+        """返回同一原文最常用的译文；尚无译文时返回 None。"""
+        counts = Counter(e.translation for e in self.lookup(original) if e.translated)
+        return counts.most_common(1)[0][0] if counts else None
+
+    def duplicates(self, min_count: int = 2) -> Iterator[list[TMEntry]]:
+        """按出现次数从多到少，产出在至少 min_count 个位置出现的原文分组。"""
+        groups = [g for g in self.index.values() if len(g) >= min_count]
+        groups.sort(key=lambda g: (-len(g), normalize_text(g[0].original)))
+        yield from groups
+
+    def prefill(self) -> dict[str, list[dict[str, str]]]:
+        """
+        为未翻译词条查找已有译文，返回以 Paratranz 文件路径为键的词条列表，
+        格式与 Paratranz 的 JSON 译文导入一致。
+        """
+        result: dict[str, list[dict[str, str]]] = defaultdict(list)
+        for group in self.index.values():
+            counts = Counter(e.translation for e in group if e.translated)
+            if not counts:
+                continue
+            translation = counts.most_common(1)[0][0]
+            for entry in group:
+                if entry.translated:
+                    continue
+                result[target_path_for(entry.file)].append(
+                    {
+                        "key": entry.key,
+                        "original": entry.original,
+                        "translation": translation,
+                    }
+                )
+        return dict(result)
+
+
+def sources_stamp(source_dir: str = "Source", target_dir: str = "CNPack") -> str:
+    """
+    建立翻译记忆所读取的全部原文与译文文件的 (路径, 大小, 修改时间) 摘要，
+    任一文件新增、删除或改动后摘要即不同，用于判断持久化的索引是否过期。
+    """
+    sha256 = hashlib.sha256()
+    source_root = Path(source_dir)
+    target_root = Path(target_dir)
+    for source_file in sorted(source_root.rglob(f"*{SOURCE_LANG}*.json")):
+        rel = source_file.relative_to(source_root).as_posix()
+        for path in (source_file, target_root / target_path_for(rel)):
+            try:
+                stat = path.stat()
+                sha256.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+            except OSError:
+                sha256.update(f"{path}\0-\n".encode())
+    return sha256.hexdigest()
+
+
+class FuzzyIndex:
+    """
+    已翻译原文的近似匹配索引，可持久化为 JSON 以免每次重新计算签名。
+    持久化时一并记录 sources_stamp，原文或译文改动后加载将返回 None。
+    """
+
+    def __init__(self, num_perm: int = 32, bands: int = 16):
+        self.num_perm = num_perm
+        self.bands = bands
+        self.hasher = MinHasher(num_perm)
+        self.lsh = LSHIndex(bands, num_perm // bands)
+        self.pairs: list[tuple[str, str]] = []  # (原文, 译文)
+        self.signatures: list[list[int]] = []
+        self._shingles: dict[int, set[int]] = {}
+        self.stamp: Optional[str] = None
+
+    def add(
+        self, original: str, translation: str, signature: Optional[list[int]] = None
+    ) -> None:
+        if signature is None:
+            signature = self.hasher.signature(shingles(original))
+        idx = len(self.pairs)
+        self.pairs.append((original, translation))
+        self.signatures.append(signature)
+        self.lsh.insert(idx, signature)
+
+    @classmethod
+    def from_memory(cls, tm: TranslationMemory) -> "FuzzyIndex":
+        index = cls()
+        for group in tm.index.values():
+            counts = Counter(e.translation for e in group if e.translated)
+            if counts:
+                index.add(group[0].original, counts.most_common(1)[0][0])
+        return index
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "sources": self.stamp,
+                    "num_perm": self.num_perm,
+                    "bands": self.bands,
+                    "pairs": self.pairs,
+                    "signatures": self.signatures,
+                },
+                f,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+
+    @classmethod
+    def load(cls, path: str, stamp: Optional[str] = None) -> Optional["FuzzyIndex"]:
+        """读取索引；给出的 stamp 与建立索引时的摘要不一致（索引已过期）时返回 None。"""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if stamp is not None and data.get("sources") != stamp:
+            return None
+        index = cls(data["num_perm"], data["bands"])
+        index.stamp = data.get("sources")
+        for (original, translation), signature in zip(data["pairs"], data["signatures"]):
+            index.add(original, translation, signature)
+        return index
+
+    def suggest(
+        self, text: str, top_k: int = 5, min_score: float = 0.3
+    ) -> list[tuple[float, str, str]]:
+        """返回 (相似度, 原文, 译文) 列表，按相似度从高到低排列。"""
+        query_shingles = shingles(text)
+        if not query_shingles:
+            return []
+        results = []
+        for idx in self.lsh.query(self.hasher.signature(query_shingles)):
+            candidate = self._shingles.get(idx)
+            if candidate is None:
+                candidate = self._shingles[idx] = shingles(self.pairs[idx][0])
+            score = jaccard(query_shingles, candidate)
+            if score >= min_score:
+                original, translation = self.pairs[idx]
+                results.append((score, original, translation))
+        results.sort(key=lambda r: (-r[0], r[1]))
+        return results[:top_k]
+
+
+def changed_entries(
+    old_dir: str, new_dir: str
+) -> Iterator[tuple[str, str, str, Optional[str]]]:
+    """比较新旧两个目录下的 en_us 语言文件，产出 (文件, 键, 新原文, 旧原文)。"""
+    old_root, new_root = Path(old_dir), Path(new_dir)
+    for new_file in sorted(new_root.rglob(f"*{SOURCE_LANG}*.json")):
+        rel = new_file.relative_to(new_root).as_posix()
+        old_file = old_root / rel
+        old_values = load_lang_json(old_file) if old_file.exists() else {}
+        for key, value in load_lang_json(new_file).items():
+            old_value = old_values.get(key)
+            if old_value != value:
+                yield rel, key, value, old_value
+
+
+def build_report(tm: TranslationMemory, min_count: int) -> list[dict]:
+    report = []
+    for group in tm.duplicates(min_count):
+        translations = Counter(e.translation for e in group if e.translated)
+        report.append(
+            {
+                "original": group[0].original,
+                "count": len(group),
+                "translations": dict(translations.most_common()),
+                "untranslated": sum(1 for e in group if not e.translated),
+                "locations": [f"{e.file}:{e.key}" for e in group],
+            }
+        )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="翻译记忆索引：重复原文统计与译文预填")
+    parser.add_argument("--source-dir", default="Source", help="原文目录 (默认: Source)")
+    parser.add_argument("--target-dir", default="CNPack", help="译文目录 (默认: CNPack)")
+    subparsers = parser.add_subparsers(dest="task", required=True)
+
+    parser_report = subparsers.add_parser("report", help="列出重复出现的原文及已有译文")
+    parser_report.add_argument(
+        "--min-count", type=int, default=2, help="最少出现次数 (默认: 2)"
+    )
+    parser_report.add_argument("--output", help="将完整报告写入 JSON 文件")
+    parser_report.add_argument(
+        "--limit", type=int, default=20, help="在终端中显示的条目数 (默认: 20)"
+    )
+
+    parser_prefill = subparsers.add_parser(
+        "prefill", help="为未翻译词条生成 Paratranz 译文导入文件"
+    )
+    parser_prefill.add_argument(
+        "--output-dir", default="tm_prefill", help="输出目录 (默认: tm_prefill)"
+    )
+
+    parser_fuzzy = subparsers.add_parser(
+        "fuzzy-index", help="构建并保存已翻译原文的近似匹配索引"
+    )
+    parser_fuzzy.add_argument(
+        "--index",
+        default=DEFAULT_INDEX_PATH,
+        help=f"索引文件路径 (默认: {DEFAULT_INDEX_PATH})",
+    )
+
+    parser_suggest = subparsers.add_parser(
+        "suggest", help="为新版整合包中新增或改动的原文推荐相近的已有译文"
+    )
+    parser_suggest.add_argument(
+        "--new-dir", required=True, help="新版本的源文件目录，如 temp_update/extracted/overrides"
+    )
+    parser_suggest.add_argument(
+        "--old-dir", help="旧版本的源文件目录 (默认与 --source-dir 相同)"
+    )
+    parser_suggest.add_argument(
+        "--index",
+        default=DEFAULT_INDEX_PATH,
+        help=f"索引文件路径，不存在或已过期时自动重建 (默认: {DEFAULT_INDEX_PATH})",
+    )
+    parser_suggest.add_argument("--top-k", type=int, default=5, help="每条原文的推荐数")
+    parser_suggest.add_argument(
+        "--min-score", type=float, default=0.3, help="最低相似度 (默认: 0.3)"
+    )
+    parser_suggest.add_argument("--output", help="将推荐结果写入 JSON 文件")
+
+    args = parser.parse_args()
+
+    if args.task == "suggest" and os.path.exists(args.index):
+        start = time.perf_counter()
+        stamp = sources_stamp(args.source_dir, args.target_dir)
+        fuzzy = FuzzyIndex.load(args.index, stamp)
+        if fuzzy is not None:
+            print(
+                f"已加载近似索引 {args.index}：{len(fuzzy.pairs)} 条译文，"
+                f"耗时 {(time.perf_counter() - start) * 1000:.1f} ms"
+            )
+            suggest_changes(fuzzy, args)
+            return
+        print(f"近似索引 {args.index} 对应的原文或译文已改动，重新构建。")
+
+    start = time.perf_counter()
+    tm = TranslationMemory.build(args.source_dir, args.target_dir)
+    elapsed = time.perf_counter() - start
+    print(
+        f"索引构建完成：{len(tm.entries)} 条词条，{len(tm.index)} 条不同原文，"
+        f"耗时 {elapsed * 1000:.1f} ms"
+    )
+
+    if args.task == "report":
+        report = build_report(tm, args.min_count)
+        inconsistent = sum(1 for r in report if len(r["translations"]) > 1)
+        fillable = sum(1 for r in report if r["translations"] and r["untranslated"])
+        print(
+            f"共有 {len(report)} 条原文重复出现，其中 {inconsistent} 条存在不一致的译文，"
+            f"{fillable} 条可直接预填。"
+        )
+        for item in report[: args.limit]:
+            translations = " / ".join(item["translations"]) or "(未翻译)"
+            print(f"  [{item['count']}] {item['original']!r} -> {translations}")
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"完整报告已写入: {args.output}")
+
+    elif args.task == "prefill":
+        prefill = tm.prefill()
+        total = 0
+        for file_path, items in sorted(prefill.items()):
+            output_path = os.path.join(args.output_dir, file_path)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump(items, f, ensure_ascii=False, indent=2)
+            total += len(items)
+            print(f"  -> {file_path}: 预填 {len(items)} 条")
+        print(f"共为 {total} 条未翻译词条预填了译文，输出目录: {args.output_dir}")
+
+    elif args.task in ("fuzzy-index", "suggest"):
+        start = time.perf_counter()
+        fuzzy = FuzzyIndex.from_memory(tm)
+        fuzzy.stamp = sources_stamp(args.source_dir, args.target_dir)
+        fuzzy.save(args.index)
+        print(
+            f"近似索引已写入 {args.index}：{len(fuzzy.pairs)} 条译文，"
+            f"耗时 {(time.perf_counter() - start) * 1000:.1f} ms"
+        )
+        if args.task == "suggest":
+            suggest_changes(fuzzy, args)
+
+
+def suggest_changes(fuzzy: FuzzyIndex, args: argparse.Namespace) -> None:
+    start = time.perf_counter()
+    results = []
+    for rel, key, value, old_value in changed_entries(
+        args.old_dir or args.source_dir, args.new_dir
+    ):
+        suggestions = fuzzy.suggest(value, args.top_k, args.min_score)
+        results.append(
+            {
+                "file": rel,
+                "key": key,
+                "original": value,
+                "previous": old_value,
+                "suggestions": [
+                    {"score": round(score, 3), "original": original, "translation": translation}
+                    for score, original, translation in suggestions
+                ],
+            }
+        )
+    elapsed = time.perf_counter() - start
+
+    matched = sum(1 for r in results if r["suggestions"])
+    print(
+        f"共有 {len(results)} 条新增或改动的原文，其中 {matched} 条找到了相近译文，"
+        f"耗时 {elapsed * 1000:.1f} ms"
+    )
+    for item in results:
+        if not item["suggestions"]:
+            continue
+        best = item["suggestions"][0]
+        print(f"  {item['file']}:{item['key']}")
+        print(f"    原文: {item['original']!r}")
+        print(f"    参考: [{best['score']:.2f}] {best['original']!r} -> {best['translation']!r}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"推荐结果已写入: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,31 @@
 import os
 import sys
 import json
+import time
+import hashlib
+import zlib
 import zipfile
 import shutil
-import filecmp
+import argparse
 import requests
 import re
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from compare_archives import ArchiveComparator, DirectorySide
+from download_cache import DownloadCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, cache_key, curseforge_expected_hashes
+from lang_diff import build_changeset, is_diffable, summarize_changeset, write_changeset
+from path_matcher import PathMatcher
+
+HASH_BUFFER_SIZE = 1024 * 1024
+MANIFEST_VERSION = 2
+DEFAULT_MANIFEST_PATH = '.github/configs/source_manifest.json'
+IGNORED_NAMES = {'.DS_Store'}
+# Per-pack phase timings of the last run, kept out of the work tree
+METRICS_PATH = '.cache/update_metrics.json'
+
 
 def set_github_output(name, value):
     """Sets an output variable for GitHub Actions."""
@@ -36,25 +53,98 @@ def run_command(command):
         raise RuntimeError(f"Command failed with exit code {e.returncode}:\nStdout: {e.stdout}\nStderr: {e.stderr}")
 
 
-def get_file_hash(filepath):
-    """Computes SHA256 hash of a file."""
-    import hashlib
+def hash_stream(f, buffer_size=HASH_BUFFER_SIZE):
+    """Reads a binary stream once and returns its manifest entry (size, SHA256 and CRC32)."""
     h = hashlib.sha256()
-    with open(filepath, 'rb') as f:
-        for chunk in iter(lambda: f.read(4096), b""): h.update(chunk)
-    return h.hexdigest()
+    crc = 0
+    size = 0
+    while True:
+        chunk = f.read(buffer_size)
+        if not chunk: break
+        h.update(chunk)
+        crc = zlib.crc32(chunk, crc)
+        size += len(chunk)
+    return {'size': size, 'sha256': h.hexdigest(), 'crc32': crc}
+
+def get_file_hash(filepath):
+    """Computes the manifest entry of a file, reading it once with a large buffer."""
+    with open(filepath, 'rb', buffering=0) as f:
+        return hash_stream(f)
 
-def download_file(url, dest_path):
-    """Downloads a file from a URL to a destination path."""
-    print(f"Downloading from {url} to {dest_path}...")
+def report_throughput(action, count, total_bytes, elapsed):
+    rate = total_bytes / elapsed / 1024 / 1024 if elapsed > 0 else float('inf')
+    print(f"{action} {count} files ({total_bytes / 1024 / 1024:.1f} MB) in {elapsed:.2f}s ({rate:.1f} MB/s).")
+
+def hash_files(paths, root):
+    """
+    Hashes files in parallel (hashlib and zlib release the GIL on large buffers) and returns
+    {relative posix path: manifest entry}. Prints the achieved throughput.
+    """
+    paths = sorted(paths)
+    if not paths: return {}
+    start = time.perf_counter()
+    with ThreadPoolExecutor() as executor:
+        results = list(executor.map(get_file_hash, paths))
+    report_throughput("Hashed", len(paths), sum(e['size'] for e in results), time.perf_counter() - start)
+    return {p.relative_to(root).as_posix(): entry for p, entry in zip(paths, results)}
+
+def walk_files(root):
+    """Walks a directory tree once, yielding the posix relative path of every regular file except OS metadata files."""
+    for dirpath, _, filenames in os.walk(root):
+        rel_dir = Path(dirpath).relative_to(root).as_posix()
+        prefix = '' if rel_dir == '.' else rel_dir + '/'
+        for name in filenames:
+            if name not in IGNORED_NAMES: yield prefix + name
+
+def build_attention_matcher(attention_list):
+    """
+    Compiles the attention list into one PathMatcher whose value is the rule's ignoreDeletions flag.
+    File patterns are anchored at the pack root like Path.glob, folders match everything inside them.
+    """
+    rules = [('/' + item['pattern'].lstrip('/'), item.get('ignoreDeletions', False))
+             for item in attention_list.get('filePatterns', [])]
+    rules += [('/' + item['path'].strip('/') + '/', item.get('ignoreDeletions', False))
+              for item in attention_list.get('folders', [])]
+    return PathMatcher(rules)
+
+def load_manifest(manifest_path):
+    """Loads the committed content manifest of the source tree; returns an empty one if missing or outdated."""
     try:
-        with requests.get(url, stream=True) as r:
-            r.raise_for_status()
-            with open(dest_path, 'wb') as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    f.write(chunk)
-    except requests.exceptions.RequestException as e:
-        raise RuntimeError(f"Failed to download file: {e}")
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') == MANIFEST_VERSION: return data.get('files', {})
+        print(f"Warning: Manifest {manifest_path} has an unsupported version, ignoring it.")
+    except FileNotFoundError:
+        print(f"Warning: Manifest {manifest_path} not found, old files will be hashed directly.")
+    except json.JSONDecodeError as e:
+        print(f"Warning: Could not parse manifest {manifest_path}: {e}")
+    return {}
+
+def save_manifest(manifest_path, files):
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'algorithm': 'sha256', 'files': dict(sorted(files.items()))}, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+
+def lookup_old_hashes(rel_paths, source_dir, manifest):
+    """Returns manifest entries for the given old files, hashing only those the manifest does not cover."""
+    entries, missing = {}, []
+    for rel in rel_paths:
+        entry = manifest.get(rel)
+        if entry is None: missing.append(source_dir / rel)
+        else: entries[rel] = entry
+    if missing:
+        print(f"Warning: {len(missing)} files under {source_dir} are not in the manifest, hashing them directly.")
+        hashed = hash_files(missing, source_dir)
+        entries.update(hashed)
+        manifest.update(hashed)
+    return entries
+
+def load_config(config_path):
+    """Loads modpack.json, ignoring whole-line // comments (the config ships with one as a reminder)."""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        text = ''.join(line for line in f if not line.lstrip().startswith('//'))
+    return json.loads(text)
 
 def extract_clean_version(full_name, pattern):
     """
@@ -83,13 +173,247 @@ def reconstruct_full_name(clean_version, pattern):
     return pattern.replace('{version}', clean_version)
 
 
-def compare_folders(dcmp, added_files, deleted_files, changed_files):
-    for name in dcmp.right_only: added_files.add(Path(dcmp.right) / name)
-    for name in dcmp.left_only: deleted_files.add(Path(dcmp.left) / name)
-    for name in dcmp.diff_files: changed_files.add(Path(dcmp.right) / name)
-    for sub_dcmp in dcmp.subdirs.values(): compare_folders(sub_dcmp, added_files, deleted_files, changed_files)
+class ExtractedSide(DirectorySide):
+    """The new source tree extracted to disk (the legacy --extract-all mode)."""
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.hashes = {}
+
+    def files(self):
+        return walk_files(self.root)
+
+    def find_changed(self, rel_paths, old_hashes):
+        self.hashes = hash_files([self.root / rel for rel in rel_paths], self.root)
+        return {rel for rel in rel_paths if old_hashes[rel]['sha256'] != self.hashes[rel]['sha256']}
+
+    def place(self, rel, dest):
+        """Moves an extracted file into place; returns its manifest entry and whether it was 'moved' or 'copied'."""
+        try:
+            os.replace(self.root / rel, dest)
+            how = 'moved'
+        except OSError:
+            # Different filesystem (or no rename permission): fall back to copying
+            shutil.copy2(self.root / rel, dest)
+            how = 'copied'
+        return self.hashes.get(rel) or get_file_hash(dest), how
+
+
+class ZipSide:
+    """
+    The new source tree read straight from the pack archive. Attended members are selected from the
+    central directory, and the stored CRC32/size rule out changed files before anything is decompressed.
+    """
+
+    def __init__(self, zip_path, root, prefix='overrides/'):
+        self.zip = zipfile.ZipFile(zip_path, 'r')
+        self.root = root
+        self.members = {
+            info.filename[len(prefix):]: info for info in self.zip.infolist()
+            if info.filename.startswith(prefix) and not info.is_dir()
+            and info.filename.rsplit('/', 1)[-1] not in IGNORED_NAMES
+        }
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def close(self):
+        self.zip.close()
+
+    def files(self):
+        return iter(self.members)
+
+    def find_changed(self, rel_paths, old_hashes):
+        changed, candidates = set(), []
+        for rel in rel_paths:
+            info, old = self.members[rel], old_hashes[rel]
+            if info.file_size != old['size'] or ('crc32' in old and info.CRC != old['crc32']):
+                changed.add(rel)
+            else:
+                candidates.append(rel)
+        # Same size and CRC32: confirm with SHA256, streaming the member without writing it to disk
+        start = time.perf_counter()
+        for rel in candidates:
+            with self.zip.open(self.members[rel]) as f:
+                entry = hash_stream(f)
+            self.bytes_read += entry['size']
+            if entry['sha256'] != old_hashes[rel]['sha256']: changed.add(rel)
+        print(f"CRC32/size prefilter: {len(rel_paths) - len(candidates)} of {len(rel_paths)} attended files changed without hashing.")
+        if candidates:
+            report_throughput("Streamed and hashed", len(candidates), sum(self.members[r].file_size for r in candidates), time.perf_counter() - start)
+        return changed
+
+    def read_bytes(self, rel):
+        data = self.zip.read(self.members[rel])
+        self.bytes_read += len(data)
+        return data
+
+    def size(self, rel):
+        return self.members[rel].file_size
+
+    def place(self, rel, dest):
+        """Decompresses a member into place while hashing it; archive members can only be written ('copied')."""
+        with self.zip.open(self.members[rel]) as src, open(dest, 'wb') as out:
+            h = hashlib.sha256()
+            crc = 0
+            size = 0
+            while True:
+                chunk = src.read(HASH_BUFFER_SIZE)
+                if not chunk: break
+                out.write(chunk)
+                h.update(chunk)
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+        self.bytes_read += size
+        self.bytes_written += size
+        return {'size': size, 'sha256': h.hexdigest(), 'crc32': crc}, 'copied'
+
+
+def report_compare_cost(new_side, zip_path, extracted_size, elapsed):
+    """Reports wall time and disk usage of the comparison, against what extracting the whole pack costs."""
+    archive_mb = zip_path.stat().st_size / 1024 / 1024
+    if isinstance(new_side, ExtractedSide):
+        print(f"Extract-all mode: compared and applied in {elapsed:.2f}s, "
+              f"{extracted_size / 1024 / 1024:.1f} MB extracted to disk next to the {archive_mb:.1f} MB archive.")
+    else:
+        new_side.close()
+        print(f"Zip-native mode: compared and applied in {elapsed:.2f}s, "
+              f"{new_side.bytes_read / 1024 / 1024:.1f} MB decompressed, {new_side.bytes_written / 1024 / 1024:.1f} MB written to disk "
+              f"(extract-all would write {extracted_size / 1024 / 1024:.1f} MB next to the {archive_mb:.1f} MB archive).")
+
+def classify_files(files, attention):
+    """Returns {rel path: ignoreDeletions} for the attended files of one tree, matching each path once."""
+    attended = {}
+    for rel in files:
+        ignore_deletions = attention.match(rel)
+        if ignore_deletions is not None: attended[rel] = ignore_deletions
+    return attended
+
+def detect_changes(attention, exclusion, source_dir, new_side, manifest):
+    """
+    Compares the attention paths of the new pack against the source tree by content.
+    Each tree is walked once and every path is classified by the compiled attention and exclusion matchers.
+    Old files are looked up in the manifest, so only the new side is read and stat differences never count as changes.
+    Excluded files are never added or updated, but their presence in the new pack still prevents deletion.
+    Returns (updated, added, deleted) as paths under new_side.root / source_dir.
+    """
+    old_files = classify_files(walk_files(source_dir), attention) if source_dir.is_dir() else {}
+    new_files = classify_files(new_side.files(), attention)
+    wanted = {rel for rel in new_files if not exclusion.match(rel)}
+
+    common = sorted(rel for rel in wanted if rel in old_files)
+    old_hashes = lookup_old_hashes(common, source_dir, manifest)
+    # Files only in the new pack are not read here, only once when they are copied
+    changed = new_side.find_changed(common, old_hashes)
+
+    updated = {new_side.root / rel for rel in changed}
+    added = {new_side.root / rel for rel in wanted if rel not in old_files}
+    deleted = {source_dir / rel for rel, ignore_deletions in old_files.items()
+               if rel not in new_files and not ignore_deletions}
+    return updated, added, deleted
+
+def iter_diff_pairs(updated, added, deleted, source_dir, new_side):
+    """Yields (rel path, old bytes, new bytes) of the lang and quest files to diff; must run before the update is applied."""
+    for path in sorted(updated | added):
+        rel = path.relative_to(new_side.root).as_posix()
+        if is_diffable(rel):
+            yield rel, (source_dir / rel).read_bytes() if path in updated else None, new_side.read_bytes(rel)
+    for path in sorted(deleted):
+        rel = path.relative_to(source_dir).as_posix()
+        if is_diffable(rel): yield rel, path.read_bytes(), None
+
+def remove_empty_parents(path, stop_at):
+    """Removes directories left empty after deleting a file, up to (but excluding) stop_at."""
+    parent = path.parent
+    while parent != stop_at and parent.is_dir() and not any(parent.iterdir()):
+        parent.rmdir()
+        parent = parent.parent
+
+class ShadowApply:
+    """
+    Stages an update of the source tree in a sibling shadow directory and swaps it in with renames, so a failed
+    update never leaves the source tree half-applied. Unchanged files are hardlinked into the shadow, files of an
+    extracted pack are renamed into it, and only archive members have to be written.
+    A swap interrupted between its two renames is completed or rolled back by recover() on the next run.
+    """
+
+    def __init__(self, source_dir):
+        self.source_dir = source_dir
+        self.shadow = source_dir.with_name(source_dir.name + '.staging')
+        self.backup = source_dir.with_name(source_dir.name + '.previous')
+        self.stats = {how: [0, 0] for how in ('linked', 'moved', 'copied', 'deleted')}
+
+    def recover(self):
+        if self.backup.exists():
+            if self.source_dir.exists():
+                shutil.rmtree(self.backup)
+            else:
+                print(f"Warning: Restoring {self.source_dir} from an interrupted update.")
+                os.rename(self.backup, self.source_dir)
+        shutil.rmtree(self.shadow, ignore_errors=True)
+
+    def __enter__(self):
+        self.recover()
+        self.start = time.perf_counter()
+        self.shadow.mkdir(parents=True)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            shutil.rmtree(self.shadow, ignore_errors=True)
+            return False
+        self.swap()
+        return False
+
+    def _count(self, how, size):
+        self.stats[how][0] += 1
+        self.stats[how][1] += size
+
+    def link_unchanged(self, skip):
+        """Mirrors the source tree into the shadow with hardlinks, leaving out the files in `skip`."""
+        if not self.source_dir.is_dir(): return
+        for dirpath, _, filenames in os.walk(self.source_dir):
+            rel_dir = Path(dirpath).relative_to(self.source_dir)
+            (self.shadow / rel_dir).mkdir(exist_ok=True)
+            for name in filenames:
+                rel = (rel_dir / name).as_posix()
+                if rel in skip: continue
+                src, dest = Path(dirpath) / name, self.shadow / rel_dir / name
+                try:
+                    os.link(src, dest)
+                    self._count('linked', src.stat().st_size)
+                except OSError:
+                    shutil.copy2(src, dest)
+                    self._count('copied', dest.stat().st_size)
+
+    def place(self, rel, new_side):
+        dest = self.shadow / rel
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        entry, how = new_side.place(rel, dest)
+        self._count(how, entry['size'])
+        return entry
+
+    def drop(self, rel):
+        """A deleted file is simply not staged; directories it leaves empty are removed from the shadow."""
+        self._count('deleted', 0)
+        remove_empty_parents(self.shadow / rel, self.shadow)
 
-def generate_pr_body(pack_name, new_version, updated, added, deleted, source_root, new_root):
+    def swap(self):
+        if self.source_dir.exists(): os.rename(self.source_dir, self.backup)
+        try:
+            os.rename(self.shadow, self.source_dir)
+        except OSError:
+            if self.backup.exists(): os.rename(self.backup, self.source_dir)
+            raise
+        shutil.rmtree(self.backup, ignore_errors=True)
+
+    def report(self):
+        mb = lambda how: self.stats[how][1] / 1024 / 1024
+        print(f"Applied via shadow tree in {time.perf_counter() - self.start:.2f}s: "
+              f"{self.stats['linked'][0]} files hardlinked ({mb('linked'):.1f} MB), "
+              f"{self.stats['moved'][0]} moved ({mb('moved'):.1f} MB), "
+              f"{self.stats['copied'][0]} written ({mb('copied'):.1f} MB), {self.stats['deleted'][0]} deleted.")
+
+def generate_pr_body(pack_name, new_version, updated, added, deleted, source_root, new_root, changeset_summary=""):
     def simplify_paths(path_set, root_to_strip):
         if not path_set: return set()
         sorted_paths = sorted([Path(p) for p in path_set])
@@ -112,40 +436,90 @@ def generate_pr_body(pack_name, new_version, updated, added, deleted, source_roo
     if updated: body += "### 📝 内容更新的文件\n" + "".join(f"- `{f}`\n" for f in sorted([str(p) for p in updated])) + "\n"
     if added: body += "### ✨ 新增的文件/文件夹\n" + "".join(f"- `{f}`\n" for f in sorted(list(simplify_paths(added, new_root)))) + "\n"
     if deleted: body += "### 🗑️ 被删除的文件/文件夹\n" + "".join(f"- `{f}`\n" for f in sorted(list(simplify_paths(deleted, source_root)))) + "\n"
+    body += changeset_summary
     body += "\n---\n*详细的版本间差异报告将在稍后以评论形式发布。*"
     return body
 
-def apply_exclusion_rules(file_set, exclusion_patterns, root_path):
-    if not exclusion_patterns: return file_set
-    kept_files = set()
-    for file_path in file_set:
-        relative_path = file_path.relative_to(root_path)
-        is_excluded = False
-        for pattern in exclusion_patterns:
-            is_negation = pattern.startswith('!')
-            match_pattern = pattern[1:] if is_negation else pattern
-            if relative_path.match(match_pattern): is_excluded = not is_negation
-        if not is_excluded: kept_files.add(file_path)
-    return kept_files
 
+class PrefixedStream:
+    """
+    Wraps sys.stdout / sys.stderr while several packs are checked concurrently: every complete line a worker
+    thread prints is prefixed with its pack name and written in one piece, so interleaved logs stay readable.
+    """
 
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+        self.lock = threading.Lock()
 
-def main():
-    # --- Configuration and Setup ---
-    api_key = os.getenv('CF_API_KEY')
-        
-    repo_root = Path('.')
-    config_path = repo_root / '.github' / 'configs' / 'modpack.json'
-    with open(config_path, 'r', encoding='utf-8') as f:
-        config = json.load(f)
+    def set_prefix(self, prefix):
+        self.finish()
+        self.local.prefix = prefix
+        self.local.pending = ''
+
+    def write(self, text):
+        prefix = getattr(self.local, 'prefix', None)
+        if prefix is None: return self.stream.write(text)
+        lines = (self.local.pending + text).split('\n')
+        self.local.pending = lines.pop()
+        if lines:
+            with self.lock: self.stream.write(''.join(f"{prefix}{line}\n" for line in lines))
+        return len(text)
+
+    def finish(self):
+        """Writes the thread's unterminated last line, if any."""
+        if getattr(self.local, 'pending', ''): self.write('\n')
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+def load_pack_configs(config):
+    """
+    Returns the list of pack configs. modpack.json either describes a single pack, or holds a "packs" list
+    whose entries inherit every other top-level key as a default. Packs must not share their outputs.
+    """
+    if 'packs' not in config: return [config]
+    defaults = {k: v for k, v in config.items() if k != 'packs'}
+    packs = [{**defaults, **pack} for pack in config['packs']]
+    for pack in packs:
+        pack.setdefault('manifestPath', f".github/configs/source_manifest_{pack['packId']}.json")
+    for key in ('packId', 'infoFilePath', 'sourceDir', 'manifestPath'):
+        values = [str(pack.get(key)) for pack in packs]
+        if len(set(values)) != len(values):
+            sys.exit(f"Error: Every pack needs its own '{key}', found {values}.")
+    return packs
+
+def check_pack(config, args, repo_root, cache, suffix=''):
+    """
+    Checks one pack for updates and applies them: version lookup, download, compare, apply.
+    Output files are suffixed when several packs are checked. Returns the pack's outputs and metrics.
+    """
+    result = {'pack_id': config['packId'], 'pack_name': config['packName'], 'status': 'up-to-date',
+              'outputs': {}, 'metrics': {}}
+    outputs, metrics = result['outputs'], result['metrics']
+    pack_start = phase_start = time.perf_counter()
+
+    def end_phase(name):
+        nonlocal phase_start
+        now = time.perf_counter()
+        metrics[name] = round(now - phase_start, 3)
+        metrics['total'] = round(now - pack_start, 3)
+        phase_start = now
 
+    api_key = os.getenv('CF_API_KEY')
     pack_id, pack_name = config['packId'], config['packName']
     update_method = config.get('updateMethod', 'api')
     version_pattern = config.get('versionPattern')
     info_file_path = repo_root / config['infoFilePath']
     source_dir = repo_root / config['sourceDir']
-    attention_list = config.get('attentionList', {})
-    exclusion_patterns = config.get('exclusionPatterns', [])
+    attention = build_attention_matcher(config.get('attentionList', {}))
+    exclusion = PathMatcher.from_gitignore(config.get('exclusionPatterns', []))
+    manifest_path = repo_root / config.get('manifestPath', DEFAULT_MANIFEST_PATH)
+    # Finish or roll back a swap a previous run was interrupted in, before the source tree is compared
+    ShadowApply(source_dir).recover()
 
     with open(info_file_path, 'r', encoding='utf-8') as f:
         local_clean_version = json.load(f)['modpack']['version']
@@ -153,12 +527,12 @@ def main():
     print(f"Checking updates for: {pack_name} (ID: {pack_id})\nLocal version: {local_clean_version}")
     print(f"Using update method: {update_method}")
 
-    set_github_output("old_version", local_clean_version)
+    outputs["old_version"] = local_clean_version
 
     latest_clean_version = None
     local_version_id = None
     latest_version_id = None
-    latest_download_url = None # Specific to 'api' method
+    latest_file_info = None # Specific to 'api' method
 
     if update_method == 'cursethebeast':
         inspect_output = run_command(['./CurseTheBeast', 'inspect', str(pack_id)])
@@ -178,11 +552,11 @@ def main():
 
         if local_clean_version == latest_clean_version:
             print("Already up to date. Exiting.")
-            return
+            return result
 
         local_version_id = versions_map.get(local_clean_version)
         if not local_version_id:
-            print(f"Warning: Could not find version ID for local version '{local_clean_version}'. Diff report will not be generated.")
+            print(f"Warning: Could not find version ID for local version '{local_clean_version}'. The old archive cannot be looked up; use --diff-report to build the report from the source tree.")
         
         print(f"New version found: {latest_clean_version} (ID: {latest_version_id})")
         print(f"Old version: {local_clean_version} (ID: {local_version_id})")
@@ -210,11 +584,10 @@ def main():
         latest_file_info = files_data[0]
         latest_full_name = latest_file_info['displayName'].removesuffix('.zip')
         latest_version_id = latest_file_info['id']
-        latest_download_url = latest_file_info['downloadUrl']
 
         if local_full_name == latest_full_name:
             print("Already up to date. Exiting.")
-            return
+            return result
 
         def normalize_name(name):
             return name.lower().replace(" ", "-").removesuffix('.zip')
@@ -228,83 +601,90 @@ def main():
             local_version_id = fileName_map.get(normalized_local_name)
             
         if not local_version_id:
-            print(f"Warning: Could not find version ID for local version '{local_full_name}'. Diff report will not be generated.")
+            print(f"Warning: Could not find version ID for local version '{local_full_name}'. The old archive cannot be looked up; use --diff-report to build the report from the source tree.")
         
         latest_clean_version = extract_clean_version(latest_full_name, version_pattern)
         print(f"New version found: {latest_clean_version} (Full name: {latest_full_name}, ID: {latest_version_id})")
         print(f"Old version: {local_clean_version} (Full name: {local_full_name}, ID: {local_version_id})")
-
+    end_phase('lookup')
 
     # --- Download and Extract New Version ---
-    temp_root = repo_root / 'temp_update'
+    temp_root = repo_root / 'temp_update' / str(pack_id)
     shutil.rmtree(temp_root, ignore_errors=True)
     extract_dir = temp_root / 'extracted'
     os.makedirs(extract_dir, exist_ok=True)
-    zip_path = temp_root / f"{pack_id}.zip"
-    
+    # The archive lives in the download cache, outside temp_update, so re-runs for this version skip the download
+    key = cache_key(pack_id, latest_version_id)
+
     if update_method == 'cursethebeast':
         print(f"Downloading LATEST version ({latest_clean_version}) using CurseTheBeast...")
-        run_command(['./CurseTheBeast', 'download', str(pack_id), str(latest_version_id), '--output', str(zip_path)])
+        zip_path = cache.fetch_with(key, lambda dest: run_command(
+            ['./CurseTheBeast', 'download', str(pack_id), str(latest_version_id), '--output', str(dest)]))
     else: # api
         print(f"Downloading LATEST version ({latest_clean_version})...")
-        download_file(latest_download_url, zip_path)
+        zip_path = cache.fetch(key, latest_file_info['downloadUrl'], latest_file_info.get('fileLength'),
+                               curseforge_expected_hashes(latest_file_info))
+
+    end_phase('download')
 
-    with zipfile.ZipFile(zip_path, 'r') as z:
-        z.extractall(extract_dir)
     new_source_root = extract_dir / 'overrides'
-    if not new_source_root.exists():
-        sys.exit("Error: 'overrides' directory not found in the downloaded archive.")
+    compare_start = time.perf_counter()
+    with zipfile.ZipFile(zip_path, 'r') as z:
+        extracted_size = sum(info.file_size for info in z.infolist())
+        if args.extract_all:
+            z.extractall(extract_dir)
+    if args.extract_all:
+        if not new_source_root.exists():
+            sys.exit("Error: 'overrides' directory not found in the downloaded archive.")
+        new_side = ExtractedSide(new_source_root)
+    else:
+        # The pack is read in place; new_source_root only serves as the virtual root of the reported paths
+        new_side = ZipSide(zip_path, new_source_root)
+        if not new_side.members:
+            sys.exit("Error: 'overrides' directory not found in the downloaded archive.")
 
     # --- Compare files and detect changes---
-    updated_files, added_files, deleted_files = set(), set(), set()
-    for item in attention_list.get('filePatterns', []):
-        pattern = item['pattern'];
-        ignore_deletions = item.get('ignoreDeletions', False)
-        old_matches = set(source_dir.glob(pattern));
-        new_matches = set(new_source_root.glob(pattern))
-        relative_paths_from_old = {p.relative_to(source_dir) for p in old_matches}
-        relative_paths_from_new = {p.relative_to(new_source_root) for p in new_matches}
-        for rel_path in relative_paths_from_old.union(relative_paths_from_new):
-            old_f, new_f = source_dir / rel_path, new_source_root / rel_path
-            if not new_f.exists():
-                if not ignore_deletions: deleted_files.add(old_f)
-            elif not old_f.exists():
-                added_files.add(new_f)
-            elif get_file_hash(old_f) != get_file_hash(new_f):
-                updated_files.add(new_f)
-    for item in attention_list.get('folders', []):
-        folder_rel_str = item['path'];
-        ignore_deletions = item.get('ignoreDeletions', False)
-        old_d, new_d = source_dir / folder_rel_str, new_source_root / folder_rel_str
-        if not new_d.exists():
-            if old_d.exists() and not ignore_deletions: deleted_files.add(old_d)
-            continue
-        if not old_d.exists(): added_files.add(new_d); continue
-        dcmp = filecmp.dircmp(str(old_d), str(new_d), ignore=['.DS_Store'])
-        f_add, f_del, f_change = set(), set(), set()
-        compare_folders(dcmp, f_add, f_del, f_change)
-        added_files.update(f_add);
-        updated_files.update(f_change)
-        if not ignore_deletions: deleted_files.update(f_del)
-
-    added_files = apply_exclusion_rules(added_files, exclusion_patterns, new_source_root)
-    updated_files = apply_exclusion_rules(updated_files, exclusion_patterns, new_source_root)
+    manifest = load_manifest(manifest_path)
+    updated_files, added_files, deleted_files = detect_changes(
+        attention, exclusion, source_dir, new_side, manifest)
 
     if not any([updated_files, added_files, deleted_files]):
+        report_compare_cost(new_side, zip_path, extracted_size, time.perf_counter() - compare_start)
         print("Version updated, but no effective changes detected after applying rules. Exiting.")
-        return
-
-    # --- Apply changes to the repository ---
-    for item in sorted(list(deleted_files), key=lambda p: len(p.parts), reverse=True): shutil.rmtree(
-        item) if item.is_dir() else item.unlink()
-    all_to_copy = sorted(list(updated_files.union(added_files)))
-    for item in all_to_copy:
-        dest = source_dir / item.relative_to(new_source_root)
-        dest.parent.mkdir(parents=True, exist_ok=True)
-        if item.is_dir():
-            shutil.copytree(item, dest, dirs_exist_ok=True)
-        else:
-            shutil.copy2(item, dest)
+        end_phase('compare')
+        result['status'] = 'no-changes'
+        return result
+
+    # --- Key-level diff of lang and quest files, while the old files are still in place ---
+    changeset = build_changeset(pack_name, local_clean_version, latest_clean_version,
+                                iter_diff_pairs(updated_files, added_files, deleted_files, source_dir, new_side))
+    changeset_path = repo_root / f'lang_changeset{suffix}.json'
+    write_changeset(changeset, changeset_path)
+    if args.diff_report:
+        # The source tree is the old side, so the report has to be written before the update is swapped in
+        report_path = repo_root / f'diff_report{suffix}.html'
+        synced = {item.relative_to(new_source_root).as_posix() for item in updated_files | added_files}
+        synced |= {item.relative_to(source_dir).as_posix() for item in deleted_files}
+        ArchiveComparator(output_path=report_path, old_label=local_clean_version, new_label=latest_clean_version) \
+            .report(DirectorySide(source_dir), new_side, synced)
+        outputs["diff_report_path"] = str(report_path.relative_to(repo_root))
+    end_phase('compare')
+
+    # --- Apply changes to the repository: staged in a shadow tree, then swapped in ---
+    new_rels = sorted(item.relative_to(new_source_root).as_posix() for item in updated_files | added_files)
+    deleted_rels = sorted((item.relative_to(source_dir).as_posix() for item in deleted_files),
+                          key=lambda rel: rel.count('/'), reverse=True)
+    with ShadowApply(source_dir) as staging:
+        staging.link_unchanged(set(new_rels) | set(deleted_rels))
+        for rel in new_rels:
+            manifest[rel] = staging.place(rel, new_side)
+        for rel in deleted_rels:
+            staging.drop(rel)
+            manifest.pop(rel, None)
+    staging.report()
+    # Keep the manifest in sync with the applied update so the next run only hashes the new archive
+    save_manifest(manifest_path, manifest)
+    report_compare_cost(new_side, zip_path, extracted_size, time.perf_counter() - compare_start)
 
     with open(info_file_path, "r+", encoding="utf-8") as f:
         data = json.load(f)
@@ -314,19 +694,114 @@ def main():
         f.truncate()
 
     pr_body = generate_pr_body(pack_name, latest_clean_version, {f.relative_to(new_source_root) for f in updated_files},
-                               added_files, deleted_files, source_dir, new_source_root)
-    (repo_root / "pr_body.md").write_text(pr_body, encoding='utf-8')
+                               added_files, deleted_files, source_dir, new_source_root, summarize_changeset(changeset, changeset_path.name))
+    pr_body_path = repo_root / f"pr_body{suffix}.md"
+    pr_body_path.write_text(pr_body, encoding='utf-8')
+    shutil.rmtree(temp_root, ignore_errors=True)
+    end_phase('apply')
+
+    result['status'] = 'updated'
+    metrics.update(updated=len(updated_files), added=len(added_files), deleted=len(deleted_files),
+                   changed_keys=sum(len(e.get('changed', {})) for e in changeset['files'].values()))
+    outputs.update({
+        "changes_detected": "true",
+        "pack_name": pack_name,
+        "new_version": latest_clean_version,
+        "local_version_id": local_version_id or "",
+        "new_version_id": latest_version_id or "",
+        "info_file_path": str(info_file_path.relative_to(repo_root)),
+        "source_dir": str(config['sourceDir']),
+        "changeset_path": str(changeset_path.relative_to(repo_root)),
+        "pr_body_path": str(pr_body_path.relative_to(repo_root)),
+    })
+    return result
+
+def run_pack(config, args, repo_root, cache, suffix, stdout, stderr):
+    """Worker for one pack: tags its log lines and turns failures into a 'failed' result instead of stopping the other packs."""
+    prefix = f"[{config['packName']}] " if suffix else None
+    stdout.set_prefix(prefix)
+    stderr.set_prefix(prefix)
+    try:
+        return check_pack(config, args, repo_root, cache, suffix)
+    except (Exception, SystemExit) as e:
+        message = str(e.code) if isinstance(e, SystemExit) else f"An unexpected error occurred: {e}"
+        return {'pack_id': config['packId'], 'pack_name': config['packName'], 'status': 'failed',
+                'error': message, 'outputs': {}, 'metrics': {}}
+    finally:
+        stdout.finish()
+        stderr.finish()
+
+def report_pack_metrics(results, elapsed):
+    """Prints per-pack phase timings; packs overlap, so the total is bounded by the slowest pack, not the sum."""
+    print("\nPack            status       lookup  download  compare  apply   total")
+    for r in results:
+        m = r['metrics']
+        print(f"{str(r['pack_name'])[:15]:<15} {r['status']:<12}" + "".join(
+            f"{m[phase]:>7.2f}s" if phase in m else "       -" for phase in ('lookup', 'download', 'compare', 'apply', 'total')))
+    pack_totals = [r['metrics'].get('total', 0) for r in results]
+    print(f"Checked {len(results)} packs in {elapsed:.2f}s "
+          f"(slowest pack {max(pack_totals, default=0):.2f}s, sum of packs {sum(pack_totals):.2f}s).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the modpacks for updates and sync their source files.")
+    parser.add_argument('--rebuild-manifest', action='store_true',
+                        help="Rebuild the source content manifest from the current source tree and exit.")
+    parser.add_argument('--extract-all', action='store_true',
+                        help="Extract the whole pack to disk before comparing (legacy mode) instead of reading it in place.")
+    parser.add_argument('--diff-report', action='store_true',
+                        help="Also write the compare_archives HTML report of the synced files, from the pack already open and the source tree.")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f"Download cache directory, reused across runs (default: {DEFAULT_CACHE_DIR}).")
+    parser.add_argument('--cache-size-mb', type=int, default=DEFAULT_MAX_BYTES // 1024 // 1024,
+                        help="Evict least recently used cached packs beyond this size.")
+    args = parser.parse_args()
+
+    repo_root = Path('.')
+    config_path = repo_root / '.github' / 'configs' / 'modpack.json'
+    packs = load_pack_configs(load_config(config_path))
+
+    if args.rebuild_manifest:
+        for config in packs:
+            source_dir = repo_root / config['sourceDir']
+            manifest_path = repo_root / config.get('manifestPath', DEFAULT_MANIFEST_PATH)
+            save_manifest(manifest_path, hash_files([source_dir / rel for rel in walk_files(source_dir)], source_dir))
+            print(f"Manifest written to {manifest_path}.")
+        return
+
+    if not packs:
+        sys.exit(f"Error: No packs configured in {config_path}.")
+    cache = DownloadCache(args.cache_dir, args.cache_size_mb * 1024 * 1024)
+    multi = len(packs) > 1
+    stdout, stderr = PrefixedStream(sys.stdout), PrefixedStream(sys.stderr)
+    sys.stdout, sys.stderr = stdout, stderr
+    start = time.perf_counter()
+    try:
+        # Downloads are network and subprocess bound, so one thread per pack overlaps them with the other packs' comparisons
+        with ThreadPoolExecutor(max_workers=len(packs)) as executor:
+            results = list(executor.map(
+                lambda config: run_pack(config, args, repo_root, cache, f"_{config['packId']}" if multi else '', stdout, stderr),
+                packs))
+    finally:
+        sys.stdout, sys.stderr = stdout.stream, stderr.stream
+    shutil.rmtree(repo_root / 'temp_update', ignore_errors=True)
+    report_pack_metrics(results, time.perf_counter() - start)
+    metrics_path = repo_root / METRICS_PATH
+    metrics_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(metrics_path, 'w', encoding='utf-8') as f:
+        json.dump([{k: r[k] for k in ('pack_id', 'pack_name', 'status', 'metrics')} for r in results], f, indent=2, ensure_ascii=False)
 
     # --- Set outputs for GitHub Actions ---
-    set_github_output("changes_detected", "true")
-    set_github_output("pack_name", pack_name)
-    set_github_output("new_version", latest_clean_version)
-    set_github_output("local_version_id", local_version_id or "")
-    set_github_output("new_version_id", latest_version_id or "")
-    set_github_output("info_file_path", str(info_file_path.relative_to(repo_root)))
-    set_github_output("source_dir", str(config['sourceDir']))
+    if multi:
+        updated = [r['outputs'] for r in results if r['status'] == 'updated']
+        set_github_output("changes_detected", "true" if updated else "false")
+        set_github_output("packs", json.dumps(updated, ensure_ascii=False))
+    else:
+        for name, value in results[0]['outputs'].items(): set_github_output(name, value)
 
-    shutil.rmtree(temp_root, ignore_errors=True)
+    failed = [r for r in results if r['status'] == 'failed']
+    if failed:
+        sys.exit("\n".join(f"{r['pack_name']}: {r['error']}" if multi else r['error'] for r in failed))
     print("Script finished successfully.")
 
 
@@ -0,0 +1,218 @@
+"""
+简繁转换工具
+
+根据 zh_cn 译文在本地生成 zh_hk / zh_tw 译文，无需在 Paratranz 上分别维护三种语言。
+转换引擎采用与 OpenCC 相同的分阶段最长匹配算法，词典直接使用 OpenCC 的文本格式
+词典（STPhrases.txt、STCharacters.txt、HKVariants.txt、TWVariants.txt 等），
+并支持以项目术语表覆盖词典结果。
+
+词典目录通过 --dict-dir 参数或环境变量 OPENCC_DICT_DIR 指定，
+术语表默认为 .github/configs/zh_glossary.json。
+
+用法:
+  python zh_convert.py CNPack/kubejs/assets/gtceu/lang/zh_cn.json
+  python zh_convert.py CNPack --dict-dir path/to/opencc/data/dictionary
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_GLOSSARY_FILE = ".github/configs/zh_glossary.json"
+
+# 每种目标语言依次执行的转换阶段，每个阶段由若干 OpenCC 词典组成
+CONVERSION_CHAINS = {
+    "zh_hk": [
+        ["STPhrases.txt", "STCharacters.txt"],
+        ["HKVariants.txt"],
+    ],
+    "zh_tw": [
+        ["STPhrases.txt", "STCharacters.txt"],
+        # 不能用 TWPhrases*.txt：会匹配到反向的 TWPhrasesRev.txt，把台湾用语又转回去
+        ["TWPhrases.txt", "TWPhrasesIT.txt", "TWPhrasesName.txt", "TWPhrasesOther.txt"],
+        ["TWVariants.txt"],
+    ],
+}
+TARGET_LANGUAGES = list(CONVERSION_CHAINS)
+# JSON / SNBT 的字符串字面量；其后紧跟冒号的是键名，不做转换
+STRING_LITERAL = re.compile(r"(\"(?:[^\"\\]|\\.)*\"|'(?:[^'\\]|\\.)*')(\s*:)?", re.DOTALL)
+
+
+def load_opencc_dictionary(path: Path) -> dict[str, str]:
+    """读取 OpenCC 文本词典，每行格式为 “原文<Tab>候选1 候选2 ...”，取第一个候选。"""
+    mapping = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            source, _, targets = line.rstrip("\n").partition("\t")
+            if targets:
+                mapping[source] = targets.split(" ")[0]
+    return mapping
+
+
+class MaxMatchDictionary:
+    """
+    正向最长匹配词典。按词条首字记录最大词长，查找时从最长的候选切片开始探测，
+    效果等同于在前缀树上查找最长匹配，但每次探测都是一次字典哈希查找。
+    """
+
+    def __init__(self, mapping: dict[str, str]):
+        self.mapping = mapping
+        self.max_len: dict[str, int] = {}
+        for key in mapping:
+            if key and len(key) > self.max_len.get(key[0], 0):
+                self.max_len[key[0]] = len(key)
+
+    def scan(self, text: str) -> Iterator[tuple[str, bool]]:
+        """逐段产出 (文本, 是否命中词典)，命中的段落已替换为目标文本。"""
+        mapping, max_len = self.mapping, self.max_len
+        i, n = 0, len(text)
+        unmatched_start = 0
+        while i < n:
+            longest = max_len.get(text[i])
+            if longest:
+                for length in range(min(longest, n - i), 0, -1):
+                    target = mapping.get(text[i : i + length])
+                    if target is not None:
+                        if unmatched_start < i:
+                            yield text[unmatched_start:i], False
+                        yield target, True
+                        i += length
+                        unmatched_start = i
+                        break
+                else:
+                    i += 1
+            else:
+                i += 1
+        if unmatched_start < n:
+            yield text[unmatched_start:], False
+
+    def convert(self, text: str) -> str:
+        return "".join(piece for piece, _ in self.scan(text))
+
+
+class ChineseConverter:
+    def __init__(
+        self, stages: list[MaxMatchDictionary], glossary: Optional[dict[str, str]] = None
+    ):
+        self.stages = stages
+        self.glossary = MaxMatchDictionary(glossary) if glossary else None
+
+    @classmethod
+    def from_opencc(
+        cls, dict_dir: str, lang: str, glossary_file: str = DEFAULT_GLOSSARY_FILE
+    ) -> "ChineseConverter":
+        stages = []
+        for stage_files in CONVERSION_CHAINS[lang]:
+            mapping: dict[str, str] = {}
+            for pattern in stage_files:
+                for path in sorted(Path(dict_dir).glob(pattern)):
+                    mapping.update(load_opencc_dictionary(path))
+            if mapping:
+                stages.append(MaxMatchDictionary(mapping))
+        if not stages:
+            raise FileNotFoundError(f"在 {dict_dir} 中未找到 {lang} 所需的 OpenCC 词典。")
+        return cls(stages, load_glossary(glossary_file, lang))
+
+    def _convert_plain(self, text: str) -> str:
+        for stage in self.stages:
+            text = stage.convert(text)
+        return text
+
+    def convert(self, text: str) -> str:
+        if not self.glossary:
+            return self._convert_plain(text)
+        # 术语表优先匹配，命中的片段直接输出，其余片段再依次经过各阶段词典
+        return "".join(
+            piece if matched else self._convert_plain(piece)
+            for piece, matched in self.glossary.scan(text)
+        )
+
+
+def load_glossary(glossary_file: str, lang: str) -> dict[str, str]:
+    if not glossary_file or not os.path.exists(glossary_file):
+        return {}
+    with open(glossary_file, "r", encoding="utf-8") as f:
+        return json.load(f).get(lang, {})
+
+
+def load_converters(
+    dict_dir: Optional[str] = None, glossary_file: str = DEFAULT_GLOSSARY_FILE
+) -> dict[str, ChineseConverter]:
+    """加载所有目标语言的转换器；未配置词典目录时返回空字典，表示不启用本地转换。"""
+    dict_dir = dict_dir or os.environ.get("OPENCC_DICT_DIR", "")
+    if not dict_dir:
+        return {}
+    return {
+        lang: ChineseConverter.from_opencc(dict_dir, lang, glossary_file)
+        for lang in TARGET_LANGUAGES
+    }
+
+
+def variant_path(zh_cn_path: Path, lang: str) -> Path:
+    return zh_cn_path.with_name(zh_cn_path.name.replace("zh_cn", lang))
+
+
+def convert_values(content: str, converter: ChineseConverter) -> str:
+    """只转换文件文本中的字符串值，键名及字符串之外的内容（格式、数字等）原样保留。"""
+
+    def replace(match: re.Match) -> str:
+        literal, colon = match.groups()
+        if colon:
+            return match.group()
+        return literal[0] + converter.convert(literal[1:-1]) + literal[-1]
+
+    return STRING_LITERAL.sub(replace, content)
+
+
+def derive_variants(
+    zh_cn_path: Path, converters: dict[str, ChineseConverter]
+) -> list[Path]:
+    """
+    由 zh_cn 文件（JSON 或 SNBT）生成同目录下的 zh_hk / zh_tw 文件。
+    逐个转换文本中的字符串值，键名不变，文件格式也与 zh_cn 保持一致。
+    """
+    with open(zh_cn_path, "r", encoding="utf-8") as f:
+        content = f.read()
+    written = []
+    for lang, converter in converters.items():
+        output_path = variant_path(zh_cn_path, lang)
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(convert_values(content, converter))
+        written.append(output_path)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="由 zh_cn 译文生成 zh_hk / zh_tw 译文")
+    parser.add_argument("path", help="zh_cn 文件，或包含 zh_cn 文件的目录")
+    parser.add_argument("--dict-dir", help="OpenCC 词典目录 (默认读取 OPENCC_DICT_DIR)")
+    parser.add_argument(
+        "--glossary",
+        default=DEFAULT_GLOSSARY_FILE,
+        help=f"项目术语表路径 (默认: {DEFAULT_GLOSSARY_FILE})",
+    )
+    args = parser.parse_args()
+
+    converters = load_converters(args.dict_dir, args.glossary)
+    if not converters:
+        print("错误: 未指定 OpenCC 词典目录 (--dict-dir 或 OPENCC_DICT_DIR)。", file=sys.stderr)
+        sys.exit(1)
+
+    root = Path(args.path)
+    files = [root] if root.is_file() else sorted(
+        p for p in root.rglob("*zh_cn*") if p.suffix in (".json", ".snbt")
+    )
+    for zh_cn_path in files:
+        for output_path in derive_variants(zh_cn_path, converters):
+            print(f"已生成: {output_path}")
+
+
+if __name__ == "__main__":
+    main()